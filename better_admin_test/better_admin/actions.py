@@ -0,0 +1,171 @@
+"""
+Bulk actions for the list views. An action runs over the selected rows, or,
+with select-across, over every row that the filters match. Either way it
+works on the queryset, with update() and chunked deletes, so neither every
+object nor every pk has to be loaded or posted.
+"""
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.db.models import FileField
+from django.db.models.deletion import ProtectedError
+from django.http import HttpResponseRedirect
+
+from better_admin.deletion import delete_queryset
+from better_admin.caching import bump_generation
+
+
+#: rows deleted per transaction
+BATCH_SIZE = getattr(settings, 'BETTER_ADMIN_ACTION_BATCH_SIZE', 1000)
+
+
+class Action(object):
+    """
+    A bulk action. function(view, request, queryset) does the work and may
+    return a response; otherwise the user is sent back to the list. Only
+    users with perm, or passing test, get to see and run it.
+    """
+
+    def __init__(self, label, function, perm=None, test=None, attrs=None):
+        self.label = label
+        self.function = function
+        self.perm = perm
+        self.test = test
+        self.attrs = attrs or {}
+
+    def is_allowed(self, user):
+        if not self.perm is None and not user.has_perm(self.perm):
+            return False
+        if not self.test is None and not self.test(user):
+            return False
+        return True
+
+
+def delete_in_batches(queryset, batch_size=BATCH_SIZE):
+    """
+    Deletes the rows of queryset, and what they cascade to, batch_size
+    rows at a time. Returns the number of rows of queryset deleted.
+    """
+    deleted = [0]
+
+    def progress(model, count):
+        if model is queryset.model:
+            deleted[0] += count
+
+    delete_queryset(queryset, batch_size, progress)
+    return deleted[0]
+
+
+def delete_selected(view, request, queryset):
+    try:
+        deleted = delete_in_batches(queryset)
+    except ProtectedError as e:
+        messages.error(request, e.args[0])
+        return
+    messages.success(request, 'Deleted %d %s' % (
+        deleted, view.get_model_name_plural()))
+
+
+def get_update_fields(model, exclude=None):
+    """
+    Returns the fields of model that can be bulk updated from a text input.
+    """
+    exclude = exclude or ()
+    return [f for f in model._meta.fields
+            if f.editable and not f.primary_key and not f.name in exclude
+            and not isinstance(f, FileField)]
+
+
+def update_selected(view, request, queryset):
+    name = request.POST.get('action-field')
+    fields = dict((f.name, f) for f in get_update_fields(
+        queryset.model, (view.extra_context or {}).get('exclude')))
+    if not name in fields:
+        messages.error(request, 'Choose a field to update')
+        return
+    try:
+        value = fields[name].formfield().clean(
+            request.POST.get('action-value'))
+    except ValidationError as e:
+        messages.error(request, '%s: %s' % (fields[name].verbose_name,
+                                            ' '.join(e.messages)))
+        return
+    updated = queryset.update(**{name: value})
+    bump_generation(queryset.model)
+    messages.success(request, 'Updated %s of %d %s' % (
+        fields[name].verbose_name, updated,
+        view.get_model_name_plural()))
+
+
+def actions_factory(model_admin):
+    """
+    Returns the default actions for the list view of model_admin: bulk
+    delete, bulk update of a field and bulk export.
+    """
+    def export_selected(view, request, queryset):
+        file_format = model_admin.get_export_formats()[0]()
+        return model_admin.export_queryset(request, queryset, file_format)
+
+    actions = [
+        Action('Delete', delete_selected,
+               perm=model_admin.get_perm('delete')),
+        Action('Update', update_selected,
+               perm=model_admin.get_perm('update'),
+               attrs={'class': 'action-update'}),
+    ]
+    if hasattr(model_admin, 'export_queryset'):
+        actions.append(Action('Export', export_selected,
+                              test=lambda u: u.is_superuser))
+    return actions
+
+
+class ActionViewMixin(object):
+    """
+    To be used with BetterListView. Puts the actions the user may run into
+    the context and runs the one that is posted.
+    """
+    actions = None
+
+    def get_actions(self):
+        return [a for a in self.actions or ()
+                if a.is_allowed(self.request.user)]
+
+    def get_action_queryset(self):
+        """
+        Returns the rows to act on: the selected ones, or with select-across
+        every row the filters match.
+        """
+        queryset = self.get_queryset()
+        if self.request.POST.get('select-across') == '1':
+            return queryset
+        return queryset.filter(pk__in=self.request.POST.getlist(
+            'action-select'))
+
+    def get_context_data(self, **kwargs):
+        context = super(ActionViewMixin, self).get_context_data(**kwargs)
+        context.update({
+            'actions': [(a.label, a.attrs) for a in self.get_actions()],
+            'action_fields': get_update_fields(
+                self.model, (self.extra_context or {}).get('exclude')),
+        })
+        return context
+
+    def post(self, request, *args, **kwargs):
+        redirect = HttpResponseRedirect(request.get_full_path())
+        actions = self.get_actions()
+        try:
+            index = int(request.POST.get('action', 0)) - 1
+            if index < 0:
+                raise IndexError
+            action = actions[index]
+        except (ValueError, IndexError):
+            messages.error(request, 'Choose an action')
+            return redirect
+        if request.POST.get('select-across') != '1' and \
+                not request.POST.getlist('action-select'):
+            messages.error(request, 'Select some rows first')
+            return redirect
+        response = action.function(self, request, self.get_action_queryset())
+        if response is None:
+            return redirect
+        return response
@@ -8,6 +8,9 @@ from better_admin.core import BetterAppAdmin, \
                               BetterModelAdmin
 from better_admin.views import home
 from better_admin.mixins import SUPERUSER_ACCESS
+from better_admin.metrics import metrics_view
+from better_admin.profiling import slow_requests_view
+from better_admin.advisor import index_advice_view
 
 
 class UserModelAdmin(BetterModelAdmin):
@@ -62,6 +65,18 @@ class AuthAppAdmin(BetterAppAdmin):
                 home,
                 name='home'),
 
+            url(r'^metrics/$',
+                metrics_view,
+                name='better_admin_metrics'),
+
+            url(r'^slow_requests/$',
+                slow_requests_view,
+                name='better_admin_slow_requests'),
+
+            url(r'^index_advice/$',
+                index_advice_view,
+                name='better_admin_index_advice'),
+
             url(r'^auth/login/$',
                 auth_views.login,
                 {'template_name': 'auth/login.html'},
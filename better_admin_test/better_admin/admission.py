@@ -0,0 +1,146 @@
+"""
+Admission control for heavy operations. Exports and imports share the
+workers with the cheap list and detail views, so a few big ones at once can
+starve everybody else. Heavy views are capped globally and per user; the
+requests over the cap are not kept waiting on a worker but get a page that
+shows their position in the queue and tries again shortly, or, for the
+JSON endpoints, a JSON error with their position and a Retry-After header.
+
+The queue and the caps are per process, like the workers they protect.
+
+Settings:
+
+    BETTER_ADMIN_HEAVY_LIMIT       heavy operations running at once
+    BETTER_ADMIN_HEAVY_USER_LIMIT  heavy operations of one user at once
+    BETTER_ADMIN_HEAVY_POLL        seconds between tries of a queued request
+"""
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+
+
+LIMIT = getattr(settings, 'BETTER_ADMIN_HEAVY_LIMIT', 2)
+USER_LIMIT = getattr(settings, 'BETTER_ADMIN_HEAVY_USER_LIMIT', 1)
+POLL_SECONDS = getattr(settings, 'BETTER_ADMIN_HEAVY_POLL', 3)
+#: a queued request that has not tried again for this long gives up its place
+TICKET_TTL = POLL_SECONDS * 5
+SESSION_KEY = 'better_admin_tickets'
+
+#: view types whose GET is the heavy part, the rest only queue their POSTs
+READ_VIEW_TYPES = ('list', 'detail', 'lookup', 'api_list', 'api_detail')
+#: view types that answer in JSON, and are queued in JSON too
+API_VIEW_TYPES = ('api_list', 'api_detail', 'api_bulk')
+
+
+class Scheduler(object):
+    """
+    Keeps count of the heavy operations running and queues the rest in
+    ticket order. A ticket is admitted once it fits under the caps and no
+    ticket before it that fits is still waiting.
+    """
+
+    def __init__(self, limit, user_limit, ttl):
+        self.limit = limit
+        self.user_limit = user_limit
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.tickets = itertools.count(1)
+        self.total = 0
+        self.running = {}
+        self.waiting = OrderedDict()
+
+    def fits(self, user):
+        return self.total < self.limit and \
+               self.running.get(user, 0) < self.user_limit
+
+    def admit(self, user, ticket=None):
+        """
+        Tries to admit user, holding ticket if they were queued already.
+        Returns (admitted, ticket, position).
+        """
+        with self.lock:
+            now = time.time()
+            for t, (u, seen) in self.waiting.items():
+                if seen < now - self.ttl:
+                    del self.waiting[t]
+            if not ticket in self.waiting or self.waiting[ticket][0] != user:
+                ticket = next(self.tickets)
+            self.waiting[ticket] = (user, now)
+            ahead = [u for t, (u, seen) in self.waiting.items()
+                     if t < ticket]
+            if self.fits(user) and not any(self.fits(u) for u in ahead):
+                del self.waiting[ticket]
+                self.total += 1
+                self.running[user] = self.running.get(user, 0) + 1
+                return True, None, 0
+            return False, ticket, len(ahead) + 1
+
+    def release(self, user):
+        with self.lock:
+            self.total -= 1
+            self.running[user] -= 1
+            if not self.running[user]:
+                del self.running[user]
+
+
+scheduler = Scheduler(LIMIT, USER_LIMIT, TICKET_TTL)
+
+
+def queued_response(request, view_type, position):
+    """
+    Returns the 503 for a request that is number position in the queue.
+    """
+    if view_type in API_VIEW_TYPES:
+        response = HttpResponse(json.dumps({'error': 'Queued, try again',
+                                            'position': position}),
+                                content_type='application/json', status=503)
+    else:
+        response = TemplateResponse(request, 'better_admin/queued.html',
+                                    {'position': position,
+                                     'poll': POLL_SECONDS,
+                                     'post': [(k, v) for k, v in
+                                              request.POST.items() if
+                                              k != 'csrfmiddlewaretoken'],
+                                     'files': request.FILES.keys()},
+                                    status=503)
+    response['Retry-After'] = str(POLL_SECONDS)
+    return response
+
+
+def admission_controlled(view, view_name, view_type):
+    """
+    Wraps view so that at most LIMIT of its heavy requests, and USER_LIMIT
+    of one user, run at once across all the heavy views.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method == 'GET' and not view_type in READ_VIEW_TYPES) \
+                or not request.user.is_authenticated():
+            # nothing heavy, or the view turns them away anyway
+            return view(request, *args, **kwargs)
+        user = request.user.pk
+        tickets = request.session.get(SESSION_KEY, {})
+        admitted, ticket, position = scheduler.admit(user,
+                                                     tickets.get(view_name))
+        if ticket is None:
+            tickets.pop(view_name, None)
+        else:
+            tickets[view_name] = ticket
+        request.session[SESSION_KEY] = tickets
+        if not admitted:
+            return queued_response(request, view_type, position)
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        finally:
+            scheduler.release(user)
+        return response
+    return wrapper
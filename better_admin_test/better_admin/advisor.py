@@ -0,0 +1,214 @@
+"""
+Index advisor. Every filter field and sort key that the generated filter
+sets and auto_sort allow could do with an index, but only a few of them are
+actually used. This watches the list requests, keeps count of the column
+combinations that the filters and sorts actually hit and how long those
+requests took, and recommends indexes for them, ranked by the time they
+would likely save.
+
+Columns are ordered equality filters first, then the sort key, then range
+filters, which is the order in which a b-tree index can serve them.
+WildCardFilter fields are left out, an iregex cannot use an index.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.backends.util import truncate_name
+from django.db.models import ManyToManyField
+from django.template.response import TemplateResponse
+from django.contrib.auth.decorators import user_passes_test
+
+from django_filters.filters import RangeFilter
+
+from better_admin.filters import WildCardFilter, CustomRangeFilter
+
+
+#: whether list requests are recorded at all
+ENABLED = getattr(settings, 'BETTER_ADMIN_INDEX_ADVISOR', True)
+
+
+class Usage(object):
+    """
+    Holds, per model, the request count and time of every column
+    combination, and of the plain, unfiltered and unsorted requests that
+    serve as the baseline.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.columns = {}
+        self.baselines = {}
+
+    def record(self, model, columns, seconds):
+        with self.lock:
+            if columns:
+                key, values = (model, columns), self.columns
+            else:
+                key, values = model, self.baselines
+            count, total = values.get(key, (0, 0.0))
+            values[key] = (count + 1, total + seconds)
+
+    def clear(self):
+        with self.lock:
+            self.columns.clear()
+            self.baselines.clear()
+
+    def advice(self):
+        """
+        Returns a list of Index, the most worthwhile first.
+        """
+        with self.lock:
+            columns = self.columns.items()
+            baselines = dict(self.baselines)
+        indexes = []
+        for (model, names), (count, total) in columns:
+            if model in baselines:
+                base_count, base_total = baselines[model]
+                baseline = base_total / base_count
+            else:
+                baseline = 0.0
+            saving = max(0.0, total - count * baseline)
+            indexes.append(Index(model, names, count, total, saving))
+        indexes.sort(key=lambda index: index.saving, reverse=True)
+        return indexes
+
+
+usage = Usage()
+
+
+class Index(object):
+    """
+    A recommended index on the given fields of model.
+    """
+
+    def __init__(self, model, names, count, seconds, saving):
+        self.model = model
+        self.names = names
+        self.count = count
+        self.seconds = seconds
+        self.saving = saving
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def db_columns(self):
+        return [self.model._meta.get_field(n).column for n in self.names]
+
+    @property
+    def label(self):
+        return '%s.%s' % (self.model._meta.app_label,
+                          self.model._meta.object_name)
+
+    def get_name(self, connection):
+        name = '%s_%s_idx' % (self.table, '_'.join(self.db_columns))
+        return truncate_name(name, connection.ops.max_name_length())
+
+    def as_sql(self):
+        connection = connections[router.db_for_write(self.model)]
+        qn = connection.ops.quote_name
+        return 'CREATE INDEX %s ON %s (%s);' % (
+            qn(self.get_name(connection)), qn(self.table),
+            ', '.join(qn(c) for c in self.db_columns))
+
+    def as_south(self):
+        """
+        Lines for the forwards and backwards of a South schema migration.
+        """
+        args = "'%s', %r" % (self.table, self.db_columns)
+        return ('db.create_index(%s)' % args, 'db.delete_index(%s)' % args)
+
+    def as_meta(self):
+        """
+        The change to the model definition.
+        """
+        if len(self.names) == 1:
+            return '%s: db_index=True' % self.names[0]
+        return 'Meta.index_together = [%r]' % (tuple(self.names),)
+
+
+def is_indexed(model, names):
+    """
+    Whether the database already has an index starting with names.
+    """
+    opts = model._meta
+    if len(names) == 1:
+        field = opts.get_field(names[0])
+        if field.db_index or field.unique or field.primary_key:
+            return True
+    for together in list(opts.unique_together) + list(opts.index_together):
+        if tuple(together[:len(names)]) == tuple(names):
+            return True
+    return False
+
+
+def get_index_columns(model, filter_set, data):
+    """
+    Returns the fields of model that the filters and sort given in data
+    would want an index on, in index order. That is an empty tuple for a
+    plain request and None when nothing a new index would help was used.
+    """
+    used, equality, ranges = False, [], []
+    for name, f in filter_set.base_filters.items():
+        values = [data.get(name), data.get('%s_0' % name),
+                  data.get('%s_1' % name)]
+        if not any(values):
+            continue
+        used = True
+        if isinstance(f, WildCardFilter):
+            continue
+        if isinstance(f, (RangeFilter, CustomRangeFilter)):
+            ranges.append(name)
+        else:
+            equality.append(name)
+    names = sorted(equality)
+    sort_by = data.get('sort_by', '').lstrip('-')
+    if sort_by:
+        used = True
+        if not sort_by in names:
+            names.append(sort_by)
+    names += [n for n in sorted(ranges) if not n in names]
+
+    field_names = [f.name for f in model._meta.fields]
+    names = tuple(n for n in names if n in field_names and
+                  not isinstance(model._meta.get_field(n), ManyToManyField))
+    if not names:
+        return None if used else ()
+    if is_indexed(model, names):
+        return None
+    return names
+
+
+class IndexAdvisorMixin(object):
+    """
+    To be used with BetterListView. Records the columns that the filters and
+    sort of each request use along with how long it took, render included.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not ENABLED or request.method != 'GET':
+            return super(IndexAdvisorMixin, self).dispatch(request, *args,
+                                                           **kwargs)
+        start = time.time()
+        response = super(IndexAdvisorMixin, self).dispatch(request, *args,
+                                                           **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.status_code == 200:
+            columns = get_index_columns(self.model, self.get_filter_set(),
+                                        request.GET)
+            if not columns is None:
+                usage.record(self.model, columns, time.time() - start)
+        return response
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def index_advice_view(request):
+    """
+    Lists the recommended indexes as SQL, South and model changes.
+    """
+    return TemplateResponse(request, 'better_admin/index_advice.html',
+                            {'indexes': usage.advice()})
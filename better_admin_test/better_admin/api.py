@@ -0,0 +1,386 @@
+"""
+JSON list and detail endpoints next to the HTML views, for scripts that
+would otherwise scrape the pages. They go through the same filter_set,
+get_request_queryset() scoping, permissions and sort_by rules as the pages,
+read only the columns asked for with values() and page with keyset cursors,
+so that a late page costs as much as the first. Pages are streamed and read
+from the database a chunk at a time.
+
+    GET <app>/<model>/api/?<filters>&sort_by=-volume&fields=name,volume
+    {"results": [{"id": 7, "name": "X", "volume": 100}, ...],
+     "next": "<cursor>"}
+
+    GET <app>/<model>/api/?<same filters and sort>&cursor=<cursor>
+    GET <app>/<model>/api/<pk>/
+
+Foreign keys are returned as the pk they point to. If the database runs
+out of query budget after a page has started, it ends early with
+"timed_out": true and a next cursor to go on from.
+
+Rows are created and updated in bulk by posting a JSON array, as
+application/json and with the csrftoken cookie in an X-CSRFToken header,
+to
+
+    POST <app>/<model>/api/bulk/
+    [{"name": "New", "volume": 1, ...}, {"id": 7, "volume": 2}]
+    {"created": 1, "updated": 1, "errors": [{"index": 2, "errors": {...}}]}
+
+Rows with a pk update that row, with just the fields given, the others are
+created. Every row is validated with the form and hooks of the create or
+update view; the valid ones are saved batch by batch with bulk_create() and
+save_changes(), the invalid ones are reported by their index. Like there,
+save() is not called and no save signals are sent, except for rows that
+set many to many fields, which are saved one by one.
+
+Endpoints queued by admission control, see admission.py, answer 503 with
+{"error": ..., "position": <place in the queue>} and a Retry-After header.
+
+Settings:
+
+    BETTER_ADMIN_API_LIMIT       rows per page unless limit asks otherwise
+    BETTER_ADMIN_API_MAX_LIMIT   most rows per page
+    BETTER_ADMIN_API_CHUNK_SIZE  rows read from the database at a time
+    BETTER_ADMIN_API_BATCH_SIZE  rows validated and saved together
+"""
+import datetime
+import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction, DatabaseError
+from django.db.models import Q, ForeignKey
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, StreamingHttpResponse
+
+from better_admin.batch import save_changes
+from better_admin.caching import bump_generation
+from better_admin.routers import read_from_replica
+from better_admin.timeouts import query_time_budget, QueryTimeout, \
+                                  QUERY_BUDGET
+
+
+LIMIT = getattr(settings, 'BETTER_ADMIN_API_LIMIT', 100)
+MAX_LIMIT = getattr(settings, 'BETTER_ADMIN_API_MAX_LIMIT', 10000)
+CHUNK_SIZE = getattr(settings, 'BETTER_ADMIN_API_CHUNK_SIZE', 500)
+BATCH_SIZE = getattr(settings, 'BETTER_ADMIN_API_BATCH_SIZE', 500)
+#: GET parameters of the API itself, not passed on to the filter_set
+API_PARAMS = ('fields', 'cursor', 'limit', 'sort_by')
+
+
+class ApiError(Exception):
+    """
+    Raised for requests the API cannot answer, shown as a 400.
+    """
+    pass
+
+
+def dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), content_type='application/json',
+                        status=status)
+
+
+def get_filter_data(request):
+    """
+    Returns the GET parameters of request meant for the filter_set.
+    """
+    data = request.GET.copy()
+    for name in API_PARAMS:
+        data.pop(name, None)
+    return data
+
+
+def get_fields(model, request, exclude=None):
+    """
+    Returns the names of the columns asked for in the fields parameter,
+    all but exclude by default, the pk always first.
+    """
+    exclude = exclude or ()
+    pk_name = model._meta.pk.name
+    allowed = [f.name for f in model._meta.fields if not f.name in exclude]
+    fields = [n for n in request.GET.get('fields', '').split(',') if n]
+    for name in fields:
+        if not name in allowed and name != pk_name:
+            raise ApiError('Unknown field %s' % name)
+    fields = fields or allowed
+    return [pk_name] + [n for n in fields if n != pk_name]
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', LIMIT))
+    except ValueError:
+        raise ApiError('limit must be a number')
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ApiError('limit must be between 1 and %d' % MAX_LIMIT)
+    return limit
+
+
+def get_ordering(model, request):
+    """
+    Returns (field name, descending) as sort_by asks for, by the rules of
+    the list page, falling back to the pk.
+    """
+    sort_by = request.GET.get('sort_by') or ''
+    name = sort_by.lstrip('-')
+    if not name in [f.name for f in model._meta.fields]:
+        return model._meta.pk.name, False
+    if model._meta.get_field(name).null:
+        raise ApiError('Cannot page by %s, it may be empty' % name)
+    return name, sort_by.startswith('-')
+
+
+def get_cursor(row, field, pk_name):
+    value = row[field]
+    if isinstance(value, (datetime.datetime, datetime.time)):
+        # DjangoJSONEncoder cuts these to milliseconds, the cursor has to
+        # fall between two rows exactly; the filters parse it back
+        value = value.isoformat()
+    return urlsafe_b64encode(dumps([value, row[pk_name]]))
+
+
+def read_cursor(cursor):
+    """
+    Returns the (sort value, pk) of the row a page starts after.
+    """
+    try:
+        value, pk = json.loads(urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError):
+        raise ApiError('Invalid cursor')
+    return value, pk
+
+
+def after(queryset, field, descending, position):
+    """
+    Returns the rows of queryset that come after position in the order of
+    field and pk.
+    """
+    value, pk = position
+    op = 'lt' if descending else 'gt'
+    if field == queryset.model._meta.pk.name:
+        return queryset.filter(**{'pk__%s' % op: pk})
+    return queryset.filter(Q(**{'%s__%s' % (field, op): value}) |
+                           Q(**{field: value, 'pk__%s' % op: pk}))
+
+
+def page_response(request, queryset, exclude=None, budget=None):
+    """
+    Returns a streaming response with the page of queryset that request
+    asks for. Raises ApiError for bad parameters, and QueryTimeout if the
+    first chunk runs out of budget.
+    """
+    model = queryset.model
+    pk_name = model._meta.pk.name
+    fields = get_fields(model, request, exclude)
+    field, descending = get_ordering(model, request)
+    limit = get_limit(request)
+    cursor = request.GET.get('cursor')
+    position = read_cursor(cursor) if cursor else None
+    if budget is None:
+        budget = QUERY_BUDGET
+
+    sign = '-' if descending else ''
+    order = field
+    model_field = model._meta.get_field(field)
+    if isinstance(model_field, ForeignKey) and \
+            model_field.rel.to._meta.ordering:
+        # not by the ordering of the model it points to
+        order = '%s__pk' % field
+    columns = fields + [field] if not field in fields else fields
+    queryset = queryset.order_by(sign + order, sign + 'pk').values(*columns)
+
+    def fetch(position, count):
+        rows = queryset
+        if not position is None:
+            rows = after(rows, field, descending, position)
+        with read_from_replica(request):
+            with query_time_budget(budget, rows.db):
+                return list(rows[:count])
+
+    def stream(rows, asked):
+        sent, last, timed_out = 0, None, False
+        yield '{"results": ['
+        while rows:
+            for row in rows:
+                yield (',' if sent else '') + \
+                      dumps(dict((n, row[n]) for n in fields))
+                sent, last = sent + 1, row
+            if sent >= limit or len(rows) < asked:
+                break
+            asked = min(limit - sent, CHUNK_SIZE)
+            try:
+                rows = fetch((last[field], last[pk_name]), asked)
+            except QueryTimeout:
+                timed_out = True
+                break
+        more = timed_out or (sent >= limit and len(rows) == asked)
+        yield '], "next": %s%s}' % (
+            dumps(get_cursor(last, field, pk_name) if more and last
+                  else None),
+            ', "timed_out": true' if timed_out else '')
+
+    # the first chunk up front, so that errors still get a proper status
+    asked = min(limit, CHUNK_SIZE)
+    return StreamingHttpResponse(stream(fetch(position, asked), asked),
+                                 content_type='application/json')
+
+
+def read_rows(request):
+    """
+    Returns the list of rows posted as a JSON array.
+    """
+    content_type = request.META.get('CONTENT_TYPE', '').split(';')[0]
+    if content_type != 'application/json':
+        raise ApiError('Post the rows as application/json')
+    try:
+        rows = json.loads(request.body)
+    except ValueError:
+        raise ApiError('Invalid JSON')
+    if not isinstance(rows, list) or \
+            not all(isinstance(row, dict) for row in rows):
+        raise ApiError('Post a JSON array of objects')
+    if len(rows) > MAX_LIMIT:
+        raise ApiError('At most %d rows at a time' % MAX_LIMIT)
+    return rows
+
+
+def get_values(obj):
+    return dict((f.attname, getattr(obj, f.attname))
+                for f in obj._meta.fields)
+
+
+class BulkWriter(object):
+    """
+    Validates and saves posted rows batch by batch. forms maps 'create'
+    and 'update' to (form class, pre_render, pre_save), or None where the
+    user may not.
+    """
+
+    def __init__(self, request, queryset, forms, batch_size=BATCH_SIZE):
+        self.request = request
+        self.queryset = queryset
+        self.model = queryset.model
+        self.forms = forms
+        self.batch_size = batch_size
+        self.using = router.db_for_write(self.model)
+        self.result = {'created': 0, 'updated': 0, 'errors': []}
+
+    def error(self, index, errors):
+        self.result['errors'].append({'index': index, 'errors': errors})
+
+    def write(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            self.write_batch(list(enumerate(
+                rows[start:start + self.batch_size], start)))
+        return self.result
+
+    def get_form(self, row, instances):
+        """
+        Returns the validated form for row, or None after recording why.
+        """
+        pk_name = self.model._meta.pk.name
+        view_type = 'create' if row.get(pk_name) is None else 'update'
+        if self.forms.get(view_type) is None:
+            return None, {'__all__': ['Permission denied']}
+        form_class, pre_render, pre_save = self.forms[view_type]
+        if view_type == 'update':
+            obj = instances.get(row[pk_name])
+            if obj is None:
+                return None, {'__all__': ['Not found']}
+            data = model_to_dict(obj)
+            data.update(row)
+            form = form_class(data=data, instance=obj)
+        else:
+            form = form_class(data=row)
+        pre_render(form, self.request)
+        if not form.is_valid():
+            return None, dict((name, list(errors))
+                              for name, errors in form.errors.items())
+        pre_save(form, self.request)
+        return form, None
+
+    def write_batch(self, batch):
+        pk_field = self.model._meta.pk
+        pks = []
+        for index, row in batch:
+            if row.get(pk_field.name) is None:
+                continue
+            try:
+                row[pk_field.name] = pk_field.to_python(row[pk_field.name])
+            except ValidationError:
+                continue
+            pks.append(row[pk_field.name])
+        instances = self.queryset.in_bulk(pks) if pks else {}
+        before = dict((pk, get_values(obj)) for pk, obj in instances.items())
+
+        # (index, kind, payload) for every valid row
+        saves = []
+        for index, row in batch:
+            form, errors = self.get_form(row, instances)
+            if form is None:
+                self.error(index, errors)
+                continue
+            obj = form.instance
+            m2m = [f.name for f in self.model._meta.many_to_many
+                   if f.name in form.fields and f.name in row]
+            if m2m or self.model._meta.parents:
+                saves.append((index, 'form', form))
+            elif obj.pk is None or not obj.pk in before:
+                saves.append((index, 'create', obj))
+            else:
+                changed = dict((f.name, getattr(obj, f.attname))
+                               for f in self.model._meta.fields
+                               if getattr(obj, f.attname) !=
+                                  before[obj.pk][f.attname])
+                saves.append((index, 'update', {obj.pk: changed}))
+
+        try:
+            with transaction.commit_on_success(using=self.using):
+                counts = self.save(saves)
+        except DatabaseError:
+            # find the rows at fault, one by one
+            counts = [0, 0]
+            for save in saves:
+                try:
+                    with transaction.commit_on_success(using=self.using):
+                        created, updated = self.save([save])
+                except DatabaseError as e:
+                    self.error(save[0], {'__all__': [unicode(e)]})
+                    continue
+                counts[0] += created
+                counts[1] += updated
+        self.result['created'] += counts[0]
+        self.result['updated'] += counts[1]
+
+    def save(self, saves):
+        """
+        Saves the rows, creates with one bulk_create() and updates with
+        save_changes(), within the transaction of the caller. Returns the
+        number of rows (created, updated).
+        """
+        created, updated, changes = [], [], {}
+        for index, kind, payload in saves:
+            if kind == 'create':
+                created.append(payload)
+            elif kind == 'update':
+                changes.update(payload)
+        if created:
+            self.model._base_manager.db_manager(self.using) \
+                                    .bulk_create(created)
+            bump_generation(self.model)
+        if changes:
+            save_changes(self.model, changes, self.using, commit=False)
+        created, updated = len(created), len(changes)
+        for index, kind, form in saves:
+            if kind == 'form':
+                if form.instance.pk is None:
+                    created += 1
+                else:
+                    updated += 1
+                form.save()
+        return created, updated
@@ -0,0 +1,173 @@
+"""
+Batched saves. Editing the same field of a page of rows through the update
+view is one form and one full save() per row. Here the changed cells are
+collected first and written with as few UPDATE statements as possible,
+only to the columns that changed and all in one transaction.
+
+Like the bulk Update action, saving with update() does not call save() or
+send the save signals.
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.exceptions import ImproperlyConfigured
+from django.db import router, transaction
+from django.forms import ModelForm
+from django.forms.models import BaseModelFormSet, modelformset_factory
+from django.http import HttpResponseForbidden, HttpResponseRedirect
+
+from better_admin.actions import get_update_fields
+from better_admin.caching import bump_generation
+
+
+#: rows per UPDATE statement, below the variable limit of sqlite
+BATCH_SIZE = getattr(settings, 'BETTER_ADMIN_SAVE_BATCH_SIZE', 500)
+GRID_PREFIX = 'grid'
+
+
+def update_groups(model, groups, using, batch_size):
+    """
+    Runs the UPDATEs of save_changes(). Returns the set of pks updated.
+    """
+    updated = set()
+    for (name, value), pks in groups.items():
+        for i in range(0, len(pks), batch_size):
+            batch = pks[i:i + batch_size]
+            model._base_manager.using(using).filter(pk__in=batch) \
+                               .update(**{name: value})
+            updated.update(batch)
+    return updated
+
+
+def save_changes(model, changes, using=None, batch_size=BATCH_SIZE,
+                 commit=True):
+    """
+    Saves changes, a dict of pk to a dict of field name to value, with one
+    UPDATE per column and value, batch_size rows at a time, in a single
+    transaction. With commit=False the UPDATEs are part of the transaction
+    of the caller instead, which a nested commit_on_success would commit.
+    Returns the number of rows updated.
+    """
+    if using is None:
+        using = router.db_for_write(model)
+    groups = OrderedDict()
+    for pk, values in changes.items():
+        for name, value in values.items():
+            groups.setdefault((name, value), []).append(pk)
+    if commit:
+        with transaction.commit_on_success(using=using):
+            updated = update_groups(model, groups, using, batch_size)
+    else:
+        updated = update_groups(model, groups, using, batch_size)
+    bump_generation(model)
+    return len(updated)
+
+
+class GridForm(ModelForm):
+    """
+    Posts the values it was rendered with, so that only the cells the user
+    changed count as changed, not those changed by someone else since.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(GridForm, self).__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.show_hidden_initial = True
+
+
+class GridFormSet(BaseModelFormSet):
+    """
+    Takes the rows as they are shown, sorted and paginated, as queryset.
+    """
+
+    def get_queryset(self):
+        return self.queryset
+
+    def _existing_object(self, pk):
+        # a row posted from outside the queryset gets a blank instance,
+        # where the formset would take the row at the same index
+        obj = super(GridFormSet, self)._existing_object(pk)
+        return self.model() if obj is None else obj
+
+
+def get_changes(formset):
+    """
+    Returns the changed cells of a valid formset as a dict of pk to a dict
+    of field name to value, leaving out forms that do not belong to the
+    row they were posted for.
+    """
+    pk_name = formset.model._meta.pk.name
+    changes = {}
+    for form in formset.forms:
+        posted = form.cleaned_data.get(pk_name)
+        if posted is None or posted.pk != form.instance.pk:
+            continue
+        changed = [name for name in form.changed_data if name != pk_name]
+        if changed:
+            changes[form.instance.pk] = dict((name, form.cleaned_data[name])
+                                             for name in changed)
+    return changes
+
+
+class EditableGridMixin(object):
+    """
+    To be used with BetterListView. Renders editable_fields of the rows on
+    the page as inputs, validates the cells posted with a model formset and
+    saves the changed ones with save_changes(). Users need grid_perm.
+    """
+    editable_fields = None
+    grid_perm = None
+
+    def get_editable_fields(self):
+        allowed = [f.name for f in get_update_fields(self.model)]
+        for name in self.editable_fields or ():
+            if not name in allowed:
+                raise ImproperlyConfigured('%s cannot be edited in the list '
+                                           'of %s' % (name, self.model.__name__))
+        return self.editable_fields or ()
+
+    def can_edit_grid(self):
+        return bool(self.get_editable_fields()) and \
+               (self.grid_perm is None or
+                self.request.user.has_perm(self.grid_perm))
+
+    def get_grid_formset_class(self):
+        return modelformset_factory(self.model, form=GridForm,
+                                    formset=GridFormSet, extra=0,
+                                    fields=self.get_editable_fields())
+
+    def get_grid_formset(self, rows):
+        """
+        Returns the formset for rows, the invalid one that was posted if
+        any, or None if the user may not edit.
+        """
+        if not self.can_edit_grid():
+            return None
+        bound = getattr(self, 'grid_formset', None)
+        if not bound is None:
+            return bound
+        return self.get_grid_formset_class()(queryset=list(rows),
+                                             prefix=GRID_PREFIX)
+
+    def post(self, request, *args, **kwargs):
+        if not 'grid-save' in request.POST:
+            return super(EditableGridMixin, self).post(request, *args,
+                                                       **kwargs)
+        if not self.can_edit_grid():
+            return HttpResponseForbidden()
+        pk_suffix = '-%s' % self.model._meta.pk.name
+        pks = [v for k, v in request.POST.items()
+               if k.startswith(GRID_PREFIX + '-') and k.endswith(pk_suffix)]
+        formset = self.get_grid_formset_class()(
+            request.POST, prefix=GRID_PREFIX,
+            queryset=self.get_queryset().filter(pk__in=pks))
+        if formset.is_valid():
+            saved = save_changes(self.model, get_changes(formset))
+            messages.success(request, 'Saved %d %s' % (
+                saved, self.get_model_name_plural()))
+            return HttpResponseRedirect(request.get_full_path())
+        self.grid_formset = formset
+        self.object_list = self.get_queryset()
+        return self.render_to_response(self.get_context_data(
+            object_list=self.object_list))
@@ -14,11 +14,18 @@ from django.template.response import TemplateResponse
 from django.core.urlresolvers import reverse
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
+from django.utils.decorators import method_decorator
 
 from import_export.resources import modelresource_factory
 from import_export.forms import ExportForm, ConfirmImportForm, ImportForm
 from import_export.formats import base_formats
 from better_admin.import_export_extras import CustomXLS
+from better_admin.metrics import observe
+from better_admin.timeouts import query_time_budget, QueryTimeout, \
+                                 QUERY_BUDGET
+from better_admin.routers import read_from_replica
+from better_admin.coalesce import coalesce, get_sql_key
+from better_admin.hierarchy import get_date_hierarchy_range
 
 
 #: import / export formats
@@ -70,10 +77,13 @@ class BetterImportAdminMixin(object):
 
         return patterns('%s.views' % meta.app_label,
                         url(r'^%s/process_import/$' % base_url,
-                            self.process_import,
+                            self.get_heavy_view(self.process_import,
+                                                'process_import',
+                                                view_name1),
                             name=view_name1),
                         url(r'^%s/import/$' % base_url,
-                            self.import_action,
+                            self.get_heavy_view(self.import_action,
+                                                'import', view_name2),
                             name=view_name2))
 
     def get_import_formats(self):
@@ -82,7 +92,7 @@ class BetterImportAdminMixin(object):
         """
         return [f for f in self.formats if f().can_import()]
 
-    @user_passes_test(lambda u: u.is_superuser)
+    @method_decorator(user_passes_test(lambda u: u.is_superuser))
     def process_import(self, request, *args, **kwargs):
         '''
         Perform the actuall import action (after the user has confirmed he
@@ -106,6 +116,8 @@ class BetterImportAdminMixin(object):
 
             resource.import_data(dataset, dry_run=False,
                                  raise_errors=True)
+            observe(request, 'import_bytes_total', len(data))
+            observe(request, 'import_rows_total', len(dataset))
 
             success_message = 'Import finished'
             messages.success(request, success_message)
@@ -115,7 +127,7 @@ class BetterImportAdminMixin(object):
                           (opts.app_label.lower(), opts.object_name.lower()))
             return HttpResponseRedirect(url)
 
-    @user_passes_test(lambda u: u.is_superuser)
+    @method_decorator(user_passes_test(lambda u: u.is_superuser))
     def import_action(self, request, *args, **kwargs):
         '''
         Perform a dry_run of the import to make sure the import will not
@@ -205,7 +217,8 @@ class BetterExportAdminMixin(object):
 
         return patterns('%s.views' % meta.app_label,
                         url(r'^%s/export/$' % base_url,
-                            self.export_action,
+                            self.get_heavy_view(self.export_action,
+                                                'export', view_name),
                             name=view_name))
 
     def get_export_formats(self):
@@ -224,7 +237,47 @@ class BetterExportAdminMixin(object):
                                  file_format.get_extension())
         return filename
 
-    @user_passes_test(lambda u: u.is_superuser)
+    def export_queryset(self, request, queryset, file_format):
+        """
+        Returns a response with queryset exported in file_format, or None,
+        with an error message, if the export ran out of query budget.
+        """
+        resource = self.get_export_resource()()
+        budget = self.query_budget
+        if budget is None:
+            budget = QUERY_BUDGET
+
+        def export():
+            # iterator() keeps no result cache around; the dataset and the
+            # file are still built in memory, whole, as tablib does
+            with query_time_budget(budget, queryset.db):
+                data = resource.export(queryset.iterator())
+            return file_format.export_data(data), len(data)
+
+        try:
+            with read_from_replica(request):
+                # identical concurrent exports share one run
+                key = ('export', request.resolver_match.url_name,
+                       file_format.__class__.__name__, queryset.db,
+                       get_sql_key(queryset))
+                content, rows = coalesce(key, export)
+        except QueryTimeout:
+            messages.error(request, 'The export took longer than %s seconds. '
+                                    'Narrow the filters and try again.'
+                                    % budget)
+            return None
+        observe(request, 'export_bytes_total', len(content))
+        observe(request, 'export_rows_total', rows)
+        response = HttpResponse(
+            content,
+            mimetype='application/octet-stream',
+        )
+        response['Content-Disposition'] = 'attachment; filename=%s' % (
+            self.get_export_filename(file_format),
+        )
+        return response
+
+    @method_decorator(user_passes_test(lambda u: u.is_superuser))
     def export_action(self, request, *args, **kwargs):
         """
         The function based view that does the export. Copied from
@@ -238,21 +291,18 @@ class BetterExportAdminMixin(object):
                 int(form.cleaned_data['file_format'])
             ]()
 
-            resource_class = self.get_export_resource()
+            # Export filtered queryset. Start off a per-request clone.
             queryset = self.get_request_queryset(request)
-            data = resource_class().export(queryset)
-            #Export filtered queryset
             filter_set = self.get_filter_set()
-            filtered_queryset = filter_set(request.GET, queryset=self.queryset)
-            data = resource.export(filtered_queryset.qs)
-            response = HttpResponse(
-                file_format.export_data(data),
-                mimetype='application/octet-stream',
-            )
-            response['Content-Disposition'] = 'attachment; filename=%s' % (
-                self.get_export_filename(file_format),
-            )
-            return response
+            queryset = filter_set(request.GET, queryset=queryset).qs
+            date_hierarchy = getattr(self, 'list_date_hierarchy', None)
+            if not date_hierarchy is None:
+                # the period the list was drilled down to
+                queryset = queryset.filter(**get_date_hierarchy_range(
+                    self.get_model(), date_hierarchy, request.GET))
+            response = self.export_queryset(request, queryset, file_format)
+            if not response is None:
+                return response
 
         context = {}
         context['form'] = form
@@ -0,0 +1,95 @@
+"""
+Caching of what the list page computes over all the rows that match the
+filters, the summary row and the like, as opposed to the rows of the page.
+Entries are keyed like coalescing is, by the view, its permission and the
+SQL of the filtered queryset, so requests that would list the same rows
+share them. Concurrent misses are coalesced, see coalesce.py.
+
+Keys also carry the generation of the model, a counter that is bumped
+whenever its rows are saved or deleted, by the model signals or by the
+bulk writes of better_admin that do without them. Writes that bypass both,
+and changes to related tables, show once the entry times out.
+
+Settings:
+
+    BETTER_ADMIN_CACHE_SECONDS  how long an entry is kept
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+
+from better_admin.coalesce import coalesce, get_sql_key
+
+
+CACHE_SECONDS = getattr(settings, 'BETTER_ADMIN_CACHE_SECONDS', 60)
+#: how long a generation is remembered when it is not bumped
+GENERATION_SECONDS = 30 * 24 * 3600
+
+
+def get_generation_key(model):
+    meta = model._meta
+    return 'better_admin:generation:%s.%s' % (meta.app_label,
+                                              meta.module_name)
+
+
+def get_generation(model):
+    """
+    Returns the generation of the rows of model.
+    """
+    key = get_generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        # starts from the time, not to meet generations that were forgotten
+        cache.add(key, int(time.time()), GENERATION_SECONDS)
+        generation = cache.get(key, int(time.time()))
+    return generation
+
+
+def bump_generation(model):
+    """
+    Starts a new generation of the rows of model, after they changed.
+    """
+    try:
+        cache.incr(get_generation_key(model))
+    except ValueError:
+        # never asked for, or forgotten; the next one starts anew
+        pass
+
+
+def model_changed(sender, **kwargs):
+    bump_generation(sender)
+
+
+post_save.connect(model_changed, dispatch_uid='better_admin_generation_save')
+post_delete.connect(model_changed,
+                    dispatch_uid='better_admin_generation_delete')
+
+
+def get_cache_key(name, view_key, queryset):
+    """
+    Returns the key of what name computes over queryset for the view under
+    view_key, or None if queryset runs no query at all.
+    """
+    sql_key = get_sql_key(queryset)
+    if sql_key is None:
+        return None
+    digest = hashlib.sha1(repr((view_key, queryset.db, sql_key))).hexdigest()
+    return 'better_admin:%s:%s:%s' % (name, get_generation(queryset.model),
+                                      digest)
+
+
+def cached(key, fn, timeout=None):
+    """
+    Returns fn() from the cache under key, computing and caching it if it
+    is not there. fn() must not return None. A key of None is not cached.
+    """
+    if key is None:
+        return fn()
+    result = cache.get(key)
+    if result is None:
+        result = coalesce(key, fn)
+        cache.set(key, result, CACHE_SECONDS if timeout is None else timeout)
+    return result
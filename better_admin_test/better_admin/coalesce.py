@@ -0,0 +1,211 @@
+"""
+Single-flight coalescing of identical expensive reads. When a link to a
+filtered list or an export is shared, many people run the very same query
+at the same time. With coalescing on, the first of them runs it and the
+rest wait for and share its result.
+
+Requests are keyed by the model admin view, its permission and the SQL
+they run. The SQL already reflects the filters and sort that were applied,
+so parameters that make no difference, their order and empty filters, do
+not split the key.
+
+Settings:
+
+    BETTER_ADMIN_COALESCE = 'process'
+        share between the threads of a process
+    BETTER_ADMIN_COALESCE = 'host'
+        also share between processes, through lock files and the cache. Needs a cache that the processes share; results may then be
+        up to BETTER_ADMIN_COALESCE_SECONDS old.
+"""
+import copy
+import hashlib
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.query import QuerySet
+from django.db.models.sql.datastructures import EmptyResultSet
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+#: None, 'process' or 'host'
+MODE = getattr(settings, 'BETTER_ADMIN_COALESCE', None)
+#: where the lock files of 'host' coalescing go
+LOCK_DIR = getattr(settings, 'BETTER_ADMIN_COALESCE_LOCK_DIR',
+                   os.path.join(tempfile.gettempdir(),
+                                'better_admin_coalesce'))
+#: how many lock files 'host' coalescing spreads the keys over
+LOCK_FILES = getattr(settings, 'BETTER_ADMIN_COALESCE_LOCK_FILES', 64)
+#: how long 'host' coalescing keeps a result around for late waiters
+CACHE_SECONDS = getattr(settings, 'BETTER_ADMIN_COALESCE_SECONDS', 2)
+
+
+class Call(object):
+    """
+    A computation in flight.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Runs one computation per key at a time; callers that come along while
+    it runs wait for it and get the same result, or error.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+        if not leader:
+            call.event.wait()
+            if not call.error is None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+        return call.result
+
+
+flights = SingleFlight()
+
+
+def get_lock_path(key):
+    """
+    Returns the lock file for the hex digest key. Keys share a fixed set of
+    LOCK_FILES files, instead of leaving a file behind for every query ever
+    coalesced; different keys on the same file merely take turns.
+    """
+    return os.path.join(LOCK_DIR, '%d.lock' % (int(key, 16) % LOCK_FILES))
+
+
+def across_processes(key, fn):
+    """
+    Runs fn under the exclusive lock file of key, unless a process that
+    held the lock before left the result in the cache.
+    """
+    if not os.path.isdir(LOCK_DIR):
+        try:
+            os.makedirs(LOCK_DIR)
+        except OSError:
+            # made by another process in the meantime
+            pass
+    cache_key = 'better_admin_coalesce_%s' % key
+    with open(get_lock_path(key), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            result = cache.get(cache_key)
+            if result is None:
+                result = fn()
+                cache.set(cache_key, result, CACHE_SECONDS)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return result
+
+
+def coalesce(key, fn):
+    """
+    Returns fn(), shared with identical concurrent calls with the same key.
+    """
+    if MODE is None:
+        return fn()
+    digest = hashlib.sha1(repr(key)).hexdigest()
+    if MODE == 'host' and not fcntl is None:
+        return flights.do(digest, lambda: across_processes(digest, fn))
+    return flights.do(digest, fn)
+
+
+def get_sql_key(queryset):
+    """
+    Returns the SQL and params that queryset would run, or None if it runs
+    none at all.
+    """
+    try:
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return None
+    return sql, tuple(params)
+
+
+class CoalescingQuerySet(QuerySet):
+    """
+    QuerySet whose rows and count are coalesced with identical queries
+    under the same coalesce_key.
+    """
+    coalesce_key = None
+
+    def _clone(self, klass=None, setup=False, **kwargs):
+        kwargs.setdefault('coalesce_key', self.coalesce_key)
+        return super(CoalescingQuerySet, self)._clone(klass, setup, **kwargs)
+
+    def iterator(self):
+        sql_key = get_sql_key(self)
+        if self.coalesce_key is None or sql_key is None:
+            return super(CoalescingQuerySet, self).iterator()
+        parent = super(CoalescingQuerySet, self)
+        rows = coalesce((self.coalesce_key, self.db, sql_key),
+                        lambda: list(parent.iterator()))
+        # every request gets instances of its own
+        return (copy.copy(row) for row in rows)
+
+    def count(self):
+        if self.coalesce_key is None or not self._result_cache is None:
+            return super(CoalescingQuerySet, self).count()
+        sql_key = get_sql_key(self)
+        if sql_key is None:
+            return super(CoalescingQuerySet, self).count()
+        parent = super(CoalescingQuerySet, self)
+        return coalesce((self.coalesce_key, self.db, 'count', sql_key),
+                        parent.count)
+
+
+def coalescing(queryset, key):
+    """
+    Returns a clone of queryset that is coalesced under key.
+    """
+    if MODE is None:
+        return queryset
+    return queryset._clone(klass=CoalescingQuerySet, coalesce_key=key)
+
+
+class CoalesceMixin(object):
+    """
+    To be used with BetterListView. Coalesces the list queries, paginator
+    count included, of identical concurrent requests.
+    """
+
+    def get_coalesce_key(self):
+        resolver_match = getattr(self.request, 'resolver_match', None)
+        return (resolver_match.url_name if resolver_match else
+                self.__class__.__name__,
+                getattr(self, 'permission_required', None))
+
+    def get_queryset(self):
+        queryset = super(CoalesceMixin, self).get_queryset()
+        if self.request.method != 'GET':
+            # bulk actions must see the rows as they are
+            return queryset
+        return coalescing(queryset, self.get_coalesce_key())
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import get_app, get_models
 from django.conf.urls import patterns
@@ -8,6 +10,12 @@ from django_nav.conditionals import user_has_perm
 from better_admin.mixins import BetterModelAdminMixin
 
 
+# The BetterAppAdmin of every app, the last one instantiated for it. This is
+# what lets us walk the generated admins from outside of the urlconf, e.g.
+# for warming up.
+registry = OrderedDict()
+
+
 class BetterModelAdmin(BetterModelAdminMixin):
     """
     BetterModelAdmin creates and takes care of CRUD for the
@@ -37,6 +45,8 @@ class BetterModelAdmin(BetterModelAdminMixin):
         urls += self.get_popup_urls()
         urls += self.get_export_urls()
         urls += self.get_import_urls()
+        urls += self.get_lookup_urls()
+        urls += self.get_api_urls()
         urls += self.get_update_urls()
         urls += self.get_delete_urls()
         urls += self.get_detail_urls()
@@ -83,6 +93,7 @@ class BetterAppAdmin(object):
                 if model_name in self.exclude:
                     continue
                 self.model_admins[model_name] = self.get_model_admin(model)
+        registry[app_name] = self
 
     def get_app_name(self):
         """
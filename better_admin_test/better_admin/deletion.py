@@ -0,0 +1,280 @@
+"""
+Deleting without the collector. Django's Collector loads every related
+object into memory, to show what will go and again to delete it, which
+does not work for a Company with a hundred thousand Tariffs.
+
+preview() counts what a delete would take along with one COUNT query per
+relation, the same ones whatever the data. delete_queryset() deletes rows batch by batch, dependent rows
+first, each batch in a transaction of its own, and can do so in a thread
+of its own with delete_in_background().
+
+Models with delete signal receivers or generic relations are handed to the
+collector, still a batch at a time, since those need the objects.
+"""
+import itertools
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import connections, transaction
+from django.db.models import signals, CASCADE, SET_NULL, SET_DEFAULT, \
+                             PROTECT
+from django.db.models.deletion import ProtectedError
+from django.http import HttpResponseRedirect
+
+from better_admin.caching import bump_generation
+
+
+#: rows per batch and transaction
+BATCH_SIZE = getattr(settings, 'BETTER_ADMIN_DELETE_BATCH_SIZE', 1000)
+#: rows, dependents included, above which the delete view deletes in the
+#: background; None to always delete right away
+BACKGROUND_THRESHOLD = getattr(settings, 'BETTER_ADMIN_DELETE_BACKGROUND',
+                               None)
+#: how deep cascades are followed
+MAX_DEPTH = 20
+
+ACTIONS = {CASCADE: 'delete', SET_NULL: 'set to null',
+           SET_DEFAULT: 'set to default', PROTECT: 'protect'}
+
+
+def get_related(model):
+    """
+    Returns (related model, foreign key, on_delete) for every foreign key
+    pointing to model, including those of many to many through tables.
+    """
+    return [(r.model, r.field, r.field.rel.on_delete)
+            for r in model._meta.get_all_related_objects(include_hidden=True)]
+
+
+def get_cascade_models(model, depth=0):
+    """
+    Returns the set of models that deleting rows of model deletes from.
+    """
+    models = set([model])
+    if depth < MAX_DEPTH:
+        for related, field, on_delete in get_related(model):
+            if on_delete is CASCADE and not related in models:
+                models |= get_cascade_models(related, depth + 1)
+    return models
+
+
+def needs_collector(model):
+    """
+    Whether deleting rows of model needs the objects themselves.
+    """
+    for m in get_cascade_models(model):
+        if signals.pre_delete.has_listeners(m) or \
+                signals.post_delete.has_listeners(m):
+            return True
+        if any(hasattr(f, 'bulk_related_objects')
+               for f in m._meta.virtual_fields):
+            return True
+    return False
+
+
+def preview(queryset, depth=0, path=()):
+    """
+    Returns a list of (model, action, count) for what deleting queryset
+    would do, queryset itself first. Rows reachable along more than one
+    path are counted once for each. Relations are followed whether they
+    match rows or not, so the queries only depend on the models, except
+    for cascades that lead back to a model on the path, which are followed
+    for as long as they match rows.
+    """
+    model = queryset.model
+    result = []
+    if depth == 0:
+        result.append((model, 'delete', queryset.count()))
+    if depth >= MAX_DEPTH:
+        return result
+    path = path + (model,)
+    pks = queryset.values('pk')
+    for related, field, on_delete in get_related(model):
+        if not on_delete in ACTIONS:
+            continue
+        dependents = related._base_manager.using(queryset.db) \
+                            .filter(**{'%s__in' % field.name: pks})
+        count = dependents.count()
+        if count:
+            result.append((related, ACTIONS[on_delete], count))
+        if on_delete is CASCADE and (count or not related in path):
+            result += preview(dependents, depth + 1, path)
+    return result
+
+
+def summarize(rows):
+    """
+    Adds up the counts of preview() per model and action, in order.
+    """
+    totals = []
+    for key, group in itertools.groupby(
+            sorted(rows, key=lambda r: (r[0]._meta.object_name, r[1])),
+            key=lambda r: (r[0], r[1])):
+        totals.append((key[0], key[1], sum(r[2] for r in group)))
+    # the rows asked for first
+    totals.sort(key=lambda r: r[0] != rows[0][0])
+    return totals
+
+
+def delete_batch(model, pks, using, batch_size, progress, depth=0):
+    """
+    Deletes the rows of model with the given pks after their dependents.
+    """
+    if depth > MAX_DEPTH:
+        raise RuntimeError('Cascade deeper than %d' % MAX_DEPTH)
+    for related, field, on_delete in get_related(model):
+        dependents = related._base_manager.using(using) \
+                            .filter(**{'%s__in' % field.name: pks})
+        if on_delete is CASCADE:
+            delete_queryset(dependents, batch_size, progress, depth + 1)
+        elif on_delete is SET_NULL:
+            with transaction.commit_on_success(using=using):
+                dependents.update(**{field.name: None})
+            bump_generation(related)
+        elif on_delete is SET_DEFAULT:
+            with transaction.commit_on_success(using=using):
+                dependents.update(**{field.name: field.get_default()})
+            bump_generation(related)
+    with transaction.commit_on_success(using=using):
+        model._base_manager.using(using).filter(pk__in=pks) \
+                           ._raw_delete(using=using)
+    bump_generation(model)
+    if not progress is None:
+        progress(model, len(pks))
+
+
+def delete_queryset(queryset, batch_size=BATCH_SIZE, progress=None,
+                    depth=0):
+    """
+    Deletes the rows of queryset, and what they cascade to, batch_size
+    rows at a time. Only the pks of queryset are loaded, never the
+    objects. Raises ProtectedError, before deleting anything, if a
+    protected row is in the way. Calls progress(model, count) after every
+    batch.
+    """
+    model, using = queryset.model, queryset.db
+    if depth == 0:
+        protected = [m._meta.verbose_name_plural
+                     for m, action, count in preview(queryset)
+                     if action == 'protect']
+        if protected:
+            raise ProtectedError('Cannot delete %s, some %s refer to them '
+                                 'through protected foreign keys' % (
+                                 model._meta.verbose_name_plural,
+                                 ', '.join(protected)), [])
+    if depth == 0:
+        # Fix the rows up front. A filter over related rows could match
+        # other rows once their dependents are gone.
+        all_pks = list(queryset.values_list('pk', flat=True))
+        batches = (all_pks[i:i + batch_size]
+                   for i in range(0, len(all_pks), batch_size))
+    else:
+        # dependents are selected by the pks of their parents, which
+        # only ever shrinks
+        batches = iter(lambda: list(queryset.values_list(
+                       'pk', flat=True)[:batch_size]), [])
+    collector = depth == 0 and needs_collector(model)
+    for pks in batches:
+        if collector:
+            with transaction.commit_on_success(using=using):
+                model._base_manager.using(using).filter(pk__in=pks).delete()
+            if not progress is None:
+                progress(model, len(pks))
+        else:
+            delete_batch(model, pks, using, batch_size, progress, depth)
+
+
+class Job(object):
+    """
+    A delete running in the background.
+    """
+
+    def __init__(self, queryset, batch_size):
+        self.queryset = queryset
+        self.batch_size = batch_size
+        self.deleted = {}
+        self.done = False
+        self.error = None
+
+    def progress(self, model, count):
+        name = model._meta.verbose_name_plural
+        self.deleted[name] = self.deleted.get(name, 0) + count
+
+    def run(self):
+        try:
+            delete_queryset(self.queryset, self.batch_size, self.progress)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            connections[self.queryset.db].close()
+
+
+#: the latest background deletes of this process
+jobs = deque(maxlen=20)
+
+
+def delete_in_background(queryset, batch_size=BATCH_SIZE):
+    """
+    Starts deleting queryset in a thread of its own and returns its Job.
+    """
+    job = Job(queryset, batch_size)
+    jobs.append(job)
+    thread = threading.Thread(target=job.run)
+    thread.daemon = True
+    thread.start()
+    return job
+
+
+class FastDeleteMixin(object):
+    """
+    To be used with BetterDeleteView. Shows the counts of what the delete
+    will take along and deletes with delete_queryset() instead of the
+    collector, in the background if it is big.
+    """
+
+    def get_delete_queryset(self):
+        return self.get_queryset().model._base_manager \
+                   .filter(pk=self.object.pk)
+
+    def get_context_data(self, **kwargs):
+        context = super(FastDeleteMixin, self).get_context_data(**kwargs)
+        cascade = summarize(preview(self.get_delete_queryset()))
+        context.update({
+            'cascade': [(m._meta.verbose_name_plural, action, count)
+                        for m, action, count in cascade],
+            'protected': any(action == 'protect'
+                             for m, action, count in cascade),
+        })
+        return context
+
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        queryset = self.get_delete_queryset()
+        rows = preview(queryset)
+        if any(action == 'protect' for m, action, count in rows):
+            return self.protected_response()
+        if not BACKGROUND_THRESHOLD is None and \
+                sum(c for m, a, c in rows) > BACKGROUND_THRESHOLD:
+            delete_in_background(queryset)
+            messages.info(request, '%s is being deleted in the background'
+                                   % self.object)
+        else:
+            try:
+                delete_queryset(queryset)
+            except ProtectedError:
+                # protected since the preview above
+                return self.protected_response()
+        return HttpResponseRedirect(success_url)
+
+    def protected_response(self):
+        """
+        Shows the delete page again, saying that the record is protected,
+        as the delete action does, instead of failing with a 500.
+        """
+        context = self.get_context_data(object=self.object)
+        context['protected'] = True
+        return self.render_to_response(context)
@@ -0,0 +1,136 @@
+"""
+Facet counts in the filter sidebar. Next to every choice of a boolean,
+choice or foreign key filter, the number of the rows that match the
+filters that have it, so that users do not have to try filters blindly.
+
+The boolean and choice facets have few values each and are all counted
+with a single GROUP BY over their columns together, every foreign key with
+one of its own. The counts are cached like the summary row, see
+caching.py, and, run during the render, are subject to the query budget
+of the list, see timeouts.py. Foreign keys to tables big enough for an
+autocomplete widget are left out.
+
+Set facets on the view, or list_facets on a model admin, to True for all
+the filters that can have them, or to a tuple of filter names.
+"""
+from django.db.models import Count, ForeignKey
+from django.db.models.fields import FieldDoesNotExist
+from django.utils.encoding import force_text
+
+from django_filters.filters import BooleanFilter, ChoiceFilter, \
+                                   ModelChoiceFilter
+
+from better_admin.caching import cached, get_cache_key
+from better_admin.widgets import AutocompleteSelect
+
+#: values of NullBooleanSelect for True and False
+BOOLEAN_CHOICES = {True: '2', False: '3'}
+
+
+def count_facets(queryset, grouped, separate):
+    """
+    Returns a dict of field name to a dict of value to the number of rows
+    of queryset with it: of the fields in grouped with one query, and of
+    those in separate with one each.
+    """
+    counts = dict((name, {}) for name in grouped + separate)
+    if grouped:
+        rows = queryset.values(*grouped).annotate(facet_count=Count('pk')) \
+                       .order_by()
+        for row in rows:
+            count = row.pop('facet_count')
+            for name, value in row.items():
+                counts[name][value] = counts[name].get(value, 0) + count
+    for name in separate:
+        counts[name] = dict(queryset.values_list(name)
+                                    .annotate(Count('pk')).order_by())
+    return counts
+
+
+def label_choices(choices, counts, default=0):
+    """
+    Returns choices with the count of every value, from counts, a dict of
+    value as text to count, or default, added to its label. The empty
+    choice, and those with a count of None, keep their label.
+    """
+    labelled = []
+    for value, label in choices:
+        count = counts.get(force_text(value), default)
+        if value in ('', None) or count is None:
+            labelled.append((value, label))
+        else:
+            labelled.append((value, u'%s (%d)' % (label, count)))
+    return labelled
+
+
+class FacetMixin(object):
+    """
+    To be used with BetterListView. Adds facet counts to the labels of the
+    choices of the filters in facets.
+    """
+    facets = None
+
+    def get_facet_filters(self):
+        """
+        Returns the names of the boolean and choice filters, and of the
+        foreign key filters, that get facet counts.
+        """
+        if not self.facets:
+            return [], []
+        filterset = self.get_constructed_filter()
+        names = filterset.filters.keys() if self.facets is True \
+                else self.facets
+        grouped, separate = [], []
+        for name in names:
+            f = filterset.filters[name]
+            try:
+                field = self.model._meta.get_field(f.name)
+            except FieldDoesNotExist:
+                continue
+            if isinstance(f, BooleanFilter) or \
+                    (isinstance(f, ChoiceFilter) and field.choices):
+                grouped.append(name)
+            elif isinstance(f, ModelChoiceFilter) and \
+                    isinstance(field, ForeignKey) and \
+                    not isinstance(filterset.form.fields[name].widget,
+                                   AutocompleteSelect):
+                separate.append(name)
+        return grouped, separate
+
+    def get_facet_counts(self):
+        """
+        Returns a dict of filter name to a dict of value to count, over the
+        rows that match the filters.
+        """
+        grouped, separate = self.get_facet_filters()
+        if not grouped and not separate:
+            return {}
+        filters = self.get_constructed_filter().filters
+        queryset = self.get_queryset().order_by()
+        key = get_cache_key('facets', (self.get_coalesce_key(), grouped,
+                                       separate), queryset)
+        counts = cached(key, lambda: count_facets(
+            queryset, [filters[name].name for name in grouped],
+            [filters[name].name for name in separate]))
+        return dict((name, counts[filters[name].name])
+                    for name in grouped + separate)
+
+    def get_context_data(self, **kwargs):
+        context = super(FacetMixin, self).get_context_data(**kwargs)
+        filterset = self.get_constructed_filter()
+        for name, counts in self.get_facet_counts().items():
+            field = filterset.form.fields[name]
+            if isinstance(filterset.filters[name], BooleanFilter):
+                # Unknown means either, it gets no count
+                counts = dict((BOOLEAN_CHOICES[value], count)
+                              for value, count in counts.items()
+                              if value in BOOLEAN_CHOICES)
+                for value in BOOLEAN_CHOICES.values():
+                    counts.setdefault(value, 0)
+                field.widget.choices = label_choices(field.widget.choices,
+                                                     counts, None)
+            else:
+                counts = dict((force_text(value), count)
+                              for value, count in counts.items())
+                field.choices = label_choices(field.choices, counts)
+        return context
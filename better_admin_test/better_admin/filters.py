@@ -5,9 +5,12 @@ from django import forms
 
 from django_filters.filterset import FilterSet
 from django_filters.widgets import RangeWidget
-from django_filters.filters import Filter, RangeFilter
+from django_filters.filters import Filter, RangeFilter, \
+                                   ModelChoiceFilter, \
+                                   ModelMultipleChoiceFilter
 
 from better_admin.glob_field import GlobField
+from better_admin.lookups import get_autocomplete_widget, select_labels
 from django.db.models import Q
 
 
@@ -169,6 +172,50 @@ class DateTimeRangeFilter(CustomRangeFilter):
     field_class = DateTimeRangeField
 
 
+class LazyModelChoiceFilter(ModelChoiceFilter):
+    """
+    ModelChoiceFilter for large related tables. Instead of a <select> with
+    every related row, it renders the selected value only and fetches the
+    options from the lookup endpoint of the related model.
+    """
+    threshold = None
+
+    @property
+    def field(self):
+        if not hasattr(self, '_field'):
+            field = super(LazyModelChoiceFilter, self).field
+            widget = get_autocomplete_widget(field, self.threshold)
+            if widget is None:
+                select_labels(field)
+            else:
+                field.widget = widget
+        return self._field
+
+
+class LazyModelMultipleChoiceFilter(ModelMultipleChoiceFilter):
+    """
+    ModelMultipleChoiceFilter counterpart of LazyModelChoiceFilter
+    """
+    threshold = None
+
+    @property
+    def field(self):
+        if not hasattr(self, '_field'):
+            field = super(LazyModelMultipleChoiceFilter, self).field
+            widget = get_autocomplete_widget(field, self.threshold)
+            if widget is None:
+                select_labels(field)
+            else:
+                field.widget = widget
+        return self._field
+
+    def filter(self, qs, value):
+        # nothing chosen: neither count the choices nor make it DISTINCT
+        if not value:
+            return qs
+        return super(LazyModelMultipleChoiceFilter, self).filter(qs, value)
+
+
 def filterset_factory(model):
     """
     Update Filters by Fields Type
@@ -189,4 +236,12 @@ def filterset_factory(model):
             filterset.base_filters[field] = DateRangeFilter(name=field)
         elif cls_name == 'DateTimeFilter':
             filterset.base_filters[field] = DateTimeRangeFilter(name=field)
+        elif cls_name == 'ModelChoiceFilter':
+            extra = filterset.base_filters[field].extra
+            filterset.base_filters[field] = LazyModelChoiceFilter(name=field,
+                                                                  **extra)
+        elif cls_name == 'ModelMultipleChoiceFilter':
+            extra = filterset.base_filters[field].extra
+            filterset.base_filters[field] = \
+                LazyModelMultipleChoiceFilter(name=field, **extra)
     return filterset
@@ -0,0 +1,189 @@
+"""
+Date hierarchy of the list page: a bar of the years that have rows, which
+drills down to their months and then to their days, for tables that are
+mostly browsed by date.
+
+The period chosen is kept in <field>__year, <field>__month and <field>__day
+and filtered on as a range of the column, which can use an index on it,
+rather than with __year and the like, which extract the part from every
+row. The periods of the next level that have rows among those listed come
+from one dates() query per level, cached like the summary row, see
+caching.py.
+
+dates() truncates datetimes in UTC on Django 1.5, so the periods of
+datetime fields are those of UTC, as are the ranges they filter on.
+
+Set date_hierarchy on the view, or list_date_hierarchy on a model admin,
+to the name of a date or datetime field. get_date_hierarchy_range() gives
+other views of the list, such as the export, the same period.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import DateField, DateTimeField
+from django.db.models.fields import FieldDoesNotExist
+from django.utils import dateformat, timezone
+
+from better_admin.caching import cached, get_cache_key
+
+
+LEVELS = ('year', 'month', 'day')
+#: how the periods of each level are labelled, as for the date filter
+LABELS = {'year': 'Y', 'month': 'F', 'day': 'j'}
+
+
+def get_period(year, month=None, day=None):
+    """
+    Returns the first day of the period and of the one after.
+    """
+    if not day is None:
+        start = datetime.date(year, month, day)
+        return start, start + datetime.timedelta(days=1)
+    if not month is None:
+        start = datetime.date(year, month, 1)
+        if month == 12:
+            return start, datetime.date(year + 1, 1, 1)
+        return start, datetime.date(year, month + 1, 1)
+    return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+
+
+def get_date_hierarchy_field(model, name):
+    """
+    Returns the date field name of model, raises ImproperlyConfigured if
+    there is none.
+    """
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        field = None
+    if not isinstance(field, DateField):
+        raise ImproperlyConfigured('%s of %s is not a date field' % (
+            name, model.__name__))
+    return field
+
+
+def get_date_hierarchy_params(name):
+    return ['%s__%s' % (name, level) for level in LEVELS]
+
+
+def get_date_hierarchy_period(name, params):
+    """
+    Returns the year, month and day chosen in params for the hierarchy on
+    name, as far as they are given and make a date, as a list.
+    """
+    chosen = []
+    for param in get_date_hierarchy_params(name):
+        try:
+            value = int(params[param])
+            get_period(*(chosen + [value]))
+        except (KeyError, ValueError, TypeError):
+            break
+        chosen.append(value)
+    return chosen
+
+
+def get_date_hierarchy_range(model, name, params):
+    """
+    Returns the lookups of the period chosen in params for the hierarchy
+    on the field name of model, or an empty dict.
+    """
+    field = get_date_hierarchy_field(model, name)
+    period = get_date_hierarchy_period(name, params)
+    if not period:
+        return {}
+    start, end = get_period(*period)
+    if isinstance(field, DateTimeField):
+        start = datetime.datetime.combine(start, datetime.time())
+        end = datetime.datetime.combine(end, datetime.time())
+        if settings.USE_TZ:
+            start = timezone.make_aware(start, timezone.utc)
+            end = timezone.make_aware(end, timezone.utc)
+    return {'%s__gte' % field.name: start, '%s__lt' % field.name: end}
+
+
+class DateHierarchyMixin(object):
+    """
+    To be used with BetterListView. Lists the rows of the period chosen in
+    the date hierarchy on date_hierarchy and puts the hierarchy into the
+    context as date_hierarchy.
+    """
+    date_hierarchy = None
+
+    def get_date_hierarchy_field(self):
+        if self.date_hierarchy is None:
+            return None
+        return get_date_hierarchy_field(self.model, self.date_hierarchy)
+
+    def get_date_hierarchy_params(self):
+        return get_date_hierarchy_params(self.date_hierarchy)
+
+    def get_date_hierarchy_period(self):
+        """
+        Returns the year, month and day chosen, as far as they are given
+        and make a date, as a list.
+        """
+        return get_date_hierarchy_period(self.date_hierarchy,
+                                         self.request.GET)
+
+    def get_date_hierarchy_range(self):
+        """
+        Returns the lookups of the period chosen, or an empty dict.
+        """
+        if self.date_hierarchy is None:
+            return {}
+        return get_date_hierarchy_range(self.model, self.date_hierarchy,
+                                        self.request.GET)
+
+    def get_queryset(self):
+        queryset = super(DateHierarchyMixin, self).get_queryset()
+        lookups = self.get_date_hierarchy_range()
+        if lookups:
+            queryset = queryset.filter(**lookups)
+        return queryset
+
+    def get_date_hierarchy_url(self, period):
+        """
+        Returns the querystring of the list of period, a list of the year,
+        month and day or as many of them, with the other parameters as
+        they are.
+        """
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        for i, param in enumerate(self.get_date_hierarchy_params()):
+            if i < len(period):
+                query[param] = period[i]
+            else:
+                query.pop(param, None)
+        return query.urlencode()
+
+    def get_date_hierarchy(self):
+        """
+        Returns the periods chosen, from the top, and the periods of the
+        level below with rows in them, each as a list of (label, url).
+        """
+        field = self.get_date_hierarchy_field()
+        if field is None:
+            return None
+        period = self.get_date_hierarchy_period()
+        crumbs = [('All', self.get_date_hierarchy_url([]))]
+        for i in range(len(period)):
+            date = datetime.date(*(period[:i + 1] + [1] * (2 - i)))
+            crumbs.append((dateformat.format(date, LABELS[LEVELS[i]]),
+                           self.get_date_hierarchy_url(period[:i + 1])))
+        periods = []
+        if len(period) < len(LEVELS):
+            level = LEVELS[len(period)]
+            queryset = self.get_queryset().dates(field.name, level)
+            key = get_cache_key('hierarchy', self.get_coalesce_key(),
+                                queryset)
+            for date in cached(key, lambda: list(queryset)):
+                parts = [date.year, date.month, date.day][:len(period) + 1]
+                periods.append((dateformat.format(date, LABELS[level]),
+                                self.get_date_hierarchy_url(parts)))
+        return {'crumbs': crumbs, 'periods': periods}
+
+    def get_context_data(self, **kwargs):
+        context = super(DateHierarchyMixin, self).get_context_data(**kwargs)
+        context['date_hierarchy'] = self.get_date_hierarchy()
+        return context
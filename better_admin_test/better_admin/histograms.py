@@ -0,0 +1,222 @@
+"""
+Histograms for the range filters of numbers, dates, datetimes and times.
+Under the two blank inputs of such a filter, the sidebar shows how the
+rows are spread over the range of the column and its smallest and largest
+value, so that users need no exploratory queries to pick bounds.
+
+The bounds of all the columns come from a single aggregate() query and the
+counts of every column from one GROUP BY over the number of the bucket of
+its value. Both are over the rows the list starts from, before filtering,
+and are cached per model generation, see caching.py, so they are computed
+again only once rows were written.
+
+Dates and times are bucketed as seconds, which takes SQL of the backend;
+on backends other than sqlite, PostgreSQL and MySQL only numbers get
+histograms.
+
+Set histograms on the view, or list_histograms on a model admin, to True
+for all the range filters, or to a tuple of filter names.
+
+Settings:
+
+    BETTER_ADMIN_HISTOGRAM_BINS           buckets per histogram
+    BETTER_ADMIN_HISTOGRAM_CACHE_SECONDS  how long a histogram is kept
+"""
+import calendar
+import datetime
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Min, Max, DateField, DateTimeField, \
+                             TimeField
+from django.db.models.fields import FieldDoesNotExist
+from django.utils import timezone
+
+from django_filters.filters import RangeFilter
+
+from better_admin.caching import cached, get_cache_key
+from better_admin.filters import CustomRangeFilter
+
+
+BINS = getattr(settings, 'BETTER_ADMIN_HISTOGRAM_BINS', 20)
+CACHE_SECONDS = getattr(settings, 'BETTER_ADMIN_HISTOGRAM_CACHE_SECONDS',
+                        24 * 3600)
+
+#: SQL, and its params, that turns a date or time column into seconds
+SECONDS_SQL = {
+    'sqlite': {'date': ('CAST(strftime(%%s, %s) AS REAL)', ['%s']),
+               'time': ('CAST(strftime(%%s, %%s || %s) AS REAL)',
+                        ['%s', '1970-01-01 '])},
+    'postgresql': {'date': ('EXTRACT(EPOCH FROM %s)', []),
+                   'time': ('EXTRACT(EPOCH FROM %s)', [])},
+    'mysql': {'date': ('UNIX_TIMESTAMP(%s)', []),
+              'time': ('TIME_TO_SEC(%s)', [])},
+}
+
+
+def get_kind(field):
+    """
+    Returns 'date' for date and datetime fields, 'time' for time fields and
+    'number' for the rest.
+    """
+    if isinstance(field, (DateField, DateTimeField)):
+        return 'date'
+    if isinstance(field, TimeField):
+        return 'time'
+    return 'number'
+
+
+def to_number(value):
+    """
+    Returns a value of a column as a number, in seconds for dates and
+    times, as the database turns them into numbers.
+    """
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            return calendar.timegm(value.utctimetuple())
+        return calendar.timegm(value.timetuple())
+    if isinstance(value, datetime.date):
+        return calendar.timegm(value.timetuple())
+    if isinstance(value, datetime.time):
+        return value.hour * 3600 + value.minute * 60 + value.second
+    return float(value)
+
+
+def from_number(number, field):
+    """
+    Returns number, as made by to_number(), as a value of field.
+    """
+    if isinstance(field, DateTimeField):
+        value = datetime.datetime.utcfromtimestamp(number)
+        return timezone.make_aware(value, timezone.utc) \
+               if settings.USE_TZ else value
+    if isinstance(field, DateField):
+        return datetime.datetime.utcfromtimestamp(number).date()
+    if isinstance(field, TimeField):
+        return (datetime.datetime(1970, 1, 1) +
+                datetime.timedelta(seconds=number)).time()
+    return number
+
+
+def get_bucket_sql(connection, field, low, width):
+    """
+    Returns the SQL, and its params, of the number of the bucket of the
+    value of field, with buckets of width from low, or None if the backend
+    cannot tell.
+    """
+    column = '%s.%s' % (connection.ops.quote_name(field.model._meta.db_table),
+                        connection.ops.quote_name(field.column))
+    kind = get_kind(field)
+    if kind == 'number':
+        sql, params = column, []
+    elif connection.vendor in SECONDS_SQL:
+        sql, params = SECONDS_SQL[connection.vendor][kind]
+        sql = sql % column
+    else:
+        return None
+    if connection.vendor == 'sqlite':
+        # truncates, and values are never below low
+        sql = 'CAST((%s - %%s) / %%s AS INTEGER)' % sql
+    else:
+        sql = 'FLOOR((%s - %%s) / %%s)' % sql
+    return sql, params + [low, width]
+
+
+def get_histograms(queryset, fields, bins=None):
+    """
+    Returns a dict of field name to the histogram of the values of the
+    field in queryset, or None for fields without values. A histogram is a
+    dict of the 'min' and 'max' value and the 'buckets', each a dict of
+    'start', 'end', 'count' and 'height' in percent of the highest.
+    """
+    if bins is None:
+        bins = BINS
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    aggregates = {}
+    for field in fields:
+        aggregates['%s__min' % field.name] = Min(field.name)
+        aggregates['%s__max' % field.name] = Max(field.name)
+    bounds = queryset.aggregate(**aggregates)
+    histograms = {}
+    for field in fields:
+        low = bounds['%s__min' % field.name]
+        high = bounds['%s__max' % field.name]
+        if low is None:
+            histograms[field.name] = None
+            continue
+        start, end = to_number(low), to_number(high)
+        width = float(end - start) / bins or 1.0
+        bucket_sql = get_bucket_sql(connection, field, start, width)
+        if bucket_sql is None:
+            histograms[field.name] = None
+            continue
+        counts = [0] * bins
+        rows = queryset.extra(select={'bucket': bucket_sql[0]},
+                              select_params=bucket_sql[1]) \
+                       .values('bucket').annotate(count=Count('pk')) \
+                       .order_by()
+        for row in rows:
+            if row['bucket'] is None:
+                continue
+            # the largest value falls just past the last bucket
+            counts[min(int(row['bucket']), bins - 1)] += row['count']
+        highest = max(counts) or 1
+        histograms[field.name] = {
+            'min': low,
+            'max': high,
+            'buckets': [{'start': from_number(start + i * width, field),
+                         'end': from_number(start + (i + 1) * width, field),
+                         'count': count,
+                         'height': 100 * count / highest}
+                        for i, count in enumerate(counts)]}
+    return histograms
+
+
+class HistogramMixin(object):
+    """
+    To be used with BetterListView. Hands the fields of the range filters
+    in histograms their histogram, as histogram.
+    """
+    histograms = None
+
+    def get_histogram_filters(self):
+        """
+        Returns the names of the range filters that get histograms.
+        """
+        if not self.histograms:
+            return []
+        filters = self.get_constructed_filter().filters
+        names = filters.keys() if self.histograms is True \
+                else self.histograms
+        return [name for name in names
+                if isinstance(filters[name], (RangeFilter, CustomRangeFilter))]
+
+    def get_histograms(self):
+        """
+        Returns a dict of filter name to histogram, or None.
+        """
+        filters = self.get_constructed_filter().filters
+        fields = {}
+        for name in self.get_histogram_filters():
+            try:
+                fields[name] = self.model._meta.get_field(filters[name].name)
+            except FieldDoesNotExist:
+                continue
+        if not fields:
+            return {}
+        queryset = self.get_base_queryset().order_by()
+        key = get_cache_key('histograms', (self.get_coalesce_key(),
+                                           sorted(fields), BINS), queryset)
+        histograms = cached(key, lambda: get_histograms(queryset,
+                                                        fields.values()),
+                            CACHE_SECONDS)
+        return dict((name, histograms[field.name])
+                    for name, field in fields.items())
+
+    def get_context_data(self, **kwargs):
+        context = super(HistogramMixin, self).get_context_data(**kwargs)
+        form = self.get_constructed_filter().form
+        for name, histogram in self.get_histograms().items():
+            form.fields[name].histogram = histogram
+        return context
@@ -0,0 +1,98 @@
+"""
+Helpers for the lookup endpoints that back the autocomplete widgets.
+"""
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse, NoReverseMatch
+
+from better_admin.widgets import AutocompleteSelect, \
+                                 AutocompleteSelectMultiple
+
+#: related tables above this many rows get an autocomplete widget
+DEFAULT_THRESHOLD = getattr(settings,
+                            'BETTER_ADMIN_AUTOCOMPLETE_THRESHOLD', 1000)
+#: how long to remember whether a table is above the threshold
+SIZE_CACHE_TIMEOUT = 300
+
+
+def get_lookup_view_name(model):
+    """
+    Returns the view name of the lookup endpoint for model. Follows the
+    same convention as the import and export views.
+    """
+    meta = model._meta
+    return '%s_%s_lookup' % (meta.app_label, meta.module_name)
+
+
+def get_lookup_url(model):
+    """
+    Returns url of the lookup endpoint for model or None if the model does
+    not have a better_admin.
+    """
+    try:
+        return reverse(get_lookup_view_name(model))
+    except NoReverseMatch:
+        return None
+
+
+def exceeds(queryset, threshold):
+    """
+    True if queryset has more than threshold rows. Fetches at most one pk
+    instead of counting the whole table. The answer is cached per model.
+    """
+    meta = queryset.model._meta
+    key = 'better_admin:exceeds:%s.%s:%d' % (meta.app_label,
+                                             meta.module_name,
+                                             threshold)
+    result = cache.get(key)
+    if result is None:
+        pks = queryset.order_by().values_list('pk', flat=True)
+        result = len(pks[threshold:threshold + 1]) > 0
+        cache.set(key, result, SIZE_CACHE_TIMEOUT)
+    return result
+
+
+def get_autocomplete_widget(field, threshold=None):
+    """
+    Returns an autocomplete widget for the model choice field if the
+    related table is larger than threshold, otherwise None.
+    """
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLD
+    lookup_url = get_lookup_url(field.queryset.model)
+    if lookup_url is None or not exceeds(field.queryset, threshold):
+        return None
+    if isinstance(field, forms.ModelMultipleChoiceField):
+        widget_class = AutocompleteSelectMultiple
+    else:
+        widget_class = AutocompleteSelect
+    widget = widget_class(field.queryset, lookup_url,
+                          attrs=field.widget.attrs)
+    widget.is_required = field.required
+    return widget
+
+
+def select_labels(field):
+    """
+    Makes the choices of the model choice field fetch their non-null
+    foreign keys along, as their labels often print them - a Permission
+    prints its content type - which is a query per option otherwise.
+    """
+    field.queryset = field.queryset.select_related()
+
+
+def use_autocomplete(form, threshold=None):
+    """
+    Swaps the <select> widget of every model choice field in form for an
+    autocomplete widget if the related table is larger than threshold.
+    The fields that keep their <select> get select_labels.
+    """
+    for field in form.fields.values():
+        if not isinstance(field, forms.ModelChoiceField):
+            continue
+        widget = get_autocomplete_widget(field, threshold)
+        if widget is None:
+            select_labels(field)
+        else:
+            field.widget = widget
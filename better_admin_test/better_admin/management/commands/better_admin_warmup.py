@@ -0,0 +1,19 @@
+from django.core.management.base import NoArgsCommand
+
+from better_admin.warmup import warm_up
+
+
+class Command(NoArgsCommand):
+    """
+    Warms the urls, templates, filtersets and content types of all the
+    registered BetterAppAdmins.
+    """
+    help = ("Pre-resolves urls, preloads templates and constructs "
+            "filtersets for every registered better_admin model admin.")
+
+    def handle_noargs(self, **options):
+        warmed = warm_up()
+        if int(options.get('verbosity', 1)) > 0:
+            for model_admin in warmed:
+                self.stdout.write('Warmed %s' % model_admin.get_view_name('list'))
+            self.stdout.write('Warmed %d model admins' % len(warmed))
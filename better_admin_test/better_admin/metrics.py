@@ -0,0 +1,247 @@
+"""
+Per-view runtime metrics for the generated admin, exposed in the
+Prometheus text format. Views are labelled with their url name, which for
+the generated views is the get_view_name() name, e.g. app_model_list.
+
+Recording is a few increments under a lock; the text is only put together
+when somebody scrapes the endpoint. Queries are counted by wrapping the
+cursors of the request's connections, which leaves the debug cursor and
+connection.queries as they are.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.contrib.auth.decorators import user_passes_test
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+#: name: (type, help, buckets)
+METRICS = {
+    'request_seconds': ('histogram', 'Request latency.', LATENCY_BUCKETS),
+    'template_render_seconds': ('histogram', 'Template render time.',
+                                LATENCY_BUCKETS),
+    'db_queries': ('histogram', 'Database queries per request.',
+                   QUERY_BUCKETS),
+    'db_query_seconds': ('histogram', 'Database time per request.',
+                         LATENCY_BUCKETS),
+    'export_bytes_total': ('counter', 'Bytes exported.', None),
+    'export_rows_total': ('counter', 'Rows exported.', None),
+    'import_bytes_total': ('counter', 'Bytes imported.', None),
+    'import_rows_total': ('counter', 'Rows imported.', None),
+}
+
+#: whether to count queries and time them
+COUNT_QUERIES = getattr(settings, 'BETTER_ADMIN_METRICS_QUERIES', True)
+
+
+class Histogram(object):
+    """
+    Fixed bucket histogram.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry(object):
+    """
+    Holds the histograms and counters of every view in this process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def observe(self, metric, view, value):
+        """
+        Records value for metric of view.
+        """
+        kind, help_text, buckets = METRICS[metric]
+        with self.lock:
+            key = (metric, view)
+            if kind == 'histogram':
+                if not key in self.values:
+                    self.values[key] = Histogram(buckets)
+                self.values[key].observe(value)
+            else:
+                self.values[key] = self.values.get(key, 0) + value
+
+    def render(self):
+        """
+        Returns all the metrics in the Prometheus text format.
+        """
+        with self.lock:
+            values = sorted(self.values.items())
+            histograms = dict((key, (list(h.counts), h.sum, h.count))
+                              for key, h in values
+                              if isinstance(h, Histogram))
+        lines = []
+        for metric in sorted(METRICS):
+            kind, help_text, buckets = METRICS[metric]
+            name = 'better_admin_%s' % metric
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for (m, view), value in values:
+                if m != metric:
+                    continue
+                if kind == 'counter':
+                    lines.append('%s{view="%s"} %s' % (name, view, value))
+                    continue
+                counts, total, count = histograms[(m, view)]
+                cumulative = 0
+                for bound, n in zip(buckets + ('+Inf',), counts):
+                    cumulative += n
+                    lines.append('%s_bucket{view="%s",le="%s"} %d' % (
+                                 name, view, bound, cumulative))
+                lines.append('%s_sum{view="%s"} %s' % (name, view, total))
+                lines.append('%s_count{view="%s"} %d' % (name, view, count))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class QueryCounter(object):
+    """
+    Number and time of the queries run by the cursors of a request. With
+    keep_statements, also every (sql, seconds) in the order they ran.
+    """
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = [] if keep_statements else None
+
+
+class CountingCursor(object):
+    """
+    Wraps a cursor and adds the statements it runs to counter.
+    """
+
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def timed(self, method, sql, params, many=False):
+        start = time.time()
+        try:
+            return method(sql, params)
+        finally:
+            seconds = time.time() - start
+            self.counter.count += 1
+            self.counter.seconds += seconds
+            if not self.counter.statements is None:
+                if not many:
+                    # with the parameters filled in, as the debug cursor
+                    sql = self.cursor.db.ops.last_executed_query(
+                        self.cursor, sql, params)
+                self.counter.statements.append((sql, seconds))
+
+    def execute(self, sql, params=()):
+        return self.timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self.timed(self.cursor.executemany, sql, param_list, True)
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+
+def count_queries(connection, counter):
+    """
+    Makes the cursors of connection count into counter. Returns what
+    uncount_queries() needs to undo it.
+    """
+    previous = connection.__dict__.get('cursor')
+    cursor = connection.cursor
+    connection.cursor = lambda: CountingCursor(cursor(), counter)
+    return previous
+
+
+def uncount_queries(connection, previous):
+    if previous is None:
+        del connection.cursor
+    else:
+        connection.cursor = previous
+
+
+def get_view_name(request):
+    """
+    Returns the url name of the view handling request, or None.
+    """
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        return None
+    return resolver_match.url_name
+
+
+def observe(request, metric, value):
+    """
+    Records value for metric of the view handling request. For use from
+    views, e.g. the import and export views for bytes and rows.
+    """
+    view = get_view_name(request)
+    if not view is None:
+        registry.observe(metric, view, value)
+
+
+class MetricsMiddleware(object):
+    """
+    Records latency, query count, query time and template render time for
+    every named view. Put it first in MIDDLEWARE_CLASSES so that it times
+    the whole request and renders template responses last.
+    """
+
+    def process_request(self, request):
+        request._metrics_start = time.time()
+        if COUNT_QUERIES:
+            counter = QueryCounter()
+            request._metrics_queries = (counter, [
+                (connection, count_queries(connection, counter))
+                for connection in connections.all()])
+
+    def process_template_response(self, request, response):
+        start = time.time()
+        response.render()
+        observe(request, 'template_render_seconds', time.time() - start)
+        return response
+
+    def process_response(self, request, response):
+        start = getattr(request, '_metrics_start', None)
+        if start is None:
+            return response
+        observe(request, 'request_seconds', time.time() - start)
+        if COUNT_QUERIES and hasattr(request, '_metrics_queries'):
+            counter, counted = request._metrics_queries
+            for connection, previous in counted:
+                uncount_queries(connection, previous)
+            observe(request, 'db_queries', counter.count)
+            observe(request, 'db_query_seconds', counter.seconds)
+        return response
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def metrics_view(request):
+    """
+    Serves the metrics of this process in the Prometheus text format.
+    """
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4')
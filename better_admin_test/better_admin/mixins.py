@@ -1,10 +1,25 @@
+import json
+
 from django.core.urlresolvers import reverse_lazy
 from django.core.exceptions import ImproperlyConfigured
 from django.conf.urls import patterns, url
-
-from better_admin.filterset import filterset_factory
+from django.db.models import CharField
+from django.core.exceptions import ObjectDoesNotExist
+from django.forms.models import modelform_factory
+from django.http import HttpResponse, HttpResponseForbidden, \
+                        HttpResponseNotAllowed
+from django.contrib.auth.decorators import login_required
+from django.utils.decorators import method_decorator
+
+from better_admin.filters import filterset_factory
 from better_admin.bulkmixins import BetterImportAdminMixin, \
                                     BetterExportAdminMixin
+from better_admin.lookups import get_lookup_view_name
+from better_admin.admission import admission_controlled
+from better_admin.actions import actions_factory
+from better_admin.routers import read_from_replica
+from better_admin.timeouts import QueryTimeout
+from better_admin import api
 
 from better_admin.views import BetterListView, \
                                BetterStaffuserListView, \
@@ -44,6 +59,12 @@ class BetterModelAdminMixin(object):
     queryset = None
     # universal access
     access = None
+    # related tables above this size get autocomplete widgets in forms
+    autocomplete_threshold = None
+    # seconds the list and export queries may take, see timeouts.py
+    query_budget = None
+    # view types whose requests are capped and queued, see admission.py
+    heavy_views = ('export', 'import', 'process_import', 'api_bulk')
 
     def get_model(self):
         """
@@ -67,10 +88,13 @@ class BetterModelAdminMixin(object):
 
     def get_queryset(self):
         """
-        Returns self.queryset property. If None, raises an exception.
+        Returns a clone of self.queryset property. If None, raises an
+        exception. Never hand out self.queryset itself - it lives on the
+        class and, once evaluated, would keep its result cache for the life
+        of the process.
         """
         if not self.queryset is None:
-            return self.queryset
+            return self.queryset.all()
         else:
             raise ImproperlyConfigured(("BetterModelAdmin requires a "
                                         "definition of queryset property."))
@@ -103,6 +127,20 @@ class BetterModelAdminMixin(object):
                              view_perm[view_type],
                              self.get_model_name())
 
+    def has_access(self, request, view_type):
+        """
+        Whether the user passes the access check of the view of view_type,
+        for endpoints that stand in for it.
+        """
+        access = self.access
+        if access is None:
+            access = getattr(self, '%s_access' % view_type)
+        if access == SUPERUSER_ACCESS:
+            return request.user.is_superuser
+        if access == STAFF_ACCESS:
+            return request.user.is_staff
+        return request.user.has_perm(self.get_perm(view_type))
+
     def get_template(self, view_type):
         """
         This method returns the standard template path given a view_type.
@@ -125,6 +163,17 @@ class BetterModelAdminMixin(object):
                              self.get_model_name(),
                              view_type)
 
+    def get_heavy_view(self, view, view_type, view_name=None):
+        """
+        Returns view, under admission control if view_type is one of the
+        heavy_views.
+        """
+        if not view_type in self.heavy_views:
+            return view
+        if view_name is None:
+            view_name = self.get_view_name(view_type)
+        return admission_controlled(view, view_name, view_type)
+
     def get_base_url(self):
         return '%s/%s' % (self.get_app_label(), self.get_model_name())
 
@@ -190,6 +239,25 @@ class BetterListAdminMixin(object):
     list_exclude = None
     filter_set = None
     actions = None
+    # list requests slower than this many seconds are profiled
+    list_slow_threshold = None
+    # fields that can be edited right in the list, see batch.py
+    list_editable = None
+    # stream the list page, None for pages of STREAM_MIN_ROWS and up, see
+    # streaming.py
+    list_streaming = None
+    # summary row of numeric columns, {field name: 'sum', 'avg', 'min' or
+    # 'max', or a tuple of them}, see summary.py
+    list_summary = None
+    # facet counts on the boolean, choice and foreign key filters, True or
+    # a tuple of filter names, see facets.py
+    list_facets = None
+    # histograms on the range filters, True or a tuple of filter names, see
+    # histograms.py
+    list_histograms = None
+    # date or datetime field to drill down by year, month and day, see
+    # hierarchy.py
+    list_date_hierarchy = None
 
     def get_filter_set(self):
         """
@@ -208,8 +276,7 @@ class BetterListAdminMixin(object):
         if not self.actions is None:
             return self.actions
         else:
-            # TODO: actions factory
-            return []
+            return actions_factory(self)
 
     def get_list_class(self):
         """
@@ -240,6 +307,15 @@ class BetterListAdminMixin(object):
                              template_name=self.get_template('list'),
                              filter_set=self.get_filter_set(),
                              actions=self.get_actions(),
+                             editable_fields=self.list_editable,
+                             grid_perm=self.get_perm('update'),
+                             streaming=self.list_streaming,
+                             summary=self.list_summary,
+                             facets=self.list_facets,
+                             histograms=self.list_histograms,
+                             date_hierarchy=self.list_date_hierarchy,
+                             slow_threshold=self.list_slow_threshold,
+                             query_budget=self.query_budget,
                              extra_context={'exclude': self.list_exclude}))
 
     def get_list_urls(self):
@@ -248,7 +324,8 @@ class BetterListAdminMixin(object):
         """
         return patterns('%s.views' % self.get_app_label(),
                         url(r'^%s/$' % self.get_base_url(),
-                            self.get_list_view().as_view(),
+                            self.get_heavy_view(self.get_list_view().as_view(),
+                                                'list'),
                             name=self.get_view_name('list')))
 
 
@@ -300,7 +377,8 @@ class BetterDetailAdminMixin(object):
         return patterns('%s.views' % self.get_app_label(),
                         url(r'^%s/(?P<pk>[a-zA-Z0-9_]+)/$' \
                                 % self.get_base_url(),
-                            self.get_detail_view().as_view(),
+                            self.get_heavy_view(self.get_detail_view().as_view(),
+                                                'detail'),
                             name=self.get_view_name('detail')))
 
 
@@ -363,7 +441,8 @@ class BetterCreateAdminMixin(object):
                              success_url=self.get_suc_url('create'),
                              success_message=self.get_suc_msg('create'),
                              pre_render=self.create_pre_render,
-                             pre_save=self.create_pre_save))
+                             pre_save=self.create_pre_save,
+                             autocomplete_threshold=self.autocomplete_threshold))
 
     def get_create_urls(self):
         """
@@ -371,7 +450,8 @@ class BetterCreateAdminMixin(object):
         """
         return patterns('%s.views' % self.get_app_label(),
                         url(r'^%s/create/$' % self.get_base_url(),
-                            self.get_create_view().as_view(),
+                            self.get_heavy_view(self.get_create_view().as_view(),
+                                                'create'),
                             name=self.get_view_name('create')))
 
 
@@ -430,7 +510,8 @@ class BetterPopupAdminMixin(object):
                              template_name=self.get_template('popup'),
                              form_class=self.get_form('popup'),
                              pre_render=self.popup_pre_render,
-                             pre_save=self.popup_pre_save))
+                             pre_save=self.popup_pre_save,
+                             autocomplete_threshold=self.autocomplete_threshold))
 
     def get_popup_urls(self):
         """
@@ -438,7 +519,8 @@ class BetterPopupAdminMixin(object):
         """
         return patterns('%s.views' % self.get_app_label(),
                         url(r'^%s/popup/$' % self.get_base_url(),
-                            self.get_popup_view().as_view(),
+                            self.get_heavy_view(self.get_popup_view().as_view(),
+                                                'popup'),
                             name=self.get_view_name('popup')))
 
 
@@ -501,7 +583,8 @@ class BetterUpdateAdminMixin(object):
                              success_url=self.get_suc_url('update'),
                              success_message=self.get_suc_msg('update'),
                              pre_render=self.update_pre_render,
-                             pre_save=self.update_pre_save))
+                             pre_save=self.update_pre_save,
+                             autocomplete_threshold=self.autocomplete_threshold))
 
     def get_update_urls(self):
         """
@@ -510,7 +593,8 @@ class BetterUpdateAdminMixin(object):
         return patterns('%s.views' % self.get_app_label(),
                         url(r'^%s/(?P<pk>[a-zA-Z0-9_]+)/update/$' \
                                 % self.get_base_url(),
-                            self.get_update_view().as_view(),
+                            self.get_heavy_view(self.get_update_view().as_view(),
+                                                'update'),
                             name=self.get_view_name('update')))
 
 
@@ -583,10 +667,166 @@ class BetterDeleteAdminMixin(object):
         return patterns('%s.views' % self.get_app_label(),
                         url(r'^%s/(?P<pk>[a-zA-Z0-9_]+)/delete/$' \
                                 % self.get_base_url(),
-                            self.get_delete_view().as_view(),
+                            self.get_heavy_view(self.get_delete_view().as_view(),
+                                                'delete'),
                             name=self.get_view_name('delete')))
 
 
+class BetterLookupAdminMixin(object):
+    """
+    Creates and takes care of the lookup endpoint that feeds the
+    autocomplete widgets of forms pointing to this model.
+    """
+    # field searched by prefix, defaults to the first indexed CharField
+    lookup_field = None
+    # maximum number of results returned
+    lookup_limit = 20
+
+    def get_lookup_field(self):
+        """
+        Returns the given lookup_field or default. Prefers an indexed
+        CharField so that the prefix search can use the index.
+        """
+        if not self.lookup_field is None:
+            return self.lookup_field
+        char_fields = [f for f in self.get_model()._meta.fields
+                       if isinstance(f, CharField)]
+        indexed = [f for f in char_fields if f.db_index or f.unique]
+        if indexed:
+            return indexed[0].name
+        if char_fields:
+            return char_fields[0].name
+        return 'pk'
+
+    @method_decorator(login_required)
+    def lookup_action(self, request, *args, **kwargs):
+        """
+        Returns a JSON list of {id, text} for the rows whose lookup_field
+        starts with the q parameter, at most lookup_limit of them.
+        """
+        if not self.has_access(request, 'list'):
+            return HttpResponseForbidden()
+        field = self.get_lookup_field()
+        queryset = self.get_request_queryset(request)
+        query = request.GET.get('q', '')
+        if query:
+            queryset = queryset.filter(**{'%s__startswith' % field: query})
+        queryset = queryset.order_by(field).values_list('pk', field)
+        results = [{'id': pk, 'text': unicode(text)}
+                   for pk, text in queryset[:self.lookup_limit]]
+        return HttpResponse(json.dumps(results),
+                            content_type='application/json')
+
+    def get_lookup_urls(self):
+        """
+        Returns URLs for lookup view
+        """
+        return patterns('%s.views' % self.get_app_label(),
+                        url(r'^%s/lookup/$' % self.get_base_url(),
+                            self.get_heavy_view(self.lookup_action,
+                                                'lookup',
+                                                get_lookup_view_name(
+                                                    self.get_model())),
+                            name=get_lookup_view_name(self.get_model())))
+
+
+class BetterApiAdminMixin(object):
+    """
+    Creates and takes care of the JSON list and detail endpoints, see
+    api.py. They check the same access, permissions and excludes as the
+    list and detail views.
+    """
+
+    def has_api_permission(self, request, view_type):
+        """
+        Whether the user may use the endpoint standing in for view_type.
+        """
+        return self.has_access(request, view_type)
+
+    @method_decorator(login_required)
+    def api_list_action(self, request, *args, **kwargs):
+        """
+        Returns a page of the rows the filters match as JSON.
+        """
+        if not self.has_api_permission(request, 'list'):
+            return HttpResponseForbidden()
+        filter_set = self.get_filter_set()
+        queryset = filter_set(api.get_filter_data(request),
+                              queryset=self.get_request_queryset(request)).qs
+        try:
+            return api.page_response(request, queryset, self.list_exclude,
+                                     self.query_budget)
+        except api.ApiError as e:
+            return api.json_response({'error': e.args[0]}, status=400)
+        except QueryTimeout as e:
+            return api.json_response({'error': e.args[0]}, status=503)
+
+    @method_decorator(login_required)
+    def api_detail_action(self, request, pk, *args, **kwargs):
+        """
+        Returns a single row as JSON.
+        """
+        if not self.has_api_permission(request, 'detail'):
+            return HttpResponseForbidden()
+        model = self.get_model()
+        try:
+            fields = api.get_fields(model, request, self.detail_exclude)
+        except api.ApiError as e:
+            return api.json_response({'error': e.args[0]}, status=400)
+        try:
+            with read_from_replica(request):
+                row = self.get_request_queryset(request).values(*fields) \
+                          .get(pk=pk)
+        except (ObjectDoesNotExist, ValueError):
+            return api.json_response({'error': 'Not found'}, status=404)
+        return api.json_response(row)
+
+    @method_decorator(login_required)
+    def api_bulk_action(self, request, *args, **kwargs):
+        """
+        Creates and updates the rows posted as a JSON array, with the forms
+        and hooks of the create and update views.
+        """
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        forms = {}
+        for view_type in ('create', 'update'):
+            if self.has_api_permission(request, view_type):
+                form_class = self.get_form(view_type) or \
+                             modelform_factory(self.get_model())
+                forms[view_type] = (form_class,
+                                    getattr(self, '%s_pre_render' % view_type),
+                                    getattr(self, '%s_pre_save' % view_type))
+        if not forms:
+            return HttpResponseForbidden()
+        try:
+            rows = api.read_rows(request)
+        except api.ApiError as e:
+            return api.json_response({'error': e.args[0]}, status=400)
+        writer = api.BulkWriter(request, self.get_request_queryset(request),
+                                forms)
+        return api.json_response(writer.write(rows))
+
+    def get_api_urls(self):
+        """
+        Returns URLs for the JSON endpoints
+        """
+        return patterns('%s.views' % self.get_app_label(),
+                        url(r'^%s/api/$' % self.get_base_url(),
+                            self.get_heavy_view(self.api_list_action,
+                                                'api_list'),
+                            name=self.get_view_name('api_list')),
+                        url(r'^%s/api/bulk/$' % self.get_base_url(),
+                            self.get_heavy_view(self.api_bulk_action,
+                                                'api_bulk'),
+                            name=self.get_view_name('api_bulk')),
+                        url(r'^%s/api/(?P<pk>[a-zA-Z0-9_]+)/$' \
+                                % self.get_base_url(),
+                            self.get_heavy_view(self.api_detail_action,
+                                                'api_detail'),
+                            name=self.get_view_name('api_detail')))
+
+
 class BetterModelAdminMixin(BetterListAdminMixin,
                             BetterDetailAdminMixin,
                             BetterCreateAdminMixin,
@@ -595,6 +835,8 @@ class BetterModelAdminMixin(BetterListAdminMixin,
                             BetterPopupAdminMixin,
                             BetterExportAdminMixin,
                             BetterImportAdminMixin,
+                            BetterLookupAdminMixin,
+                            BetterApiAdminMixin,
                             BetterModelAdminMixin):
     """
     Complete CRUD support.
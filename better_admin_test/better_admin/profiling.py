@@ -0,0 +1,169 @@
+"""
+Opt-in profiler for slow list requests. When a BetterListView takes longer
+than the threshold, the SQL it ran, its filter and sort parameters and the
+database's plan for the list query are kept in a ring buffer that
+superusers can browse.
+
+Enable with BETTER_ADMIN_SLOW_LIST_THRESHOLD (seconds) in settings, or
+list_slow_threshold on a model admin.
+
+The plan is taken without touching the transaction of the request: within
+a savepoint, and on sqlite, whose Python module commits the open
+transaction before an EXPLAIN, on a connection of its own.
+"""
+import time
+from collections import deque
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.template.response import TemplateResponse
+from django.contrib.auth.decorators import user_passes_test
+
+from better_admin.metrics import QueryCounter, count_queries, \
+                                 uncount_queries
+
+
+#: seconds after which a list request is captured, None to switch off
+THRESHOLD = getattr(settings, 'BETTER_ADMIN_SLOW_LIST_THRESHOLD', None)
+#: how many slow requests to keep
+BUFFER_SIZE = getattr(settings, 'BETTER_ADMIN_SLOW_LIST_BUFFER', 50)
+#: GET parameters that are not filters
+NON_FILTER_PARAMS = ('page', 'sort_by', 'per_page')
+
+EXPLAIN_PREFIX = {
+    'sqlite': 'EXPLAIN QUERY PLAN',
+    'postgresql': 'EXPLAIN',
+    'mysql': 'EXPLAIN',
+    'oracle': 'EXPLAIN PLAN FOR',
+}
+
+# deque appends and pops are thread-safe
+slow_requests = deque(maxlen=BUFFER_SIZE)
+
+
+def get_sorted_queryset(queryset, request):
+    """
+    Applies the sort that the auto_sort template tag would apply.
+    """
+    sort_by = request.GET.get('sort_by')
+    if sort_by:
+        names = [f.name for f in queryset.model._meta.fields]
+        if sort_by.lstrip('-') in names:
+            queryset = queryset.order_by(sort_by)
+    return queryset
+
+
+def format_plan(rows):
+    return '\n'.join(' '.join(unicode(c) for c in row) for row in rows)
+
+
+def explain_sqlite(name, sql, params):
+    """
+    Returns the plan of sql on a connection of its own to the sqlite
+    database name.
+    """
+    from django.db.backends.sqlite3.base import Database, SQLiteCursorWrapper
+    if not name or name == ':memory:' or name.startswith('file::memory:'):
+        return 'EXPLAIN skipped: in-memory databases cannot be shared'
+    db = Database.connect(name)
+    try:
+        cursor = SQLiteCursorWrapper(db)
+        cursor.execute(sql, params)
+        return format_plan(cursor.fetchall())
+    except Exception as e:
+        return 'EXPLAIN failed: %s' % e
+    finally:
+        db.close()
+
+
+def explain(queryset):
+    """
+    Returns the backend's plan for queryset as text.
+    """
+    using = queryset.db
+    connection = connections[using]
+    prefix = EXPLAIN_PREFIX.get(connection.vendor, 'EXPLAIN')
+    sql, params = queryset.query.sql_with_params()
+    sql = '%s %s' % (prefix, sql)
+    if connection.vendor == 'sqlite':
+        return explain_sqlite(connection.settings_dict['NAME'], sql, params)
+    # a failed statement must not abort the transaction of the request
+    sid = transaction.savepoint(using=using)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        plan = format_plan(cursor.fetchall())
+    except Exception as e:
+        transaction.savepoint_rollback(sid, using=using)
+        return 'EXPLAIN failed: %s' % e
+    transaction.savepoint_commit(sid, using=using)
+    return plan
+
+
+class SlowListProfilerMixin(object):
+    """
+    To be used with BetterListView. Times the request, including the
+    template render where the list queries actually run, and records it
+    if it is slow.
+    """
+    slow_threshold = None
+
+    def get_slow_threshold(self):
+        if not self.slow_threshold is None:
+            return self.slow_threshold
+        return THRESHOLD
+
+    def dispatch(self, request, *args, **kwargs):
+        threshold = self.get_slow_threshold()
+        if threshold is None:
+            return super(SlowListProfilerMixin, self).dispatch(request,
+                                                               *args,
+                                                               **kwargs)
+        connection = connections[router.db_for_read(self.model)]
+        counter = QueryCounter(keep_statements=True)
+        previous = count_queries(connection, counter)
+        start = time.time()
+        try:
+            response = super(SlowListProfilerMixin, self).dispatch(request,
+                                                                   *args,
+                                                                   **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        finally:
+            uncount_queries(connection, previous)
+        duration = time.time() - start
+        if duration >= threshold:
+            self.record_slow_request(duration, counter.statements)
+        return response
+
+    def record_slow_request(self, duration, queries):
+        """
+        Puts the details of this request into the ring buffer. queries
+        are the (sql, seconds) it ran.
+        """
+        request = self.request
+        queryset = get_sorted_queryset(self.get_queryset(), request)
+        resolver_match = getattr(request, 'resolver_match', None)
+        slow_requests.appendleft({
+            'when': datetime.now(),
+            'view': resolver_match.url_name if resolver_match else None,
+            'path': request.get_full_path(),
+            'user': request.user.username,
+            'duration': duration,
+            'filters': dict((k, v) for k, v in request.GET.items()
+                            if v and not k in NON_FILTER_PARAMS),
+            'sort': request.GET.get('sort_by'),
+            'queries': [(sql, '%.3f' % seconds) for sql, seconds in queries],
+            'plan': explain(queryset),
+        })
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def slow_requests_view(request):
+    """
+    Lists the captured slow requests, newest first.
+    """
+    return TemplateResponse(request, 'better_admin/slow_requests.html',
+                            {'slow_requests': list(slow_requests),
+                             'threshold': THRESHOLD})
@@ -0,0 +1,113 @@
+"""
+Read-replica routing for the generated admin. The list and detail views,
+and the export, read from the BETTER_ADMIN_REPLICA database; everything
+else, including sessions, auth and every write, stays on the default one.
+
+After a POST the user reads from the primary for
+BETTER_ADMIN_REPLICA_STICKY_SECONDS so that they see their own changes
+even if the replica lags behind.
+
+Settings:
+
+    DATABASES = {'default': {...}, 'replica': {...}}
+    DATABASE_ROUTERS = ['better_admin.routers.ReplicaRouter']
+    MIDDLEWARE_CLASSES = (..., 'better_admin.routers.ReplicaStickinessMiddleware')
+    BETTER_ADMIN_REPLICA = 'replica'
+
+The settings are read as requests are routed, the router is loaded before
+the models are, and syncdb leaves the replica alone.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+#: seconds to read from the primary after a POST
+STICKY_SECONDS = getattr(settings, 'BETTER_ADMIN_REPLICA_STICKY_SECONDS', 5)
+STICKY_COOKIE = 'better_admin_primary'
+#: apps that are never read from the replica
+PRIMARY_APPS = ('sessions', 'auth', 'contenttypes')
+
+state = threading.local()
+
+
+def get_replica():
+    """
+    Returns the alias of the replica database, None to read from the
+    primary.
+    """
+    return getattr(settings, 'BETTER_ADMIN_REPLICA', None)
+
+
+@contextmanager
+def read_from_replica(request=None):
+    """
+    Routes the reads of this thread within the block to the replica, unless
+    request was made shortly after a POST.
+    """
+    if get_replica() is None or (not request is None and
+                                 STICKY_COOKIE in request.COOKIES):
+        yield
+        return
+    previous = getattr(state, 'replica', False)
+    state.replica = True
+    try:
+        yield
+    finally:
+        state.replica = previous
+
+
+class ReplicaRouter(object):
+    """
+    Sends reads to the replica within read_from_replica(), and everything
+    else to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(state, 'replica', False) and \
+                not model._meta.app_label in PRIMARY_APPS:
+            return get_replica()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_syncdb(self, db, model):
+        # the replica gets its tables from the primary
+        if db == get_replica():
+            return False
+        return None
+
+
+class ReplicaReadMixin(object):
+    """
+    To be used with BetterListView and BetterDetailView. Runs GET requests,
+    render included, against the replica.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.method in ('GET', 'HEAD'):
+            return super(ReplicaReadMixin, self).dispatch(request, *args,
+                                                          **kwargs)
+        with read_from_replica(request):
+            response = super(ReplicaReadMixin, self).dispatch(request, *args,
+                                                              **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class ReplicaStickinessMiddleware(object):
+    """
+    Keeps a user on the primary for a little while after a POST.
+    """
+
+    def process_response(self, request, response):
+        if not get_replica() is None and request.method == 'POST':
+            response.set_cookie(STICKY_COOKIE, '1', max_age=STICKY_SECONDS)
+        return response
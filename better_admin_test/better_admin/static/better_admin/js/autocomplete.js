@@ -0,0 +1,69 @@
+/*
+ * Autocomplete widget for better_admin. Fetches options from the lookup
+ * endpoint of the related model as the user types and keeps the selected
+ * values in hidden inputs. Rows added through the "+" popup are selected
+ * as they come back.
+ */
+$(function () {
+  var delay = 250;
+
+  function choice(name, id, text) {
+    var $choice = $('<span class="label label-info autocomplete-choice"></span>');
+    $choice.text(text + ' ');
+    $choice.append($('<input type="hidden">').attr('name', name).val(id));
+    $choice.append('<a href="#" class="autocomplete-remove"><i class="icon-remove icon-white"></i></a>');
+    return $choice;
+  }
+
+  function select($widget, id, text) {
+    var $selected = $widget.find('.autocomplete-selected');
+    if (!$widget.data('multiple')) {
+      $selected.empty();
+    }
+    $selected.append(choice($widget.data('name'), id, text));
+  }
+
+  // the popup calls this with the row it added, see RelatedObjectLookups.js
+  var dismissAddAnotherPopup = window.dismissAddAnotherPopup;
+  window.dismissAddAnotherPopup = function (win, newId, newRepr) {
+    var $input = $('#' + windowname_to_id(win.name));
+    if (!$input.hasClass('autocomplete-input')) {
+      return dismissAddAnotherPopup(win, newId, newRepr);
+    }
+    select($input.closest('.autocomplete'), html_unescape(newId),
+           html_unescape(newRepr));
+    win.close();
+  };
+
+  $(document).on('click', '.autocomplete-remove', function (e) {
+    e.preventDefault();
+    $(this).closest('.autocomplete-choice').remove();
+  });
+
+  $(document).on('keyup', '.autocomplete-input', function () {
+    var $input = $(this),
+        $widget = $input.closest('.autocomplete'),
+        $results = $widget.find('.autocomplete-results');
+    clearTimeout($input.data('timer'));
+    $input.data('timer', setTimeout(function () {
+      $.getJSON($widget.data('lookup-url'), {q: $input.val()}, function (data) {
+        $results.empty();
+        $.each(data, function (i, item) {
+          var $a = $('<a href="#"></a>').text(item.text);
+          $a.data('id', item.id);
+          $results.append($('<li></li>').append($a));
+        });
+        $results.toggle(data.length > 0);
+      });
+    }, delay));
+  });
+
+  $(document).on('click', '.autocomplete-results a', function (e) {
+    e.preventDefault();
+    var $a = $(this),
+        $widget = $a.closest('.autocomplete');
+    select($widget, $a.data('id'), $a.text());
+    $widget.find('.autocomplete-results').hide();
+    $widget.find('.autocomplete-input').val('');
+  });
+});
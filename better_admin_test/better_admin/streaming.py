@@ -0,0 +1,139 @@
+"""
+Page sizes and streaming of the list page. With a page of a thousand rows
+the browser used to show nothing until every row was rendered. A streamed
+page sends the page chrome and the filters at once and then the rows, a
+chunk at a time as they come from queryset.iterator(), so that the time to
+the first byte does not depend on the page size.
+
+The page is rendered as usual, with the rows left out by the stream_rows
+tag in table.html, and split where they belong. The rows are then rendered
+with better_admin/row.html.
+
+Settings:
+
+    BETTER_ADMIN_PER_PAGE          rows per page by default
+    BETTER_ADMIN_PER_PAGE_CHOICES  page sizes the user may pick with per_page
+    BETTER_ADMIN_STREAM_MIN_ROWS   page size from which pages are streamed
+    BETTER_ADMIN_STREAM_CHUNK_SIZE rows rendered and sent at a time
+"""
+import thread
+from itertools import islice
+
+from django.conf import settings
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.template import Context
+from django.template.loader import get_template
+
+from better_admin.routers import read_from_replica
+from better_admin.timeouts import query_time_budget, QueryTimeout
+
+try:
+    from debug_toolbar.middleware import DebugToolbarMiddleware
+except ImportError:
+    DebugToolbarMiddleware = None
+
+
+PER_PAGE = getattr(settings, 'BETTER_ADMIN_PER_PAGE', 10)
+PER_PAGE_CHOICES = getattr(settings, 'BETTER_ADMIN_PER_PAGE_CHOICES',
+                           (10, 50, 100, 500, 1000))
+STREAM_MIN_ROWS = getattr(settings, 'BETTER_ADMIN_STREAM_MIN_ROWS', 100)
+CHUNK_SIZE = getattr(settings, 'BETTER_ADMIN_STREAM_CHUNK_SIZE', 100)
+#: where the rows go, escaped wherever else it could turn up
+MARKER = '<!-- better_admin:rows -->'
+
+
+def toolbar_active():
+    """
+    Whether the debug toolbar is going to rewrite this response, which it
+    cannot do to a streamed one.
+    """
+    return not DebugToolbarMiddleware is None and \
+           thread.get_ident() in DebugToolbarMiddleware.debug_toolbars
+
+
+class StreamingListMixin(object):
+    """
+    To be used with BetterListView. Takes the page size from per_page and
+    streams the page if it is big, or always or never as streaming says.
+    """
+    streaming = None
+    row_template_name = 'better_admin/row.html'
+
+    def get_per_page(self):
+        try:
+            per_page = int(self.request.GET.get('per_page', PER_PAGE))
+        except ValueError:
+            return PER_PAGE
+        return per_page if per_page in PER_PAGE_CHOICES else PER_PAGE
+
+    def is_streaming(self):
+        if self.request.method != 'GET' or toolbar_active():
+            return False
+        if self.streaming is None:
+            return self.get_per_page() >= STREAM_MIN_ROWS
+        return self.streaming
+
+    def get_context_data(self, **kwargs):
+        context = super(StreamingListMixin, self).get_context_data(**kwargs)
+        context.update({'per_page': self.get_per_page(),
+                        'per_page_choices': PER_PAGE_CHOICES})
+        return context
+
+    def defer_rows(self, context):
+        """
+        Keeps the rows of the page, and what they are rendered with, for
+        later. Called by the stream_rows tag.
+        """
+        flat = {}
+        for d in context.dicts:
+            flat.update(d)
+        self.deferred_rows = (flat, context['object_list'])
+        return MARKER
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super(StreamingListMixin, self).render_to_response(
+            context, **response_kwargs)
+        if not self.is_streaming():
+            return response
+        response.render()
+        parts = response.content.split(MARKER)
+        deferred = getattr(self, 'deferred_rows', None)
+        if deferred is None or len(parts) != 2:
+            # no rows, or a template without stream_rows
+            return response
+        return StreamingHttpResponse(self.stream(parts[0], parts[1],
+                                                 *deferred),
+                                     status=response.status_code,
+                                     content_type=response['Content-Type'])
+
+    def stream(self, head, tail, context, rows):
+        yield head
+        template = get_template(self.row_template_name)
+        context = Context(context)
+        rows = iter(rows) if isinstance(rows, list) else rows.iterator()
+        try:
+            # the query runs as the first rows are read, the rest only
+            # fetches what it found
+            with read_from_replica(self.request):
+                using = router.db_for_read(self.model)
+                with query_time_budget(self.get_query_budget(), using):
+                    chunk = list(islice(rows, CHUNK_SIZE))
+        except QueryTimeout:
+            chunk = []
+            yield '<tr><td colspan="100" class="text-error">The rows took ' \
+                  'too long to load. Narrow the filters and try ' \
+                  'again.</td></tr>'
+        while chunk:
+            yield self.render_rows(template, context, chunk)
+            chunk = list(islice(rows, CHUNK_SIZE))
+        yield tail
+
+    def render_rows(self, template, context, objects):
+        rendered = []
+        for obj in objects:
+            context.push()
+            context['object'] = obj
+            rendered.append(template.render(context))
+            context.pop()
+        return ''.join(rendered)
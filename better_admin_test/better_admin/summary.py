@@ -0,0 +1,93 @@
+"""
+Summary row of the list page: the sum, average, minimum or maximum of
+numeric columns over all the rows that match the filters, not just those
+on the page. All of them come from a single aggregate() query, cached with
+the filters as key, see caching.py, so the row costs one query however
+many rows there are.
+
+Set summary on the view, or list_summary on a model admin, to a dict of
+field name to one or more of the functions:
+
+    list_summary = {'volume': 'sum', 'revenue': ('sum', 'avg')}
+"""
+from collections import OrderedDict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Sum, Avg, Min, Max, AutoField, IntegerField, \
+                             FloatField, DecimalField
+from django.db.models.fields import FieldDoesNotExist
+
+from better_admin.caching import cached, get_cache_key
+
+
+FUNCTIONS = OrderedDict((('sum', Sum), ('avg', Avg),
+                         ('min', Min), ('max', Max)))
+NUMERIC_FIELDS = (IntegerField, FloatField, DecimalField)
+
+
+class SummaryMixin(object):
+    """
+    To be used with BetterListView. Puts a summary row of the columns in
+    summary under the table.
+    """
+    summary = None
+
+    def get_summary_fields(self):
+        """
+        Returns summary as a dict of field name to a tuple of functions.
+        """
+        fields = OrderedDict()
+        for name, functions in (self.summary or {}).items():
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if not isinstance(field, NUMERIC_FIELDS) or \
+                    isinstance(field, AutoField):
+                raise ImproperlyConfigured('%s of %s is not a numeric field'
+                                           % (name, self.model.__name__))
+            if isinstance(functions, basestring):
+                functions = (functions,)
+            for function in functions:
+                if not function in FUNCTIONS:
+                    raise ImproperlyConfigured('%s is none of %s' % (
+                        function, ', '.join(FUNCTIONS)))
+            fields[name] = tuple(functions)
+        return fields
+
+    def get_summary(self):
+        """
+        Returns a dict of 'field__function' to its value over the rows that
+        match the filters.
+        """
+        aggregates = dict(('%s__%s' % (name, function),
+                           FUNCTIONS[function](name))
+                          for name, functions in
+                          self.get_summary_fields().items()
+                          for function in functions)
+        if not aggregates:
+            return {}
+        queryset = self.get_queryset().order_by()
+        key = get_cache_key('summary', self.get_coalesce_key(), queryset)
+        return cached(key, lambda: queryset.aggregate(**aggregates))
+
+    def get_summary_rows(self):
+        """
+        Returns the summary row as a list of (function, values), one value
+        per column of the table, None where there is none.
+        """
+        fields = self.get_summary_fields()
+        if not fields:
+            return []
+        summary = self.get_summary()
+        exclude = (self.extra_context or {}).get('exclude') or ()
+        columns = [f.name for f in self.get_model_fields()
+                   if not f.name in exclude and not isinstance(f, AutoField)]
+        rows = []
+        for function in FUNCTIONS:
+            if not any(function in functions for functions in fields.values()):
+                continue
+            rows.append((function, [summary.get('%s__%s' % (name, function))
+                                    if function in fields.get(name, ())
+                                    else None for name in columns]))
+        return rows
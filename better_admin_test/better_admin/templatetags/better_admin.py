@@ -72,3 +72,40 @@ def get_fk_popup_url(field):
     model_name = model._meta.object_name.lower()
     app_name = model._meta.app_label.lower()
     return '%s/%s/popup' % (app_name, model_name)
+
+@register.simple_tag(takes_context=True)
+def editable_grid(context):
+    """
+    Puts the editable grid of the list view, if the user may edit, into
+    the context as grid and hands every row on the page its form as
+    grid_form. To be used in ListView, after autopaginate.
+    """
+    view = context.get('view')
+    get_grid_formset = getattr(view, 'get_grid_formset', None)
+    grid = None
+    if not get_grid_formset is None:
+        grid = get_grid_formset(context['object_list'])
+    if not grid is None:
+        context['object_list'] = [form.instance for form in grid.forms]
+        for form in grid.forms:
+            form.instance.grid_form = form
+    context['grid'] = grid
+    return ''
+
+@register.filter
+def get_form_field(form, field_name):
+    """
+    Returns the bound field of form by the given name, or None. To be used
+    in ListView for the cells of the editable grid.
+    """
+    if not form or not field_name in form.fields:
+        return None
+    return form[field_name]
+
+@register.simple_tag(takes_context=True)
+def stream_rows(context):
+    """
+    Leaves the rows of the page out, for the view to stream them after the
+    rest of the page. To be used in ListView, see streaming.py.
+    """
+    return context['view'].defer_rows(context)
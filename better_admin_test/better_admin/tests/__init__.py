@@ -1,6 +1,29 @@
-from test_core import *
-from test_admin import *
-from test_mixins import *
-from test_viewmixins import *
-from test_views import *
-from test_context_processors import *
\ No newline at end of file
+"""
+Django 1.5 runs the test cases it finds in this module, so every test_*
+module of the package is pulled in here, as with a star import, rather
+than listed by hand.
+"""
+import pkgutil
+import unittest
+
+
+def load_test_modules():
+    for loader, name, is_package in sorted(pkgutil.iter_modules(__path__)):
+        if not name.startswith('test_'):
+            continue
+        module = __import__('%s.%s' % (__name__, name), fromlist=['*'])
+        for attr, value in vars(module).items():
+            if attr.startswith('_'):
+                continue
+            current = globals().get(attr)
+            if isinstance(value, type) and \
+                    issubclass(value, unittest.TestCase) and \
+                    isinstance(current, type) and current is not value and \
+                    current.__module__.startswith(__name__):
+                # one would hide the other from the runner
+                raise ImportError('%s is defined in both %s and %s' % (
+                    attr, current.__module__, value.__module__))
+            globals()[attr] = value
+
+
+load_test_modules()
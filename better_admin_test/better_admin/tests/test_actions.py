@@ -0,0 +1,85 @@
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin.actions import delete_in_batches
+from better_admin_test_app.models import Company
+
+
+# the default actions, numbered as the select posts them
+DELETE, UPDATE, EXPORT = '1', '2', '3'
+
+
+class ActionsTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        for name in ('Acme', 'Acme Inc', 'Other'):
+            Company.objects.create(name=name, address='ABC',
+                                   url='http://www.x.com',
+                                   ip_address='192.1.1.1',
+                                   volume=100, revenue=10)
+        self.list_url = reverse('better_admin_test_app_company_list')
+
+    def test_actions_in_context(self):
+        response = self.c.get(self.list_url)
+        self.assertEqual([label for label, attrs in response.context['actions']],
+                         ['Delete', 'Update', 'Export'])
+
+    def test_select_across_offered_beyond_one_page(self):
+        response = self.c.get(self.list_url)
+        self.assertNotContains(response, 'action-select-all')
+        for i in range(8):
+            Company.objects.create(name='More %d' % i, address='ABC',
+                                   url='http://www.x.com',
+                                   ip_address='192.1.1.1',
+                                   volume=100, revenue=10)
+        response = self.c.get(self.list_url)
+        self.assertContains(response, 'Select all 11')
+
+    def test_delete_selected(self):
+        pk = Company.objects.get(name='Other').pk
+        response = self.c.post(self.list_url, {'action': DELETE,
+                                               'action-select': [pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Company.objects.filter(pk=pk).exists())
+        self.assertEqual(Company.objects.count(), 2)
+
+    def test_select_across_honours_filters(self):
+        self.c.post(self.list_url + '?name=Acme*', {'action': DELETE,
+                                                    'select-across': '1'})
+        self.assertEqual(list(Company.objects.values_list('name', flat=True)),
+                         ['Other'])
+
+    def test_update_selected(self):
+        self.c.post(self.list_url, {'action': UPDATE, 'select-across': '1',
+                                    'action-field': 'volume',
+                                    'action-value': '5'})
+        self.assertEqual(set(Company.objects.values_list('volume', flat=True)),
+                         set([5]))
+
+    def test_update_invalid_value(self):
+        self.c.post(self.list_url, {'action': UPDATE, 'select-across': '1',
+                                    'action-field': 'volume',
+                                    'action-value': 'many'})
+        self.assertEqual(set(Company.objects.values_list('volume', flat=True)),
+                         set([100]))
+
+    def test_export_selected(self):
+        pk = Company.objects.get(name='Other').pk
+        response = self.c.post(self.list_url, {'action': EXPORT,
+                                               'action-select': [pk]})
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertIn('Other', response.content)
+        self.assertNotIn('Acme', response.content)
+
+    def test_nothing_selected(self):
+        self.c.post(self.list_url, {'action': DELETE})
+        self.assertEqual(Company.objects.count(), 3)
+
+    def test_delete_in_batches(self):
+        self.assertEqual(delete_in_batches(Company.objects.all(), 2), 3)
+        self.assertEqual(Company.objects.count(), 0)
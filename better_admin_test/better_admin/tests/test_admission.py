@@ -0,0 +1,83 @@
+import json
+
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin import admission
+from better_admin.admission import Scheduler
+
+
+class SchedulerTest(TestCase):
+
+    def test_global_and_user_limits(self):
+        scheduler = Scheduler(2, 1, 60)
+        self.assertTrue(scheduler.admit('a')[0])
+        # a is at their own limit, b is not
+        admitted, ticket, position = scheduler.admit('a')
+        self.assertFalse(admitted)
+        self.assertEqual(position, 1)
+        self.assertTrue(scheduler.admit('b')[0])
+        # now everybody is over the global limit
+        self.assertFalse(scheduler.admit('c')[0])
+
+    def test_queue_order(self):
+        scheduler = Scheduler(1, 1, 60)
+        self.assertTrue(scheduler.admit('a')[0])
+        admitted, b_ticket, position = scheduler.admit('b')
+        self.assertEqual(position, 1)
+        admitted, c_ticket, position = scheduler.admit('c')
+        self.assertEqual(position, 2)
+        scheduler.release('a')
+        # c may not jump the queue
+        self.assertFalse(scheduler.admit('c', c_ticket)[0])
+        self.assertTrue(scheduler.admit('b', b_ticket)[0])
+        scheduler.release('b')
+        self.assertTrue(scheduler.admit('c', c_ticket)[0])
+
+    def test_abandoned_tickets_expire(self):
+        scheduler = Scheduler(1, 1, -1)
+        self.assertTrue(scheduler.admit('a')[0])
+        scheduler.admit('b')
+        scheduler.release('a')
+        # b never came back
+        self.assertTrue(scheduler.admit('c')[0])
+
+
+class AdmissionViewTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        self.limit = admission.scheduler.limit
+
+    def tearDown(self):
+        admission.scheduler.limit = self.limit
+
+    def test_export_is_queued(self):
+        admission.scheduler.limit = 0
+        export_url = reverse('better_admin_test_app_company_export')
+        # showing the form is not heavy
+        response = self.c.get(export_url)
+        self.assertEqual(response.status_code, 200)
+        response = self.c.post(export_url, {'file_format': 0})
+        self.assertEqual(response.status_code, 503)
+        self.assertTemplateUsed(response, 'better_admin/queued.html')
+        self.assertContains(response, 'number 1 in the queue', status_code=503)
+        admission.scheduler.limit = self.limit
+        response = self.c.post(export_url, {'file_format': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_api_is_queued_as_json(self):
+        admission.scheduler.limit = 0
+        # reading pages is not heavy by default, writing in bulk is
+        response = self.c.post(
+            reverse('better_admin_test_app_company_api_bulk'),
+            json.dumps([{'name': 'New'}]), content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)['position'], 1)
+        self.assertEqual(response['Retry-After'], str(admission.POLL_SECONDS))
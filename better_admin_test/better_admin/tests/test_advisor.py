@@ -0,0 +1,59 @@
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin import advisor
+from better_admin.filters import filterset_factory
+from better_admin_test_app.models import Company, Tariff
+
+
+class IndexColumnsTest(TestCase):
+
+    def test_equality_sort_range_order(self):
+        filter_set = filterset_factory(Company)
+        columns = advisor.get_index_columns(Company, filter_set,
+                                            {'volume_0': '1',
+                                             'sort_by': '-revenue'})
+        self.assertEqual(columns, ('revenue', 'volume'))
+
+    def test_wildcard_and_indexed_fields_are_skipped(self):
+        self.assertEqual(advisor.get_index_columns(
+            Company, filterset_factory(Company), {'name': 'A*'}), None)
+        self.assertEqual(advisor.get_index_columns(
+            Tariff, filterset_factory(Tariff), {'company': '1'}), None)
+
+    def test_plain_request(self):
+        self.assertEqual(advisor.get_index_columns(
+            Company, filterset_factory(Company), {}), ())
+
+
+class IndexAdviceTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        advisor.usage.clear()
+
+    def tearDown(self):
+        advisor.usage.clear()
+
+    def test_ranked_by_saving(self):
+        advisor.usage.record(Company, (), 0.1)
+        advisor.usage.record(Company, ('revenue',), 0.3)
+        advisor.usage.record(Company, ('revenue', 'volume'), 1.1)
+        indexes = advisor.usage.advice()
+        self.assertEqual([i.names for i in indexes],
+                         [('revenue', 'volume'), ('revenue',)])
+        self.assertAlmostEqual(indexes[0].saving, 1.0)
+        self.assertIn('CREATE INDEX', indexes[0].as_sql())
+        self.assertEqual(indexes[1].as_meta(), 'revenue: db_index=True')
+
+    def test_list_requests_are_recorded(self):
+        list_url = reverse('better_admin_test_app_company_list')
+        self.c.get(list_url)
+        self.c.get(list_url, {'sort_by': '-revenue'})
+        response = self.c.get(reverse('better_admin_index_advice'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'better_admin_test_app_company_revenue_idx')
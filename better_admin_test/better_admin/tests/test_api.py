@@ -0,0 +1,137 @@
+import datetime
+import json
+
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from better_admin_test_app.models import Company, Tariff
+
+
+class ApiTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        for i, name in enumerate(('Acme', 'Acme Inc', 'Other')):
+            Company.objects.create(name=name, address='ABC',
+                                   url='http://www.x.com',
+                                   ip_address='192.1.1.1',
+                                   volume=100 - i, revenue=10)
+        self.list_url = reverse('better_admin_test_app_company_api_list')
+
+    def get_json(self, url, data=None):
+        response = self.c.get(url, data or {})
+        if response.streaming:
+            content = ''.join(response.streaming_content)
+        else:
+            content = response.content
+        return response.status_code, json.loads(content)
+
+    def test_list(self):
+        status, data = self.get_json(self.list_url, {'fields': 'name'})
+        self.assertEqual(status, 200)
+        self.assertEqual([r['name'] for r in data['results']],
+                         ['Acme', 'Acme Inc', 'Other'])
+        self.assertEqual(sorted(data['results'][0].keys()), ['id', 'name'])
+        self.assertEqual(data['next'], None)
+
+    def test_filters_and_sort(self):
+        status, data = self.get_json(self.list_url, {'name': 'Acme*',
+                                                     'sort_by': 'volume'})
+        self.assertEqual([r['name'] for r in data['results']],
+                         ['Acme Inc', 'Acme'])
+
+    def test_cursor(self):
+        params = {'sort_by': '-name', 'limit': 2}
+        status, data = self.get_json(self.list_url, params)
+        self.assertEqual([r['name'] for r in data['results']],
+                         ['Other', 'Acme Inc'])
+        params['cursor'] = data['next']
+        status, data = self.get_json(self.list_url, params)
+        self.assertEqual([r['name'] for r in data['results']], ['Acme'])
+        self.assertEqual(data['next'], None)
+
+    def test_cursor_keeps_microseconds(self):
+        company = Company.objects.get(name='Acme')
+        start = datetime.datetime(2013, 1, 1, 10, 0, 0, 100,
+                                  tzinfo=timezone.utc)
+        for i in range(3):
+            Tariff.objects.create(company=company, rates='rates.csv',
+                                  codes='1,2',
+                                  valid_from=start + datetime.timedelta(
+                                      microseconds=100 * i))
+        url = reverse('better_admin_test_app_tariff_api_list')
+        params = {'sort_by': 'valid_from', 'limit': 1, 'fields': 'codes'}
+        pks = []
+        # a cursor that lost the microseconds hands the same row out again
+        for i in range(5):
+            status, data = self.get_json(url, params)
+            pks += [r['id'] for r in data['results']]
+            if data['next'] is None:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(pks, list(Tariff.objects.order_by('valid_from')
+                                   .values_list('pk', flat=True)))
+
+    def test_bad_request(self):
+        status, data = self.get_json(self.list_url, {'fields': 'nope'})
+        self.assertEqual(status, 400)
+
+    def test_detail(self):
+        company = Company.objects.get(name='Other')
+        url = reverse('better_admin_test_app_company_api_detail',
+                      args=(company.pk,))
+        status, data = self.get_json(url)
+        self.assertEqual(status, 200)
+        self.assertEqual(data['name'], 'Other')
+        url = reverse('better_admin_test_app_company_api_detail',
+                      args=(company.pk + 100,))
+        status, data = self.get_json(url)
+        self.assertEqual(status, 404)
+
+    def test_bulk(self):
+        acme = Company.objects.get(name='Acme')
+        rows = [{'name': 'New', 'address': 'ABC', 'url': 'http://www.x.com',
+                 'ip_address': '192.1.1.1', 'volume': 1, 'revenue': 2},
+                {'id': acme.pk, 'volume': 5},
+                {'id': acme.pk, 'volume': 'many'},
+                {'name': 'Incomplete'}]
+        url = reverse('better_admin_test_app_company_api_bulk')
+        response = self.c.post(url, json.dumps(rows),
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual((data['created'], data['updated']), (1, 1))
+        self.assertEqual([e['index'] for e in data['errors']], [2, 3])
+        self.assertTrue(Company.objects.filter(name='New').exists())
+        self.assertFalse(Company.objects.filter(name='Incomplete').exists())
+        self.assertEqual(Company.objects.get(pk=acme.pk).volume, 5)
+
+    def test_bulk_needs_json(self):
+        url = reverse('better_admin_test_app_company_api_bulk')
+        response = self.c.post(url, {'name': 'New'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_needs_csrf_token(self):
+        c = Client(enforce_csrf_checks=True)
+        c.login(username='user', password='pswd')
+        url = reverse('better_admin_test_app_company_api_bulk')
+        rows = json.dumps([{'id': Company.objects.get(name='Acme').pk,
+                            'volume': 5}])
+        response = c.post(url, rows, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        c.get(reverse('better_admin_test_app_company_list'))
+        response = c.post(url, rows, content_type='application/json',
+                          HTTP_X_CSRFTOKEN=c.cookies['csrftoken'].value)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['updated'], 1)
+
+    def test_permission(self):
+        User.objects.create_user('other', 'other@test.com', 'pswd')
+        self.c.login(username='other', password='pswd')
+        response = self.c.get(self.list_url)
+        self.assertEqual(response.status_code, 403)
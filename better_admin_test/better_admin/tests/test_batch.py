@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin.batch import save_changes
+from better_admin_test_app.models import Company
+
+
+class BatchTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        self.companies = [Company.objects.create(name=name, address='ABC',
+                                                 url='http://www.x.com',
+                                                 ip_address='192.1.1.1',
+                                                 volume=100, revenue=10)
+                          for name in ('X', 'Y', 'Z')]
+        self.list_url = reverse('better_admin_test_app_company_list')
+
+    def get_data(self, cells):
+        """
+        Returns the post of the grid with the given {index: {field: value}}
+        changed, as rendered from setUp.
+        """
+        data = {'grid-save': '1',
+                'grid-TOTAL_FORMS': len(self.companies),
+                'grid-INITIAL_FORMS': len(self.companies),
+                'grid-MAX_NUM_FORMS': 1000}
+        for i, company in enumerate(self.companies):
+            data['grid-%d-id' % i] = company.pk
+            for name in ('volume', 'revenue'):
+                initial = getattr(company, name)
+                data['initial-grid-%d-%s' % (i, name)] = initial
+                data['grid-%d-%s' % (i, name)] = cells.get(i, {}).get(name,
+                                                                      initial)
+        return data
+
+    def test_save_changes(self):
+        pks = [c.pk for c in self.companies]
+        # one UPDATE per column and value
+        with self.assertNumQueries(2):
+            saved = save_changes(Company, {pks[0]: {'volume': 5},
+                                           pks[1]: {'volume': 5},
+                                           pks[2]: {'revenue': 1.5}})
+        self.assertEqual(saved, 3)
+        self.assertEqual(list(Company.objects.order_by('pk').values_list(
+            'volume', 'revenue')), [(5, 10), (5, 10), (100, 1.5)])
+
+    def test_grid_in_context(self):
+        response = self.c.get(self.list_url)
+        self.assertEqual(len(response.context['grid'].forms), 3)
+        self.assertContains(response, 'name="grid-0-volume"')
+
+    def test_grid_save(self):
+        response = self.c.post(self.list_url, self.get_data(
+            {0: {'volume': 1}, 2: {'revenue': 2}}))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Company.objects.order_by('pk').values_list(
+            'volume', 'revenue')), [(1, 10), (100, 10), (100, 2)])
+
+    def test_only_changed_cells_are_saved(self):
+        data = self.get_data({1: {'volume': 1}})
+        # changed by someone else since the grid was rendered
+        Company.objects.filter(pk=self.companies[0].pk).update(volume=7)
+        self.c.post(self.list_url, data)
+        self.assertEqual(list(Company.objects.order_by('pk').values_list(
+            'volume', flat=True)), [7, 1, 100])
+
+    def test_invalid_cell(self):
+        response = self.c.post(self.list_url, self.get_data(
+            {0: {'volume': 'many'}, 1: {'volume': 1}}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['grid'].errors[0])
+        self.assertEqual(set(Company.objects.values_list('volume', flat=True)),
+                         set([100]))
+
+
+class SaveChangesTransactionTest(TransactionTestCase):
+
+    def test_without_commit_the_caller_rolls_back(self):
+        company = Company.objects.create(name='X', address='ABC',
+                                         url='http://www.x.com',
+                                         ip_address='192.1.1.1',
+                                         volume=100, revenue=10)
+        try:
+            with transaction.commit_on_success():
+                save_changes(Company, {company.pk: {'volume': 5}},
+                             commit=False)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(Company.objects.get(pk=company.pk).volume, 100)
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.http import QueryDict
+from django.test import TestCase
+
+from better_admin import coalesce
+from better_admin.filters import filterset_factory
+from better_admin_test_app.models import Company
+
+
+class SingleFlightTest(TestCase):
+
+    def test_concurrent_calls_share_one_run(self):
+        calls = []
+        results = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return [42]
+
+        def call():
+            results.append(coalesce.flights.do('key', slow))
+
+        threads = [threading.Thread(target=call) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[42]] * 10)
+
+    def test_errors_are_shared(self):
+        def fail():
+            raise ValueError('boom')
+        self.assertRaises(ValueError, coalesce.flights.do, 'key', fail)
+        # nothing is left in flight
+        self.assertEqual(coalesce.flights.calls, {})
+
+    def test_keys_share_a_fixed_set_of_lock_files(self):
+        paths = set(coalesce.get_lock_path('%040x' % i)
+                    for i in range(coalesce.LOCK_FILES * 4))
+        self.assertEqual(len(paths), coalesce.LOCK_FILES)
+
+
+class CoalescingQuerySetTest(TestCase):
+
+    def setUp(self):
+        self.mode = coalesce.MODE
+        coalesce.MODE = 'process'
+        Company.objects.create(name='X', address='ABC',
+                               url='http://www.x.com',
+                               ip_address='192.1.1.1',
+                               volume=100, revenue=10)
+
+    def tearDown(self):
+        coalesce.MODE = self.mode
+
+    def test_key_survives_clones(self):
+        queryset = coalesce.coalescing(Company.objects.all(), 'list')
+        queryset = queryset.filter(name='X').order_by('-revenue')[:10]
+        self.assertEqual(queryset.coalesce_key, 'list')
+        self.assertEqual([c.name for c in queryset], ['X'])
+        self.assertEqual(queryset.count(), 1)
+
+    def test_param_order_does_not_matter(self):
+        # the filter set applies its filters in field order
+        filter_set = filterset_factory(Company)
+        a = filter_set(QueryDict('name=X&volume_0=1&volume_1=200&url='),
+                       queryset=Company.objects.all()).qs
+        b = filter_set(QueryDict('volume_1=200&name=X&volume_0=1'),
+                       queryset=Company.objects.all()).qs
+        self.assertEqual(coalesce.get_sql_key(a), coalesce.get_sql_key(b))
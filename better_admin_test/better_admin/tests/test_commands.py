@@ -0,0 +1,83 @@
+"""
+Smoke tests for the management commands of the test app. They run each
+command at a tiny size, to catch it breaking, not to measure anything.
+"""
+import json
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, LiveServerTestCase
+
+from better_admin_test_app.models import Company, KAM, Tariff
+from better_admin_test_app.factories import seed
+
+
+class BenchmarkCommandTest(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp, 'benchmark.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_benchmark_writes_every_scenario_at_every_size(self):
+        call_command('better_admin_benchmark', sizes='2,4', requests=1,
+                     batch=3, output=self.output, test_db=False,
+                     verbosity=0)
+        with open(self.output) as output:
+            results = json.load(output)['results']
+        self.assertEqual(sorted(results.keys()), ['2', '4'])
+        for size, scenarios in results.items():
+            self.assertIn('company_list', scenarios)
+            for name, summary in scenarios.items():
+                self.assertEqual(summary['requests'], 1, name)
+                self.assertTrue(summary['queries'] > 0, name)
+
+
+# the seeder commits its batches and closes the connection after each
+class SeedCommandTest(TransactionTestCase):
+
+    def seed(self, **options):
+        call_command('better_admin_seed', batch=2, verbosity=0, **options)
+
+    def test_seed_creates_the_rows_asked_for(self):
+        self.seed(companies=3, kams=3, tariffs=3)
+        self.assertEqual(Company.objects.count(), 3)
+        self.assertEqual(KAM.objects.count(), 3)
+        self.assertEqual(Tariff.objects.count(), 3)
+        self.assertEqual(KAM.objects.filter(user__isnull=True).count(), 0)
+
+    def test_seed_adds_to_existing_rows(self):
+        self.seed(companies=2, kams=2)
+        self.seed(companies=2, kams=2, tariffs=2)
+        self.assertEqual(Company.objects.count(), 4)
+        self.assertEqual(len(set(KAM.objects.values_list('user__username',
+                                                         flat=True))), 4)
+        # sequences were moved past the seeded pks
+        Company.objects.create(name='After', address='', url='',
+                               ip_address='10.0.0.1', volume=0, revenue=0)
+
+
+class LoadtestCommandTest(LiveServerTestCase):
+
+    def setUp(self):
+        seed(2)
+        self.tmp = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp, 'loadtest.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_loadtest_users_get_through(self):
+        call_command('better_admin_loadtest', url=self.live_server_url,
+                     users=1, duration=1, output=self.output,
+                     stdout=StringIO())
+        with open(self.output) as output:
+            views = json.load(output)['views']
+        self.assertTrue(views)
+        for name, summary in views.items():
+            self.assertEqual(summary['error_rate'], 0, name)
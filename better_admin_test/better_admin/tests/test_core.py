@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from better_admin.core import registry
+from better_admin.warmup import warm_up, get_view_names
+
+
+class WarmUpTest(TestCase):
+
+    def test_warm_up_walks_registered_admins(self):
+        warmed = warm_up()
+        # urlconf has been imported so the test app admin is registered
+        app_names = [app_admin.app_name for app_admin in registry.values()]
+        self.assertIn('better_admin_test_app', app_names)
+        list_names = [m.get_view_name('list') for m in warmed]
+        self.assertIn('better_admin_test_app_company_list', list_names)
+
+    def test_registry_keeps_one_admin_per_app(self):
+        warm_up()
+        app_admin = registry['better_admin_test_app']
+        try:
+            again = type(app_admin)()
+            self.assertEqual([a for a in registry.values()
+                              if a.app_name == 'better_admin_test_app'],
+                             [again])
+        finally:
+            registry['better_admin_test_app'] = app_admin
+
+    def test_get_view_names(self):
+        app_admin = [a for a in registry.values()
+                     if a.app_name == 'better_admin_test_app'][0]
+        model_admin = app_admin.model_admins['Company']
+        names = dict(get_view_names(model_admin))
+        self.assertEqual(names['better_admin_test_app_company_detail'],
+                         ('0',))
+        self.assertIn('better_admin_test_app_company_export', names)
+        self.assertEqual(names['better_admin_test_app_company_api_detail'],
+                         ('0',))
+        self.assertIn('better_admin_test_app_company_api_bulk', names)
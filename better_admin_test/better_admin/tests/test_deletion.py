@@ -0,0 +1,101 @@
+import datetime
+
+from django.test import TestCase
+from django.test import Client
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.db.models.deletion import ProtectedError
+
+from better_admin import deletion
+from better_admin.metrics import QueryCounter, count_queries, \
+                                 uncount_queries
+from better_admin_test_app.models import Company, Tariff, KAM
+
+
+class DeletionTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('user', 'user@test.com',
+                                                  'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        self.kam = KAM.objects.create(user=self.user, name='K',
+                                      email='k@test.com', snap='k.png',
+                                      permanent=True, sales=1,
+                                      joining=datetime.date(2013, 1, 1))
+        self.companies = [Company.objects.create(name=name, address='ABC',
+                                                 url='http://www.x.com',
+                                                 ip_address='192.1.1.1',
+                                                 volume=100, revenue=10)
+                          for name in ('X', 'Y')]
+        for company in self.companies:
+            for i in range(3):
+                tariff = Tariff.objects.create(
+                    company=company, valid_from=datetime.datetime.now(),
+                    rates='rates.csv', codes='1,2')
+                tariff.kams.add(self.kam)
+
+    def test_preview(self):
+        rows = deletion.summarize(deletion.preview(
+            Company.objects.filter(pk=self.companies[0].pk)))
+        self.assertEqual([(m, a, c) for m, a, c in rows][0],
+                         (Company, 'delete', 1))
+        counts = dict((m._meta.object_name, c) for m, a, c in rows)
+        self.assertEqual(counts['Tariff'], 3)
+        self.assertEqual(counts['Tariff_kams'], 3)
+
+    def test_preview_queries_do_not_depend_on_the_data(self):
+        Tariff.objects.filter(company=self.companies[1]).delete()
+        connection = connections[DEFAULT_DB_ALIAS]
+        counts = []
+        for company in self.companies:
+            counter = QueryCounter()
+            previous = count_queries(connection, counter)
+            try:
+                deletion.preview(Company.objects.filter(pk=company.pk))
+            finally:
+                uncount_queries(connection, previous)
+            counts.append(counter.count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_delete_queryset(self):
+        deletion.delete_queryset(Company.objects.filter(name='X'),
+                                 batch_size=2)
+        self.assertEqual(Company.objects.count(), 1)
+        self.assertEqual(Tariff.objects.count(), 3)
+        self.assertEqual(Tariff.kams.through.objects.count(), 3)
+        self.assertEqual(KAM.objects.count(), 1)
+
+    def test_rows_are_fixed_up_front(self):
+        # the filter stops matching once the tariffs are gone
+        deletion.delete_queryset(Company.objects.filter(
+            tariff__kams=self.kam).distinct(), batch_size=1)
+        self.assertEqual(Company.objects.count(), 0)
+
+    def test_delete_view(self):
+        delete_url = reverse('better_admin_test_app_company_delete',
+                             args=(self.companies[0].pk,))
+        response = self.c.get(delete_url)
+        self.assertIn(('tariffs', 'delete', 3), response.context['cascade'])
+        self.assertFalse(response.context['protected'])
+        self.c.post(delete_url)
+        self.assertEqual(Tariff.objects.filter(
+            company=self.companies[0]).count(), 0)
+        self.assertEqual(Tariff.objects.count(), 3)
+
+    def test_delete_view_protected(self):
+        def protected(queryset, *args, **kwargs):
+            raise ProtectedError('Protected', [])
+        delete_url = reverse('better_admin_test_app_company_delete',
+                             args=(self.companies[0].pk,))
+        delete_queryset = deletion.delete_queryset
+        deletion.delete_queryset = protected
+        try:
+            response = self.c.post(delete_url)
+        finally:
+            deletion.delete_queryset = delete_queryset
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['protected'])
+        self.assertTrue(Company.objects.filter(
+            pk=self.companies[0].pk).exists())
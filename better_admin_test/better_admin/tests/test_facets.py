@@ -0,0 +1,55 @@
+import datetime
+
+from django.test import TestCase
+from django.test import Client
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin_test_app.models import Company, Tariff
+
+
+class FacetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        self.companies = [Company.objects.create(name=name, address='ABC',
+                                                 url='http://www.x.com',
+                                                 ip_address='192.1.1.1',
+                                                 volume=100, revenue=10)
+                          for name in ('X', 'Y', 'Z')]
+        for i in range(7):
+            Tariff.objects.create(company=self.companies[i % 3],
+                                  valid_from=datetime.datetime.now(),
+                                  expired=(True, False, None)[i % 3],
+                                  rates='rates.csv', codes='1,2')
+        self.list_url = reverse('better_admin_test_app_tariff_list')
+
+    def get_form(self, data=None):
+        response = self.c.get(self.list_url, data or {})
+        return response.context['filter'].form
+
+    def test_counts(self):
+        form = self.get_form()
+        self.assertEqual(list(form.fields['company'].choices)[1:],
+                         [(c.pk, u'%s (%d)' % (c, n)) for c, n in
+                          zip(self.companies, (3, 2, 2))])
+        self.assertEqual(form.fields['expired'].widget.choices[1:],
+                         [(u'2', u'Yes (3)'), (u'3', u'No (2)')])
+
+    def test_counts_are_filtered(self):
+        form = self.get_form({'company': self.companies[1].pk})
+        self.assertEqual(form.fields['expired'].widget.choices[1:],
+                         [(u'2', u'Yes (0)'), (u'3', u'No (2)')])
+        self.assertIn((self.companies[0].pk, u'X (0)'),
+                      form.fields['company'].choices)
+
+    def test_counts_are_cached(self):
+        self.get_form()
+        Tariff.objects.update(expired=False)
+        form = self.get_form()
+        self.assertEqual(form.fields['expired'].widget.choices[1:],
+                         [(u'2', u'Yes (3)'), (u'3', u'No (2)')])
@@ -0,0 +1,14 @@
+from django.test import TestCase
+
+from better_admin_test_app import factories
+from better_admin_test_app.models import KAM
+
+
+class FactoriesTest(TestCase):
+
+    def test_make_kams_looks_up_users_in_batches(self):
+        n = factories.LOOKUP_BATCH_SIZE + 1
+        factories.make_kams(n)
+        self.assertEqual(KAM.objects.count(), n)
+        for kam in KAM.objects.select_related('user').order_by('-pk')[:2]:
+            self.assertEqual(kam.email, kam.user.email)
@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from better_admin.filters import filterset_factory, \
+                                 LazyModelChoiceFilter, \
+                                 LazyModelMultipleChoiceFilter
+from better_admin.widgets import AutocompleteSelect
+
+from better_admin_test_app.models import Company, Tariff
+
+
+class LazyFilterTest(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='X', address = 'ABC',
+                                              url='http://www.x.com',
+                                              ip_address='192.1.1.1',
+                                              volume=100, revenue=10)
+
+    def test_factory_uses_lazy_filters(self):
+        filterset = filterset_factory(Tariff)
+        self.assertIsInstance(filterset.base_filters['company'],
+                              LazyModelChoiceFilter)
+        self.assertIsInstance(filterset.base_filters['kams'],
+                              LazyModelMultipleChoiceFilter)
+
+    def test_large_table_renders_selected_only(self):
+        filterset = filterset_factory(Tariff)
+        filterset.base_filters['company'].threshold = 0
+        f = filterset({'company': self.company.pk},
+                      queryset=Tariff.objects.all())
+        field = f.form.fields['company']
+        self.assertIsInstance(field.widget, AutocompleteSelect)
+        self.assertNotIn('<option', unicode(f.form['company']))
+        # filtering still works off the selected pk
+        self.assertEqual(list(f.qs), [])
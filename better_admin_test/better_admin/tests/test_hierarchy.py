@@ -0,0 +1,71 @@
+import datetime
+
+from django.test import TestCase
+from django.test import Client
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from better_admin_test_app.models import Company, Tariff
+
+
+class DateHierarchyTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        company = Company.objects.create(name='X', address='ABC',
+                                         url='http://www.x.com',
+                                         ip_address='192.1.1.1',
+                                         volume=100, revenue=10)
+        for y, m, d in ((2012, 12, 31), (2013, 1, 1), (2013, 1, 5),
+                        (2013, 3, 2), (2014, 7, 7)):
+            valid_from = timezone.make_aware(
+                datetime.datetime(y, m, d, 23, 30), timezone.utc)
+            Tariff.objects.create(company=company, valid_from=valid_from,
+                                  rates='rates.csv', codes='1,2')
+        self.list_url = reverse('better_admin_test_app_tariff_list')
+
+    def get(self, data=None):
+        response = self.c.get(self.list_url, data or {})
+        return response.context['view'], response.context['date_hierarchy']
+
+    def test_years(self):
+        view, hierarchy = self.get()
+        self.assertEqual([label for label, url in hierarchy['periods']],
+                         ['2012', '2013', '2014'])
+        self.assertEqual(view.get_queryset().count(), 5)
+
+    def test_months(self):
+        view, hierarchy = self.get({'valid_from__year': 2013})
+        self.assertEqual([label for label, url in hierarchy['periods']],
+                         ['January', 'March'])
+        self.assertEqual(view.get_queryset().count(), 3)
+        # a range, not an extract of the year
+        self.assertIn('"valid_from" >= ', str(view.get_queryset().query))
+
+    def test_days(self):
+        view, hierarchy = self.get({'valid_from__year': 2013,
+                                    'valid_from__month': 1,
+                                    'valid_from__day': 5})
+        self.assertEqual(hierarchy['periods'], [])
+        self.assertEqual(len(hierarchy['crumbs']), 4)
+        self.assertEqual(view.get_queryset().count(), 1)
+
+    def test_bad_period(self):
+        view, hierarchy = self.get({'valid_from__year': 2013,
+                                    'valid_from__month': 13})
+        self.assertEqual(len(hierarchy['crumbs']), 2)
+        self.assertEqual(view.get_queryset().count(), 3)
+
+    def test_export_keeps_the_period(self):
+        export_url = reverse('better_admin_test_app_tariff_export')
+        response = self.c.post(export_url + '?valid_from__year=2013',
+                               {'file_format': 0})
+        self.assertEqual(response.status_code, 200)
+        lines = [l for l in response.content.splitlines() if l]
+        # the header and the rows of 2013
+        self.assertEqual(len(lines), 4)
@@ -0,0 +1,67 @@
+import datetime
+
+from django.test import TestCase
+from django.test import Client
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from better_admin.histograms import get_histograms
+from better_admin_test_app.models import Company, Tariff
+
+
+class HistogramTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        self.companies = [Company.objects.create(name='C%d' % i,
+                                                 address='ABC',
+                                                 url='http://www.x.com',
+                                                 ip_address='192.1.1.1',
+                                                 volume=i, revenue=i * 2)
+                          for i in range(10)]
+        self.list_url = reverse('better_admin_test_app_company_list')
+
+    def get_histogram(self, name, data=None):
+        response = self.c.get(self.list_url, data or {})
+        return response.context['filter'].form.fields[name].histogram
+
+    def test_numbers(self):
+        histogram = get_histograms(Company.objects.all(),
+                                   [Company._meta.get_field('volume')], 3)
+        histogram = histogram['volume']
+        self.assertEqual((histogram['min'], histogram['max']), (0, 9))
+        self.assertEqual([b['count'] for b in histogram['buckets']],
+                         [3, 3, 4])
+        self.assertEqual(histogram['buckets'][-1]['height'], 100)
+
+    def test_dates(self):
+        start = timezone.make_aware(datetime.datetime(2013, 1, 1),
+                                    timezone.utc)
+        for i in range(4):
+            Tariff.objects.create(company=self.companies[0],
+                                  valid_from=start + datetime.timedelta(i),
+                                  rates='rates.csv', codes='1,2')
+        histogram = get_histograms(Tariff.objects.all(),
+                                   [Tariff._meta.get_field('valid_from')], 2)
+        histogram = histogram['valid_from']
+        self.assertEqual(histogram['min'], start)
+        self.assertEqual([b['count'] for b in histogram['buckets']], [2, 2])
+        self.assertEqual(histogram['buckets'][1]['start'],
+                         start + datetime.timedelta(hours=36))
+
+    def test_list_is_not_filtered(self):
+        histogram = self.get_histogram('volume', {'name': 'C1'})
+        self.assertEqual(sum(b['count'] for b in histogram['buckets']), 10)
+
+    def test_new_generation(self):
+        self.assertEqual(self.get_histogram('volume')['max'], 9)
+        Company.objects.update(volume=0)
+        self.assertEqual(self.get_histogram('volume')['max'], 9)
+        self.companies[0].volume = 50
+        self.companies[0].save()
+        self.assertEqual(self.get_histogram('volume')['max'], 50)
@@ -0,0 +1,79 @@
+import gc
+
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.db.models.query import QuerySet
+
+from better_admin.core import registry
+
+from better_admin_test_app.models import Company
+from better_admin_test_app.perf import current_rss
+
+
+def get_rss():
+    """
+    Returns the resident set size of this process now in kilobytes, not
+    the peak, which could never go down.
+    """
+    gc.collect()
+    return current_rss()
+
+
+def count_cached_querysets():
+    """
+    Returns the number of live querysets holding on to their rows.
+    """
+    gc.collect()
+    return len([o for o in gc.get_objects()
+                if isinstance(o, QuerySet) and not o._result_cache is None])
+
+
+class QuerysetMemoryTest(TestCase):
+
+    # requests per round, and how much the rss may grow (kb) in between
+    rounds = 200
+    rss_slack = 4096
+
+    def setUp(self):
+        # all this for logging into the system
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        # lets create some companies
+        for i in range(50):
+            Company.objects.create(name='X%d' % i, address = 'ABC',
+                                   url='http://www.x.com',
+                                   ip_address='192.1.1.1',
+                                   volume=100, revenue=10)
+        self.list_url = reverse('better_admin_test_app_company_list')
+        self.detail_url = reverse('better_admin_test_app_company_detail',
+                                  args=(Company.objects.all()[0].pk,))
+
+    def hammer(self):
+        for i in range(self.rounds):
+            self.c.get(self.list_url)
+            self.c.get(self.detail_url)
+
+    def test_class_level_querysets_are_never_evaluated(self):
+        self.hammer()
+        for app_admin in registry.values():
+            for model_admin in app_admin.model_admins.values():
+                self.assertIsNone(model_admin.queryset._result_cache)
+
+    def test_cached_querysets_do_not_pile_up(self):
+        self.hammer()
+        cached = count_cached_querysets()
+        self.hammer()
+        self.assertLessEqual(count_cached_querysets(), cached)
+
+    def test_rss_stays_flat(self):
+        # first round warms up caches, imports and the like
+        self.hammer()
+        rss = get_rss()
+        if rss is None:
+            self.skipTest('no /proc to read the resident set size from')
+        self.hammer()
+        self.hammer()
+        self.assertLess(get_rss() - rss, self.rss_slack)
@@ -0,0 +1,82 @@
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from better_admin.metrics import Registry, QueryCounter, count_queries, \
+                                 uncount_queries
+
+
+class RegistryTest(TestCase):
+
+    def test_render_histogram_and_counter(self):
+        registry = Registry()
+        registry.observe('request_seconds', 'app_model_list', 0.02)
+        registry.observe('request_seconds', 'app_model_list', 20)
+        registry.observe('export_rows_total', 'app_model_export', 10)
+        text = registry.render()
+        self.assertIn('better_admin_request_seconds_bucket'
+                      '{view="app_model_list",le="0.025"} 1', text)
+        self.assertIn('better_admin_request_seconds_bucket'
+                      '{view="app_model_list",le="+Inf"} 2', text)
+        self.assertIn('better_admin_request_seconds_count'
+                      '{view="app_model_list"} 2', text)
+        self.assertIn('better_admin_export_rows_total'
+                      '{view="app_model_export"} 10', text)
+
+
+class CountQueriesTest(TestCase):
+
+    def test_counts_without_the_query_log(self):
+        connection = connections[DEFAULT_DB_ALIAS]
+        use_debug_cursor = connection.use_debug_cursor
+        logged = len(connection.queries)
+        counter = QueryCounter()
+        previous = count_queries(connection, counter)
+        try:
+            list(User.objects.all())
+            User.objects.count()
+        finally:
+            uncount_queries(connection, previous)
+        User.objects.count()
+        self.assertEqual(counter.count, 2)
+        self.assertEqual(connection.use_debug_cursor, use_debug_cursor)
+        self.assertEqual(len(connection.queries), logged)
+        self.assertFalse('cursor' in connection.__dict__)
+
+    def test_keeps_statements(self):
+        connection = connections[DEFAULT_DB_ALIAS]
+        counter = QueryCounter(keep_statements=True)
+        previous = count_queries(connection, counter)
+        try:
+            User.objects.filter(username='nobody').count()
+        finally:
+            uncount_queries(connection, previous)
+        self.assertEqual(len(counter.statements), 1)
+        sql, seconds = counter.statements[0]
+        self.assertIn('nobody', sql)
+        self.assertTrue(seconds >= 0)
+
+
+class MetricsViewTest(TestCase):
+
+    def setUp(self):
+        self.superuser = User.objects.create_superuser('user',
+                                                       'user@test.com',
+                                                       'pswd')
+        User.objects.create_user('other', 'other@test.com', 'pswd')
+        self.c = Client()
+
+    def test_metrics_view_is_superuser_only(self):
+        self.c.login(username='other', password='pswd')
+        response = self.c.get(reverse('better_admin_metrics'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_metrics_view_reports_views(self):
+        self.c.login(username='user', password='pswd')
+        self.c.get(reverse('better_admin_test_app_company_list'))
+        response = self.c.get(reverse('better_admin_metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('view="better_admin_test_app_company_list"',
+                      response.content)
@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.db import connection
+
+from better_admin import profiling
+from better_admin_test_app.models import Company
+
+
+class SlowListProfilerTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        Company.objects.create(name='X', address='ABC',
+                               url='http://www.x.com',
+                               ip_address='192.1.1.1',
+                               volume=100, revenue=10)
+        self.threshold = profiling.THRESHOLD
+        profiling.slow_requests.clear()
+
+    def tearDown(self):
+        profiling.THRESHOLD = self.threshold
+        profiling.slow_requests.clear()
+
+    def test_explain(self):
+        plan = profiling.explain(Company.objects.order_by('-revenue'))
+        self.assertTrue(plan)
+        self.assertFalse(plan.startswith('EXPLAIN failed'))
+
+    def test_explain_keeps_transaction(self):
+        profiling.explain(Company.objects.order_by('-revenue'))
+        # what setUp made was not committed by the EXPLAIN
+        connection._rollback()
+        self.assertEqual(Company.objects.count(), 0)
+
+    def test_explain_sqlite_file(self):
+        if connection.vendor != 'sqlite':
+            return
+        from django.db.backends.sqlite3.base import Database
+        fd, name = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            db = Database.connect(name)
+            db.execute('CREATE TABLE t (a INTEGER)')
+            db.close()
+            plan = profiling.explain_sqlite(
+                name, 'EXPLAIN QUERY PLAN SELECT * FROM t WHERE a = %s',
+                [1])
+        finally:
+            os.remove(name)
+        self.assertTrue(plan)
+        self.assertFalse(plan.startswith('EXPLAIN failed'))
+
+    def test_off_by_default(self):
+        profiling.THRESHOLD = None
+        self.c.get(reverse('better_admin_test_app_company_list'))
+        self.assertEqual(len(profiling.slow_requests), 0)
+
+    def test_slow_request_captured(self):
+        profiling.THRESHOLD = 0
+        list_url = reverse('better_admin_test_app_company_list')
+        use_debug_cursor = connection.use_debug_cursor
+        response = self.c.get(list_url, {'name': 'X*',
+                                         'sort_by': '-revenue'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(profiling.slow_requests), 1)
+        slow = profiling.slow_requests[0]
+        self.assertEqual(slow['view'], 'better_admin_test_app_company_list')
+        self.assertEqual(slow['filters'], {'name': 'X*'})
+        self.assertEqual(slow['sort'], '-revenue')
+        self.assertTrue([sql for sql, seconds in slow['queries']
+                         if 'better_admin_test_app_company' in sql])
+        # captured without turning on the query log
+        self.assertEqual(connection.use_debug_cursor, use_debug_cursor)
+        self.assertTrue(slow['plan'])
+        response = self.c.get(reverse('better_admin_slow_requests'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, list_url)
@@ -0,0 +1,147 @@
+"""
+Query budget for every view generated by a BetterAppAdmin. Each view is hit
+with N and then 2N rows in the database, both fewer than a page, and the
+number of queries it runs must not grow with the number of rows - that would be an N+1 - nor go over
+the budget of its view type.
+"""
+import re
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, reset_queries
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse, NoReverseMatch
+from django.contrib.auth.models import User
+from django.utils.importlib import import_module
+
+from better_admin.core import registry
+from better_admin.warmup import get_view_names
+
+from better_admin_test_app.factories import seed
+
+
+#: most queries a view may run, by the last part of its name
+BUDGETS = {'list': 25, 'export': 25}
+DEFAULT_BUDGET = 15
+
+
+def get_budget(view_name):
+    return BUDGETS.get(view_name.rsplit('_', 1)[-1], DEFAULT_BUDGET)
+
+
+@contextmanager
+def capture_queries():
+    """
+    Collects the queries of the one request made inside the block into the
+    yielded list. Django empties connection.queries when a request starts,
+    so the log is read in full once it is done.
+    """
+    queries = []
+    use_debug_cursor = connection.use_debug_cursor
+    connection.use_debug_cursor = True
+    reset_queries()
+    try:
+        yield queries
+    finally:
+        queries.extend(connection.queries)
+        connection.use_debug_cursor = use_debug_cursor
+        reset_queries()
+
+
+def normalize(sql):
+    """
+    Strips literals from sql so that the same statement with different
+    parameters groups together.
+    """
+    sql = re.sub(r"'[^']*'", "'?'", sql)
+    return re.sub(r'\b\d+\b', '?', sql)
+
+
+def get_urls():
+    """
+    Returns (view_name, url) for every GET-able url of every model admin.
+    """
+    import_module(settings.ROOT_URLCONF)
+    urls = []
+    for app_admin in registry.values():
+        for model_admin in app_admin.model_admins.values():
+            obj = model_admin.get_queryset()[:1]
+            pk = obj[0].pk if obj else None
+            for view_name, args in get_view_names(model_admin):
+                if view_name.endswith('process_import'):
+                    continue
+                if args:
+                    if pk is None:
+                        continue
+                    args = (pk,)
+                try:
+                    urls.append((view_name, reverse(view_name, args=args)))
+                except NoReverseMatch:
+                    pass
+    return urls
+
+
+class QueryBudgetTest(TestCase):
+
+    # rows seeded before the first round, twice that before the second;
+    # both rounds fit on one page, so a query per row shows up as growth
+    n = 2
+
+    def setUp(self):
+        # all this for logging into the system
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+
+    def measure(self):
+        """
+        Hits every url and returns {view_name: (queries, templates)}.
+        """
+        results = {}
+        for view_name, url in get_urls():
+            with capture_queries() as queries:
+                response = self.c.get(url)
+            templates = [t.name for t in getattr(response, 'templates', [])]
+            results[view_name] = ([q['sql'] for q in queries], templates)
+        return results
+
+    def report(self, view_name, small, large):
+        """
+        Explains which statements grew, and in which templates.
+        """
+        counts = defaultdict(lambda: [0, 0])
+        for sql in small[0]:
+            counts[normalize(sql)][0] += 1
+        for sql in large[0]:
+            counts[normalize(sql)][1] += 1
+        grown = ['  %d -> %d: %s' % (c[0], c[1], sql)
+                 for sql, c in counts.items() if c[1] > c[0]]
+        return '\n'.join(['%s ran %d queries with %d rows and %d with %d '
+                          'rows' % (view_name, len(small[0]), self.n,
+                                    len(large[0]), self.n * 2),
+                          'templates: %s' % ', '.join(large[1]),
+                          'statements that grew:'] + grown)
+
+    def test_queries_do_not_grow_with_rows(self):
+        seed(self.n)
+        small = self.measure()
+        seed(self.n, start=self.n)
+        large = self.measure()
+        failures = [self.report(view_name, small[view_name], large[view_name])
+                    for view_name in small
+                    if view_name in large and
+                       len(large[view_name][0]) > len(small[view_name][0])]
+        self.assertFalse(failures, '\n\n'.join(failures))
+
+    def test_queries_within_budget(self):
+        seed(self.n)
+        results = self.measure()
+        # the pages do query, or the queries were not captured
+        self.assertTrue(results['better_admin_test_app_company_list'][0])
+        failures = ['%s ran %d queries, its budget is %d' % (
+                        view_name, len(queries), get_budget(view_name))
+                    for view_name, (queries, templates) in results.items()
+                    if len(queries) > get_budget(view_name)]
+        self.assertFalse(failures, '\n'.join(failures))
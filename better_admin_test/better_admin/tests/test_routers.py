@@ -0,0 +1,61 @@
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
+
+from better_admin import routers
+from better_admin_test_app.models import Company
+
+
+def create_company(name, using):
+    return Company.objects.using(using).create(name=name, address='ABC',
+                                               url='http://www.x.com',
+                                               ip_address='192.1.1.1',
+                                               volume=100, revenue=10)
+
+
+@override_settings(BETTER_ADMIN_REPLICA='replica')
+class ReplicaRoutingTest(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        self.company = create_company('Primary', 'default')
+        create_company('Replica', 'replica')
+
+    def test_writes_and_plain_reads_use_default(self):
+        self.assertEqual(Company.objects.all().db, 'default')
+        with routers.read_from_replica():
+            self.assertEqual(Company.objects.all().db, 'replica')
+            self.assertEqual(User.objects.all().db, 'default')
+
+    def test_no_syncdb_on_replica(self):
+        router = routers.ReplicaRouter()
+        self.assertFalse(router.allow_syncdb('replica', Company))
+        self.assertEqual(router.allow_syncdb('default', Company), None)
+
+    def test_list_and_detail_read_from_replica(self):
+        response = self.c.get(reverse('better_admin_test_app_company_list'))
+        self.assertContains(response, 'Replica')
+        self.assertNotContains(response, 'Primary')
+        response = self.c.get(reverse('better_admin_test_app_company_detail',
+                                      args=(self.company.pk,)))
+        self.assertContains(response, 'Replica')
+
+    def test_primary_after_post(self):
+        update_url = reverse('better_admin_test_app_company_update',
+                             args=(self.company.pk,))
+        response = self.c.post(update_url, {'name': 'Updated',
+                                            'address': 'ABC',
+                                            'url': 'http://www.x.com',
+                                            'ip_address': '192.1.1.1',
+                                            'volume': 100, 'revenue': 10})
+        self.assertIn(routers.STICKY_COOKIE, response.cookies)
+        self.assertEqual(Company.objects.get(pk=self.company.pk).name,
+                         'Updated')
+        response = self.c.get(reverse('better_admin_test_app_company_list'))
+        self.assertContains(response, 'Updated')
+        self.assertNotContains(response, 'Replica')
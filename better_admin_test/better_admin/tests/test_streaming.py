@@ -0,0 +1,48 @@
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin import streaming
+from better_admin_test_app.models import Company
+
+
+class StreamingTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        for i in range(120):
+            Company.objects.create(name='C%03d' % i, address='ABC',
+                                   url='http://www.x.com',
+                                   ip_address='192.1.1.1',
+                                   volume=i, revenue=10)
+        self.list_url = reverse('better_admin_test_app_company_list')
+        self.chunk_size = streaming.CHUNK_SIZE
+        streaming.CHUNK_SIZE = 25
+
+    def tearDown(self):
+        streaming.CHUNK_SIZE = self.chunk_size
+
+    def test_small_page_is_rendered(self):
+        response = self.c.get(self.list_url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content.count('name="action-select"'), 10)
+
+    def test_big_page_is_streamed(self):
+        response = self.c.get(self.list_url, {'per_page': 100,
+                                              'sort_by': 'name'})
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        # the page, 4 chunks of rows and the rest of the page
+        self.assertEqual(len(chunks), 6)
+        content = ''.join(chunks)
+        self.assertEqual(content.count('name="action-select"'), 100)
+        self.assertNotIn(streaming.MARKER, content)
+        self.assertTrue(content.index('C000') < content.index('C099'))
+        self.assertIn('</html>', content)
+
+    def test_unknown_page_size(self):
+        response = self.c.get(self.list_url, {'per_page': 7})
+        self.assertEqual(response.context['per_page'], streaming.PER_PAGE)
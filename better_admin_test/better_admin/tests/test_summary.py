@@ -0,0 +1,42 @@
+from django.test import TestCase
+from django.test import Client
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin_test_app.models import Company
+
+
+class SummaryTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        for i in range(20):
+            Company.objects.create(name='C%02d' % i, address='ABC',
+                                   url='http://www.x.com',
+                                   ip_address='192.1.1.1',
+                                   volume=i, revenue=2)
+        self.list_url = reverse('better_admin_test_app_company_list')
+
+    def get_rows(self, data=None):
+        response = self.c.get(self.list_url, data or {})
+        return response.context['view'].get_summary_rows()
+
+    def test_summary_of_all_pages(self):
+        rows = dict(self.get_rows())
+        self.assertIn(190, rows['sum'])
+        self.assertIn(40, rows['sum'])
+        self.assertIn(2, rows['avg'])
+        self.assertNotIn('min', rows)
+
+    def test_summary_is_filtered(self):
+        rows = dict(self.get_rows({'name': 'C0*'}))
+        self.assertIn(45, rows['sum'])
+
+    def test_summary_is_cached(self):
+        self.get_rows()
+        Company.objects.update(volume=0)
+        self.assertIn(190, dict(self.get_rows())['sum'])
@@ -0,0 +1,65 @@
+from django.db import connection, DatabaseError
+from django.test import TestCase
+from django.test import Client
+from django.core.urlresolvers import reverse
+from django.contrib.auth.models import User
+
+from better_admin import timeouts
+from better_admin.timeouts import query_time_budget, QueryTimeout
+
+
+SLOW_SQL = ('WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c '
+            'WHERE x < 100000000) SELECT count(*) FROM c')
+
+
+class QueryTimeBudgetTest(TestCase):
+
+    def test_slow_statement_is_cancelled(self):
+        if connection.vendor != 'sqlite':
+            return
+        with self.assertRaises(QueryTimeout):
+            with query_time_budget(0.1):
+                connection.cursor().execute(SLOW_SQL)
+        # the connection is still good to use
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        self.assertEqual(cursor.fetchall(), [(1,)])
+
+    def test_failed_statement_leaves_transaction_usable(self):
+        with self.assertRaises(DatabaseError):
+            with query_time_budget(10):
+                connection.cursor().execute('SELECT * FROM no_such_table')
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        self.assertEqual(cursor.fetchall(), [(1,)])
+
+    def test_no_budget(self):
+        with query_time_budget(None):
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchall(), [(1,)])
+
+
+class ListTimeoutTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        self.budget = timeouts.QUERY_BUDGET
+        self.check_every = timeouts.SQLITE_CHECK_EVERY
+
+    def tearDown(self):
+        timeouts.QUERY_BUDGET = self.budget
+        timeouts.SQLITE_CHECK_EVERY = self.check_every
+
+    def test_timeout_page(self):
+        if connection.vendor != 'sqlite':
+            return
+        # no time at all for the list queries
+        timeouts.QUERY_BUDGET = 1e-9
+        timeouts.SQLITE_CHECK_EVERY = 1
+        list_url = reverse('better_admin_test_app_company_list')
+        response = self.c.get(list_url, {'name': '*X*'})
+        self.assertEqual(response.status_code, 503)
+        self.assertTemplateUsed(response, 'better_admin/timeout.html')
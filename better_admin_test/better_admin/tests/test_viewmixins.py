@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.forms.models import modelform_factory
+from django.contrib.auth.models import User
+
+from better_admin.lookups import use_autocomplete
+from better_admin.widgets import AutocompleteSelect, \
+                                 AutocompleteSelectMultiple
+
+from better_admin_test_app.models import Company, KAM, Tariff
+
+
+class AutocompleteTest(TestCase):
+
+    def setUp(self):
+        # whether a table is above the threshold is cached
+        cache.clear()
+        self.company = Company.objects.create(name='X', address = 'ABC',
+                                              url='http://www.x.com',
+                                              ip_address='192.1.1.1',
+                                              volume=100, revenue=10)
+
+    def test_small_tables_keep_select(self):
+        form = modelform_factory(Tariff)()
+        use_autocomplete(form, threshold=1000)
+        self.assertNotIsInstance(form.fields['company'].widget,
+                                 AutocompleteSelect)
+
+    def test_large_tables_get_autocomplete(self):
+        form = modelform_factory(Tariff)(initial={'company': self.company.pk})
+        use_autocomplete(form, threshold=0)
+        self.assertIsInstance(form.fields['company'].widget,
+                              AutocompleteSelect)
+        # only the selected company is rendered
+        html = form['company'].as_widget()
+        self.assertIn('value="%s"' % self.company.pk, html)
+        self.assertNotIn('<option', html)
+
+    def test_large_m2m_gets_autocomplete_multiple(self):
+        user = User.objects.create_user('kam', 'kam@test.com', 'pswd')
+        KAM.objects.create(user=user, name='K', email='kam@test.com',
+                           snap='library/kam.jpg', permanent=True, sales=1,
+                           joining=date(2000, 1, 1))
+        form = modelform_factory(Tariff)()
+        use_autocomplete(form, threshold=0)
+        self.assertIsInstance(form.fields['kams'].widget,
+                              AutocompleteSelectMultiple)
@@ -1,8 +1,13 @@
+import json
+
 from django.test import TestCase
 from django.test import Client
 from django.core.urlresolvers import reverse
-from django.contrib.auth.models import User
+from django.contrib.auth.models import User, Permission
+from django.db import connections, DEFAULT_DB_ALIAS
 
+from better_admin.metrics import QueryCounter, count_queries, \
+                                 uncount_queries
 from better_admin_test_app.models import Company
 
 
@@ -28,6 +33,28 @@ class ListViewTest(TestCase):
         self.assertTemplateUsed(response, 'better_admin/list.html')
         self.assertEqual(len(response.context['object_list']), 1)
 
+    def test_list_view_reads_only_a_page(self):
+        connection = connections[DEFAULT_DB_ALIAS]
+        counter = QueryCounter(keep_statements=True)
+        previous = count_queries(connection, counter)
+        try:
+            self.c.get(reverse('better_admin_test_app_company_list'))
+        finally:
+            uncount_queries(connection, previous)
+        qn = connection.ops.quote_name
+        prefix = 'SELECT %s.%s' % (qn(Company._meta.db_table), qn('id'))
+        rows = [sql for sql, seconds in counter.statements
+                if sql.startswith(prefix)]
+        self.assertTrue(rows)
+        for sql in rows:
+            self.assertIn('LIMIT', sql)
+
+    def test_list_view_empty(self):
+        Company.objects.all().delete()
+        response = self.c.get(reverse('better_admin_test_app_company_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateNotUsed(response, 'better_admin/table.html')
+
 
 class DetailViewTest(TestCase):
 
@@ -188,3 +215,36 @@ class DeleteViewTest(TestCase):
         # check for redirect to list view
         list_url = reverse('better_admin_test_app_company_list')
         self.assertRedirects(response, list_url)
+
+
+class LookupViewTest(TestCase):
+
+    def setUp(self):
+        # all this for logging into the system
+        User.objects.create_superuser('user', 'user@test.com', 'pswd')
+        self.c = Client()
+        self.c.login(username='user', password='pswd')
+        # lets create two companies
+        for name in ('Xanadu', 'Yonder'):
+            Company.objects.create(name=name, address = 'ABC',
+                                   url='http://www.x.com',
+                                   ip_address='192.1.1.1',
+                                   volume=100, revenue=10)
+
+    def test_lookup_view_get(self):
+        # hit the url with a prefix
+        lookup_url = reverse('better_admin_test_app_company_lookup')
+        response = self.c.get(lookup_url, {'q': 'Xa'})
+        # response should be 200 and only the matching company
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.content)
+        self.assertEqual([r['text'] for r in results], ['Xanadu'])
+
+    def test_lookup_view_checks_list_access(self):
+        # users are listed by superusers only, whatever the permissions
+        user = User.objects.create_user('other', 'other@test.com', 'pswd')
+        user.user_permissions.add(Permission.objects.get(
+            content_type__app_label='auth', codename='view_user'))
+        self.c.login(username='other', password='pswd')
+        response = self.c.get(reverse('auth_user_lookup'), {'q': 'us'})
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,127 @@
+"""
+Query time budgets. A WildCardFilter becomes an __iregex and auto_sort will
+sort on any column, so a single list request can keep a worker and a
+database connection busy for as long as the table is big. Within a budget
+the database gives up on statements that run too long: via
+statement_timeout on PostgreSQL, max_execution_time on MySQL and a progress
+handler on sqlite. Other backends run without a limit.
+
+Set BETTER_ADMIN_QUERY_BUDGET (seconds) in settings, or query_budget on a
+model admin.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, router, transaction, DatabaseError
+from django.template.response import TemplateResponse
+
+
+#: default budget in seconds, None for no limit
+QUERY_BUDGET = getattr(settings, 'BETTER_ADMIN_QUERY_BUDGET', None)
+#: how many sqlite virtual machine instructions between deadline checks
+SQLITE_CHECK_EVERY = 10000
+
+
+class QueryTimeout(Exception):
+    """
+    Raised when the statements within a budget took too long.
+    """
+    pass
+
+
+def set_timeout(connection, seconds):
+    """
+    Makes the database cancel statements after seconds, None to reset.
+    """
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        if seconds is None:
+            connection.connection.set_progress_handler(None, 0)
+        else:
+            deadline = time.time() + seconds
+            connection.connection.set_progress_handler(
+                lambda: int(time.time() > deadline), SQLITE_CHECK_EVERY)
+        return
+    cursor = connection.cursor()
+    if vendor == 'postgresql':
+        if seconds is None:
+            # back to what the server or role is configured with
+            cursor.execute('RESET statement_timeout')
+        else:
+            cursor.execute('SET statement_timeout = %s',
+                           [int(seconds * 1000)])
+    elif vendor == 'mysql':
+        if seconds is None:
+            cursor.execute('SET SESSION max_execution_time = DEFAULT')
+        else:
+            cursor.execute('SET SESSION max_execution_time = %s',
+                           [int(seconds * 1000)])
+
+
+@contextmanager
+def query_time_budget(seconds, using='default'):
+    """
+    Runs the block with a statement timeout of seconds on the using
+    database. Raises QueryTimeout if a statement is cancelled.
+    """
+    if not seconds:
+        yield
+        return
+    connection = connections[using]
+    # make sure there is a connection to set the timeout on
+    connection.cursor()
+    set_timeout(connection, seconds)
+    # a failed statement aborts the transaction it was part of, and with it
+    # the reset below, unless rolled back to here first. Within
+    # TransactionMiddleware that transaction is the whole request's.
+    sid = transaction.savepoint(using=using)
+    start = time.time()
+    try:
+        yield
+    except DatabaseError:
+        transaction.savepoint_rollback(sid, using=using)
+        if time.time() - start < seconds:
+            raise
+        transaction.rollback_unless_managed(using=using)
+        raise QueryTimeout('Queries took longer than %ss' % seconds)
+    else:
+        transaction.savepoint_commit(sid, using=using)
+    finally:
+        set_timeout(connection, None)
+
+
+class QueryBudgetMixin(object):
+    """
+    To be used with BetterListView. Runs GET requests, and the render where
+    the list and the filter choices are queried, within the query budget
+    and shows a friendly page instead of a 500 when it runs out.
+    """
+    query_budget = None
+    timeout_template_name = 'better_admin/timeout.html'
+
+    def get_query_budget(self):
+        if not self.query_budget is None:
+            return self.query_budget
+        return QUERY_BUDGET
+
+    def dispatch(self, request, *args, **kwargs):
+        budget = self.get_query_budget()
+        if not budget or request.method != 'GET':
+            return super(QueryBudgetMixin, self).dispatch(request, *args,
+                                                          **kwargs)
+        try:
+            with query_time_budget(budget, router.db_for_read(self.model)):
+                response = super(QueryBudgetMixin, self).dispatch(request,
+                                                                  *args,
+                                                                  **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+        except QueryTimeout:
+            return TemplateResponse(request, self.timeout_template_name,
+                                    {'view': self,
+                                     'budget': budget,
+                                     'filters': [(k, v) for k, v in
+                                                 request.GET.items() if v]},
+                                    status=503)
+        return response
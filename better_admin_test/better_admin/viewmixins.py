@@ -4,6 +4,8 @@ from django.http import HttpResponse
 from django.utils.html import escape
 from django.conf import settings
 
+from better_admin.lookups import use_autocomplete
+
 
 # This is not mine. It belongs to django-enhanced-cbvs here:
 # https://github.com/rasca/django-enhanced-cbv
@@ -35,9 +37,9 @@ class ListFilteredMixin(object):
     def get_base_queryset(self):
         """
         We can decided to either alter the queryset before or after applying
-        the FilterSet
+        the FilterSet. Always a per-request clone of the class-level queryset.
         """
-        return super(ListFilteredMixin, self).get_queryset()
+        return super(ListFilteredMixin, self).get_queryset().all()
 
     def get_constructed_filter(self):
         # We need to store the instantiated FilterSet cause we use it in
@@ -64,6 +66,8 @@ class HookMixin(object):
     """
     pre_render = None
     pre_save = None
+    # related tables above this size get autocomplete widgets
+    autocomplete_threshold = None
 
     def init_form_from_get(self, form):
         """
@@ -86,6 +90,7 @@ class HookMixin(object):
         if not self.pre_render == None:
             self.pre_render(form, self.request)
         self.init_form_from_get(form)
+        use_autocomplete(form, self.autocomplete_threshold)
         return form
 
     def form_valid(self, form):
@@ -136,9 +141,21 @@ class BaseViewMixin(object):
         method the is passed in from the admin.
         """
         if not self.request_queryset is None:
-            return self.request_queryset(self.request)
+            # clone, in case the hook hands back a class-level queryset
+            queryset = self.request_queryset(self.request).all()
         else:
-            return super(BaseViewMixin, self).get_base_queryset()
+            queryset = super(BaseViewMixin, self).get_base_queryset()
+        return self.select_shown_relations(queryset)
+
+    def select_shown_relations(self, queryset):
+        """
+        Fetches the rows that the foreign keys shown in the list link to
+        along with the list, instead of with a query per row.
+        """
+        exclude = (self.extra_context or {}).get('exclude') or ()
+        names = [field.name for field in queryset.model._meta.fields
+                 if field.rel and not field.name in exclude]
+        return queryset.select_related(*names) if names else queryset
 
     def get_context_data(self, **kwargs):
         context = super(BaseViewMixin, self).get_context_data(**kwargs)
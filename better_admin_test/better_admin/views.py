@@ -8,7 +8,19 @@ from better_admin.viewmixins import ListFilteredMixin, BetterSuccessMessageMixin
 from braces.views import LoginRequiredMixin, PermissionRequiredMixin, \
                          StaffuserRequiredMixin, SuperuserRequiredMixin
 
-from django_actions.views import ActionViewMixin
+from better_admin.profiling import SlowListProfilerMixin
+from better_admin.advisor import IndexAdvisorMixin
+from better_admin.timeouts import QueryBudgetMixin
+from better_admin.routers import ReplicaReadMixin
+from better_admin.coalesce import CoalesceMixin
+from better_admin.actions import ActionViewMixin
+from better_admin.deletion import FastDeleteMixin
+from better_admin.batch import EditableGridMixin
+from better_admin.streaming import StreamingListMixin
+from better_admin.summary import SummaryMixin
+from better_admin.facets import FacetMixin
+from better_admin.histograms import HistogramMixin
+from better_admin.hierarchy import DateHierarchyMixin
 
 from django.http import HttpResponseRedirect
 
@@ -16,7 +28,18 @@ from django.core.urlresolvers import reverse_lazy
 
 class BetterListView(LoginRequiredMixin,
                      PermissionRequiredMixin,
+                     ReplicaReadMixin,
+                     IndexAdvisorMixin,
+                     SlowListProfilerMixin,
+                     QueryBudgetMixin,
+                     CoalesceMixin,
+                     StreamingListMixin,
+                     SummaryMixin,
+                     FacetMixin,
+                     HistogramMixin,
+                     DateHierarchyMixin,
                      TemplateUtilsMixin,
+                     EditableGridMixin,
                      ActionViewMixin,
                      BaseViewMixin,
                      ListFilteredMixin,
@@ -32,6 +55,30 @@ class BetterListView(LoginRequiredMixin,
       http://django-braces.readthedocs.org/en/latest/index.html
     - ListFilteredMixin and MetaMixin:
       better_admin/viewmixins.py
+    - ReplicaReadMixin:
+      better_admin/routers.py
+    - IndexAdvisorMixin:
+      better_admin/advisor.py
+    - SlowListProfilerMixin:
+      better_admin/profiling.py
+    - QueryBudgetMixin:
+      better_admin/timeouts.py
+    - ActionViewMixin:
+      better_admin/actions.py
+    - EditableGridMixin:
+      better_admin/batch.py
+    - StreamingListMixin:
+      better_admin/streaming.py
+    - SummaryMixin:
+      better_admin/summary.py
+    - FacetMixin:
+      better_admin/facets.py
+    - HistogramMixin:
+      better_admin/histograms.py
+    - DateHierarchyMixin:
+      better_admin/hierarchy.py
+    - CoalesceMixin:
+      better_admin/coalesce.py
     - ListView:
       http://ccbv.co.uk/projects/Django/1.5/django.views.generic.list/\
       ListView/
@@ -48,7 +95,18 @@ class BetterListView(LoginRequiredMixin,
 
 class BetterStaffuserListView(LoginRequiredMixin,
                               StaffuserRequiredMixin,
+                              ReplicaReadMixin,
+                              IndexAdvisorMixin,
+                              SlowListProfilerMixin,
+                              QueryBudgetMixin,
+                              CoalesceMixin,
+                              StreamingListMixin,
+                              SummaryMixin,
+                              FacetMixin,
+                              HistogramMixin,
+                              DateHierarchyMixin,
                               TemplateUtilsMixin,
+                              EditableGridMixin,
                               ActionViewMixin,
                               BaseViewMixin,
                               ListFilteredMixin,
@@ -61,7 +119,18 @@ class BetterStaffuserListView(LoginRequiredMixin,
 
 class BetterSuperuserListView(LoginRequiredMixin,
                               SuperuserRequiredMixin,
+                              ReplicaReadMixin,
+                              IndexAdvisorMixin,
+                              SlowListProfilerMixin,
+                              QueryBudgetMixin,
+                              CoalesceMixin,
+                              StreamingListMixin,
+                              SummaryMixin,
+                              FacetMixin,
+                              HistogramMixin,
+                              DateHierarchyMixin,
                               TemplateUtilsMixin,
+                              EditableGridMixin,
                               ActionViewMixin,
                               BaseViewMixin,
                               ListFilteredMixin,
@@ -74,6 +143,7 @@ class BetterSuperuserListView(LoginRequiredMixin,
 
 class BetterDetailView(LoginRequiredMixin,
                        PermissionRequiredMixin,
+                       ReplicaReadMixin,
                        TemplateUtilsMixin,
                        BaseViewMixin,
                        DetailView):
@@ -86,6 +156,8 @@ class BetterDetailView(LoginRequiredMixin,
       http://django-braces.readthedocs.org/en/latest/index.html
     - MetaMixin:
       better_admin/viewmixins.py
+    - ReplicaReadMixin:
+      better_admin/routers.py
     - DetailView:
       http://ccbv.co.uk/projects/Django/1.5/django.views.generic.detail/\
       DetailView/
@@ -102,6 +174,7 @@ class BetterDetailView(LoginRequiredMixin,
 
 class BetterStaffuserDetailView(LoginRequiredMixin,
                                 StaffuserRequiredMixin,
+                                ReplicaReadMixin,
                                 TemplateUtilsMixin,
                                 BaseViewMixin,
                                 DetailView):
@@ -113,6 +186,7 @@ class BetterStaffuserDetailView(LoginRequiredMixin,
 
 class BetterSuperuserDetailView(LoginRequiredMixin,
                                 SuperuserRequiredMixin,
+                                ReplicaReadMixin,
                                 TemplateUtilsMixin,
                                 BaseViewMixin,
                                 DetailView):
@@ -294,6 +368,7 @@ class BetterDeleteView(LoginRequiredMixin,
                        PermissionRequiredMixin,
                        BetterSuccessMessageMixin,
                        HookMixin,
+                       FastDeleteMixin,
                        TemplateUtilsMixin,
                        BaseViewMixin,
                        DeleteView):
@@ -306,6 +381,8 @@ class BetterDeleteView(LoginRequiredMixin,
       http://django-braces.readthedocs.org/en/latest/index.html
     - MetaMixin:
       better_admin/viewmixins.py
+    - FastDeleteMixin:
+      better_admin/deletion.py
     - DeleteView:
       http://ccbv.co.uk/projects/Django/1.5/django.views.generic.edit/\
       DeleteView/
@@ -324,6 +401,7 @@ class BetterStaffuserDeleteView(LoginRequiredMixin,
                                 StaffuserRequiredMixin,
                                 BetterSuccessMessageMixin,
                                 HookMixin,
+                                FastDeleteMixin,
                                 TemplateUtilsMixin,
                                 BaseViewMixin,
                                 DeleteView):
@@ -337,6 +415,7 @@ class BetterSuperuserDeleteView(LoginRequiredMixin,
                                 SuperuserRequiredMixin,
                                 BetterSuccessMessageMixin,
                                 HookMixin,
+                                FastDeleteMixin,
                                 TemplateUtilsMixin,
                                 BaseViewMixin,
                                 DeleteView):
@@ -0,0 +1,117 @@
+"""
+Warm-up for everything that better_admin otherwise populates lazily on the
+first requests after a deploy: the url resolver, the compiled templates,
+the filtersets and the content types of the generated admins.
+"""
+import logging
+
+from django.conf import settings
+from django.core.urlresolvers import reverse, resolve, NoReverseMatch
+from django.template.loader import get_template
+from django.contrib.contenttypes.models import ContentType
+from django.utils.importlib import import_module
+
+from better_admin.core import registry
+from better_admin.lookups import get_lookup_view_name
+
+
+logger = logging.getLogger(__name__)
+
+#: view types that take a pk in their url
+OBJECT_VIEW_TYPES = ('detail', 'update', 'delete')
+#: view types that do not
+MODEL_VIEW_TYPES = ('list', 'create', 'popup')
+#: the JSON endpoints, which have urls but no templates, and those of them
+#: that take a pk
+API_VIEW_TYPES = ('api_list', 'api_bulk')
+API_OBJECT_VIEW_TYPES = ('api_detail',)
+#: templates that the generated views pull in via include and friends
+INCLUDED_TEMPLATES = (
+    'better_admin/table.html',
+    'better_admin/row.html',
+    'better_admin/histogram.html',
+    'better_admin/field.html',
+    'better_admin/autocomplete.html',
+    'django_actions/actions_select.html',
+    'pagination/pagination.html',
+    'sorting/sort_link_frag.html',
+)
+
+
+def get_view_names(model_admin):
+    """
+    Returns (view_name, args) for all the urls generated by model_admin.
+    """
+    meta = model_admin.get_model()._meta
+    names = [(model_admin.get_view_name(v), ())
+             for v in MODEL_VIEW_TYPES + API_VIEW_TYPES]
+    names += [(model_admin.get_view_name(v), ('0',))
+              for v in OBJECT_VIEW_TYPES + API_OBJECT_VIEW_TYPES]
+    for view_type in ('export', 'import', 'process_import'):
+        names.append(('%s_%s_%s' % (meta.app_label, meta.module_name,
+                                    view_type), ()))
+    names.append((get_lookup_view_name(model_admin.get_model()), ()))
+    return names
+
+
+def warm_urls(model_admin):
+    """
+    Reverses and resolves every url of model_admin. This populates the
+    reverse dict of the resolver and compiles the url regexes.
+    """
+    for view_name, args in get_view_names(model_admin):
+        try:
+            resolve(reverse(view_name, args=args))
+        except NoReverseMatch:
+            # custom get_urls may leave some of the views out
+            pass
+
+
+def warm_templates(model_admin):
+    """
+    Loads the templates used by model_admin. With the cached template loader
+    in place, they stay compiled for the life of the process.
+    """
+    templates = [model_admin.get_template(v)
+                 for v in MODEL_VIEW_TYPES + OBJECT_VIEW_TYPES]
+    templates += [model_admin.import_template_name,
+                  model_admin.export_template_name]
+    for template_name in templates:
+        get_template(template_name)
+
+
+def warm_filter_set(model_admin):
+    """
+    Constructs the filterset along with its form. This fills in the model
+    meta caches and picks the widgets of the choice filters, which looks up
+    whether their related tables are big enough for an autocomplete. The
+    choices themselves are only queried when the form is rendered.
+    """
+    queryset = model_admin.get_queryset().none()
+    filter_set = model_admin.get_filter_set()(queryset=queryset)
+    return filter_set.form
+
+
+def warm_up(fail_silently=False):
+    """
+    Walks every registered BetterAppAdmin and warms its BetterModelAdmins.
+    Returns the list of model admins that were warmed.
+    """
+    warmed = []
+    try:
+        # importing the urlconf is what instantiates the app admins
+        import_module(settings.ROOT_URLCONF)
+        for template_name in INCLUDED_TEMPLATES:
+            get_template(template_name)
+        for app_admin in registry.values():
+            for model_admin in app_admin.model_admins.values():
+                warm_urls(model_admin)
+                warm_templates(model_admin)
+                warm_filter_set(model_admin)
+                ContentType.objects.get_for_model(model_admin.get_model())
+                warmed.append(model_admin)
+    except Exception:
+        if not fail_silently:
+            raise
+        logger.exception('better_admin warm-up failed')
+    return warmed
@@ -0,0 +1,72 @@
+"""
+Custom Widgets
+"""
+from django import forms
+from django.template.loader import render_to_string
+from django.utils.encoding import force_text
+from django.utils.safestring import mark_safe
+
+
+class AutocompleteSelect(forms.Widget):
+    """
+    Replacement for the <select> of a ModelChoiceField. Instead of rendering
+    every row of the related table, it renders the selected value only and
+    fetches the options from the lookup endpoint of the related model as
+    the user types.
+    """
+    allow_multiple_selected = False
+    template_name = 'better_admin/autocomplete.html'
+
+    def __init__(self, queryset, lookup_url, attrs=None):
+        super(AutocompleteSelect, self).__init__(attrs)
+        self.queryset = queryset
+        self.lookup_url = lookup_url
+        # ModelChoiceField assigns its (lazy) choices here, we never use them
+        self.choices = ()
+
+    def get_values(self, value):
+        """
+        Returns the selected values as a list.
+        """
+        if self.allow_multiple_selected:
+            values = value or []
+        else:
+            values = [value]
+        return [v for v in values if not v in (None, '')]
+
+    def get_selected(self, value):
+        """
+        Returns the selected objects. This is a single pk lookup instead of
+        the full table.
+        """
+        values = self.get_values(value)
+        if not values:
+            return []
+        return list(self.queryset.filter(pk__in=values))
+
+    def render(self, name, value, attrs=None):
+        final_attrs = self.build_attrs(attrs)
+        context = {
+            'name': name,
+            'id': final_attrs.get('id', 'id_%s' % name),
+            'selected': [(force_text(o.pk), force_text(o))
+                         for o in self.get_selected(value)],
+            'lookup_url': self.lookup_url,
+            'multiple': self.allow_multiple_selected,
+        }
+        return mark_safe(render_to_string(self.template_name, context))
+
+    def value_from_datadict(self, data, files, name):
+        return data.get(name, None)
+
+
+class AutocompleteSelectMultiple(AutocompleteSelect):
+    """
+    AutocompleteSelect for ModelMultipleChoiceFields.
+    """
+    allow_multiple_selected = True
+
+    def value_from_datadict(self, data, files, name):
+        if hasattr(data, 'getlist'):
+            return data.getlist(name)
+        return data.get(name, None)
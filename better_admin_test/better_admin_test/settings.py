@@ -22,9 +22,16 @@ DATABASES = {
         'PASSWORD': '',
         'HOST': '',                      # Empty for localhost through domain sockets or '127.0.0.1' for localhost through TCP.
         'PORT': '',                      # Set to empty string for default.
-    }
+    },
+    # read-only copy of default, used once BETTER_ADMIN_REPLICA is set
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'replica.sql',
+    },
 }
 
+DATABASE_ROUTERS = ['better_admin.routers.ReplicaRouter']
+
 # Hosts/domain names that are valid for this site; required if DEBUG is False
 # See https://docs.djangoproject.com/en/1.5/ref/settings/#allowed-hosts
 ALLOWED_HOSTS = []
@@ -96,9 +103,19 @@ TEMPLATE_LOADERS = (
 #     'django.template.loaders.eggs.Loader',
 )
 
+# Keep compiled templates around in production so that they only have to be
+# parsed once per process (or once per better_admin_warmup).
+if not DEBUG:
+    TEMPLATE_LOADERS = (
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    )
+
 MIDDLEWARE_CLASSES = (
+    # first, so that it times the whole request
+    'better_admin.metrics.MetricsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'better_admin.routers.ReplicaStickinessMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -203,3 +220,10 @@ TEMPLATE_CONTEXT_PROCESSORS = (
     "django.core.context_processors.request",
     "better_admin.context_processors.admin_media_prefix",
 )
+
+# Warm up urls, templates and filtersets of better_admin from wsgi.py
+BETTER_ADMIN_WARMUP = not DEBUG
+
+# Alias of the database the list, detail and export views read from, e.g.
+# 'replica'. None reads everything from default.
+BETTER_ADMIN_REPLICA = None
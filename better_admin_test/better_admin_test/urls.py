@@ -16,7 +16,7 @@ urlpatterns = patterns('') + \
               static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 
-from better_admin_test_app.models import KAM
+from better_admin_test_app.models import KAM, Company, Tariff
 from better_admin.core import BetterModelAdmin
 from better_admin_test_app.views import KAMBetterListView
 
@@ -27,9 +27,23 @@ class BetterKAMModelAdmin(BetterModelAdmin):
 	def get_request_queryset(self, request):
 		return KAM.objects.filter(user=request.user)
 
+class BetterCompanyModelAdmin(BetterModelAdmin):
+    queryset = Company.objects.all()
+    list_editable = ('volume', 'revenue')
+    list_summary = {'volume': 'sum', 'revenue': ('sum', 'avg')}
+    list_histograms = ('volume', 'revenue')
+
+class BetterTariffModelAdmin(BetterModelAdmin):
+    queryset = Tariff.objects.all()
+    list_facets = True
+    list_histograms = True
+    list_date_hierarchy = 'valid_from'
+
 class BetterAdminTestAppAdmin(BetterAppAdmin):
     app_name = 'better_admin_test_app'
-    model_admins = {'KAM': BetterKAMModelAdmin()}
+    model_admins = {'KAM': BetterKAMModelAdmin(),
+                    'Company': BetterCompanyModelAdmin(),
+                    'Tariff': BetterTariffModelAdmin()}
 
 """
 class BetterAdminTestAppAdmin(BetterAppAdmin):
@@ -27,6 +27,13 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "library_example.settings")
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
 
+# Warm up the generated admin before the first request comes in. Enable
+# with BETTER_ADMIN_WARMUP = True in settings.
+from django.conf import settings
+if getattr(settings, 'BETTER_ADMIN_WARMUP', False):
+    from better_admin.warmup import warm_up
+    warm_up(fail_silently=True)
+
 # Apply WSGI middleware here.
 # from helloworld.wsgi import HelloWorldApplication
 # application = HelloWorldApplication(application)
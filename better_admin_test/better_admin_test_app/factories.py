@@ -0,0 +1,131 @@
+"""
+Factories for the test app models. They build rows in bulk so that tests
+(and anything else that needs data) can seed realistic tables quickly.
+
+The build_* functions return unsaved instances for row number i and take
+their variation from rng, so that the same seed always yields the same rows.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from random import Random
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from better_admin_test_app.models import Company, KAM, Tariff
+
+
+WORDS = ('Acme', 'Global', 'United', 'Northern', 'Digital', 'Blue', 'Star',
+         'Pacific', 'Prime', 'Summit', 'Delta', 'Metro', 'Atlas', 'Nova')
+SUFFIXES = ('Ltd', 'Inc', 'GmbH', 'Corp', 'Holdings', 'Group', 'Partners')
+FIRST_NAMES = ('Ali', 'Sam', 'Alex', 'Kim', 'Jo', 'Max', 'Robin', 'Sasha',
+               'Chris', 'Noor', 'Eli', 'Yuki', 'Dana', 'Ravi')
+EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+#: values per IN lookup, below the variable limit of sqlite
+LOOKUP_BATCH_SIZE = 500
+
+
+def build_company(i, rng, pk=None):
+    """
+    Returns an unsaved Company for row i.
+    """
+    return Company(pk=pk,
+                   name='%s %s %d' % (rng.choice(WORDS), rng.choice(SUFFIXES),
+                                      i),
+                   address='%d %s Street' % (rng.randint(1, 999),
+                                             rng.choice(WORDS)),
+                   url='http://www.company%d.com' % i,
+                   ip_address='10.%d.%d.%d' % (i >> 16 & 255, i >> 8 & 255,
+                                               i & 255),
+                   volume=rng.randint(0, 100000),
+                   revenue=round(rng.lognormvariate(10, 2), 2))
+
+
+def build_user(i, pk=None):
+    """
+    Returns an unsaved User for the KAM of row i.
+    """
+    username = 'kam%d' % i
+    return User(pk=pk, username=username, email='%s@test.com' % username,
+                password='!')
+
+
+def build_kam(i, rng, user_id, pk=None):
+    """
+    Returns an unsaved KAM for row i, belonging to the user user_id.
+    """
+    return KAM(pk=pk,
+               user_id=user_id,
+               name='%s %d' % (rng.choice(FIRST_NAMES), i),
+               email='kam%d@test.com' % i,
+               snap='library/kam%d.jpg' % i,
+               permanent=rng.random() < 0.7,
+               sales=Decimal(rng.randint(0, 10 ** 8)) / 100,
+               joining=date(2000, 1, 1) + timedelta(days=rng.randint(0, 7000)))
+
+
+def build_tariff(i, rng, company_id, pk=None):
+    """
+    Returns an unsaved Tariff for row i, belonging to company_id.
+    """
+    return Tariff(pk=pk,
+                  company_id=company_id,
+                  valid_from=EPOCH + timedelta(minutes=rng.randint(0, 10 ** 7)),
+                  expired=rng.choice((None, True, False)),
+                  rates='library/tariff%d.pdf' % i,
+                  codes=','.join(str(rng.randint(0, 999)) for c in range(3)))
+
+
+def make_companies(n, start=0):
+    """
+    Creates n companies numbered from start onwards.
+    """
+    rng = Random(start)
+    Company.objects.bulk_create([build_company(i, rng)
+                                 for i in range(start, start + n)])
+
+
+def make_kams(n, start=0):
+    """
+    Creates n KAMs, along with their users, numbered from start onwards.
+    """
+    rng = Random(start)
+    User.objects.bulk_create([build_user(i) for i in range(start, start + n)])
+    # bulk_create does not hand back pks on every backend
+    usernames = ['kam%d' % i for i in range(start, start + n)]
+    user_ids = []
+    for i in range(0, n, LOOKUP_BATCH_SIZE):
+        batch = usernames[i:i + LOOKUP_BATCH_SIZE]
+        user_ids.extend(User.objects.filter(username__in=batch)
+                                    .order_by('pk')
+                                    .values_list('pk', flat=True))
+    KAM.objects.bulk_create([build_kam(i, rng, user_id)
+                             for i, user_id in zip(range(start, start + n),
+                                                   user_ids)])
+
+
+def make_tariffs(n, start=0):
+    """
+    Creates n tariffs spread over the existing companies and links each of
+    them to one of the existing KAMs.
+    """
+    rng = Random(start)
+    company_pks = list(Company.objects.values_list('pk', flat=True))
+    kam_pks = list(KAM.objects.values_list('pk', flat=True))
+    Tariff.objects.bulk_create([build_tariff(i, rng, rng.choice(company_pks))
+                                for i in range(start, start + n)])
+    if kam_pks:
+        through = Tariff.kams.through
+        tariffs = Tariff.objects.order_by('-pk').values_list('pk', flat=True)
+        through.objects.bulk_create([
+            through(tariff_id=pk, kam_id=rng.choice(kam_pks))
+            for pk in tariffs[:n]])
+
+
+def seed(n, start=0):
+    """
+    Creates n companies, n KAMs and n tariffs.
+    """
+    make_companies(n, start)
+    make_kams(n, start)
+    make_tariffs(n, start)
@@ -0,0 +1,207 @@
+import gc
+import json
+import random
+import subprocess
+from datetime import datetime
+from optparse import make_option
+from StringIO import StringIO
+
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, \
+                              teardown_test_environment
+from django.contrib.auth.models import User
+
+from better_admin_test_app.models import Company, KAM
+from better_admin_test_app.factories import seed, build_kam
+from better_admin_test_app.perf import summarize, measure, peak_rss, \
+                                       current_rss
+
+
+COMPANY_DATA = {
+    'name': 'Benchmark',
+    'address': '1 Benchmark Street',
+    'url': 'http://www.benchmark.com',
+    'ip_address': '10.0.0.1',
+    'volume': 100,
+    'revenue': 10,
+}
+
+
+def get_commit():
+    """
+    Returns the current git commit, so that results can be compared across
+    commits, or None outside of a git checkout.
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD']).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the generated admin of better_admin_test_app through the
+    django test client against a throw-away test database.
+    """
+    help = ("Measures latency, queries per request and memory growth of "
+            "the list, detail, create, update, import and export views of "
+            "companies, and the list and detail views of KAMs and tariffs, "
+            "at growing table sizes and writes the results as JSON.")
+    option_list = BaseCommand.option_list + (
+        make_option('--sizes', default='1000,100000,1000000',
+                    help='Comma separated row counts to benchmark at.'),
+        make_option('--requests', type='int', default=20,
+                    help='Requests per scenario and size.'),
+        make_option('--batch', type='int', default=10000,
+                    help='Rows seeded per batch.'),
+        make_option('--output', default='benchmark.json',
+                    help='File to write the JSON results to.'),
+        make_option('--no-test-db', action='store_false', dest='test_db',
+                    default=True,
+                    help='Seed and benchmark the database as it is set up '
+                         'already, by a test runner for one, instead of a '
+                         'throw-away test database.'),
+    )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options['sizes'].split(','))
+        self.requests = options['requests']
+        self.verbosity = int(options.get('verbosity', 1))
+        random.seed(0)
+
+        if options['test_db']:
+            setup_test_environment()
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = User.objects.create_superuser('bench', 'bench@test.com',
+                                                 'bench')
+            # KAMs are listed for their own user only
+            build_kam(0, random.Random(0), user.pk).save()
+            self.kam = KAM.objects.get(user=user)
+            self.client = Client()
+            self.client.login(username='bench', password='bench')
+            results = {}
+            rows = 0
+            for size in sizes:
+                while rows < size:
+                    n = min(options['batch'], size - rows)
+                    seed(n, start=rows)
+                    rows += n
+                results[str(size)] = self.run_scenarios(size)
+        finally:
+            if options['test_db']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump({'commit': get_commit(),
+                       'created': datetime.now().isoformat(),
+                       'requests': self.requests,
+                       'results': results}, output, indent=2)
+        if self.verbosity > 0:
+            self.stdout.write('Wrote %s' % options['output'])
+
+    def get_scenarios(self, size):
+        """
+        Returns {name: callable} where each callable performs one request.
+        """
+        c = self.client
+        last_page = max(size // 10, 1)
+
+        def pk():
+            return random.randint(1, size)
+
+        def url(model, view_type, *args):
+            return reverse('better_admin_test_app_%s_%s' % (model, view_type),
+                           args=args)
+
+        company_list = url('company', 'list')
+        kam_list = url('kam', 'list')
+        tariff_list = url('tariff', 'list')
+        return {
+            'company_list': lambda: c.get(company_list),
+            'company_list_deep_page': lambda: c.get(company_list,
+                                                    {'page': last_page}),
+            'company_list_filtered': lambda: c.get(company_list, {
+                'name': 'Acme*', 'volume_0': 100, 'volume_1': 10000}),
+            'company_list_sorted': lambda: c.get(company_list,
+                                                 {'sort_by': '-revenue'}),
+            'company_detail': lambda: c.get(url('company', 'detail', pk())),
+            'company_create': lambda: c.post(url('company', 'create'),
+                                             COMPANY_DATA),
+            'company_update': lambda: c.post(url('company', 'update', pk()),
+                                             dict(COMPANY_DATA,
+                                                  name='Updated')),
+            'company_export': lambda: c.post(url('company', 'export') +
+                                             '?name=Acme*',
+                                             {'file_format': 0}),
+            'company_import': self.import_companies,
+            'kam_list': lambda: c.get(kam_list),
+            'kam_list_sorted': lambda: c.get(kam_list,
+                                             {'sort_by': '-sales'}),
+            'kam_detail': lambda: c.get(url('kam', 'detail', self.kam.pk)),
+            'tariff_list': lambda: c.get(tariff_list),
+            'tariff_list_deep_page': lambda: c.get(tariff_list,
+                                                   {'page': last_page}),
+            'tariff_list_year': lambda: c.get(tariff_list,
+                                              {'valid_from__year': 2005}),
+            'tariff_list_sorted': lambda: c.get(tariff_list,
+                                                {'sort_by': '-valid_from'}),
+            'tariff_detail': lambda: c.get(url('tariff', 'detail', pk())),
+        }
+
+    def import_companies(self):
+        """
+        Uploads a CSV of 100 companies and confirms the import.
+        """
+        lines = [','.join(sorted(COMPANY_DATA.keys()))]
+        for i in range(100):
+            lines.append(','.join(unicode(COMPANY_DATA[k])
+                                  for k in sorted(COMPANY_DATA.keys())))
+        upload = StringIO('\n'.join(lines))
+        upload.name = 'companies.csv'
+        response = self.client.post(
+            reverse('better_admin_test_app_company_import'),
+            {'import_file': upload, 'input_format': 0})
+        confirm_form = response.context['confirm_form']
+        return self.client.post(
+            reverse('better_admin_test_app_company_process_import'),
+            confirm_form.initial)
+
+    def run_scenarios(self, size):
+        """
+        Runs every scenario self.requests times and summarizes them. The
+        memory of a scenario is how much the resident set grew over its
+        requests; the peak is that of the process so far, not of the
+        scenario.
+        """
+        results = {}
+        for name, request in sorted(self.get_scenarios(size).items()):
+            latencies, queries = [], []
+            gc.collect()
+            rss_before = current_rss()
+            for i in range(self.requests):
+                with measure() as m:
+                    request()
+                latencies.append(m['ms'])
+                queries.append(m['queries'])
+            gc.collect()
+            rss_after = current_rss()
+            results[name] = summarize(latencies, queries)
+            results[name]['rss_growth_kb'] = None if rss_before is None \
+                                             else rss_after - rss_before
+            results[name]['process_peak_rss_kb'] = peak_rss()
+            if self.verbosity > 0:
+                self.stdout.write('%d rows, %s: p50 %.1fms p95 %.1fms, '
+                                  '%.1f queries' % (size, name,
+                                  results[name]['p50_ms'],
+                                  results[name]['p95_ms'],
+                                  results[name]['queries']))
+        # creates and imports grow the table, keep it at size. Updates
+        # rename their rows, so the benchmark rows are easy to tell apart.
+        Company.objects.filter(name=COMPANY_DATA['name']).delete()
+        return results
@@ -0,0 +1,277 @@
+import cookielib
+import json
+import random
+import threading
+import time
+import urllib
+import urllib2
+import urlparse
+from collections import defaultdict
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from optparse import make_option
+from SocketServer import ThreadingMixIn
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import reverse
+from django.core.wsgi import get_wsgi_application
+from django.db.models import Max
+from django.contrib.auth.models import User, Permission
+from django.contrib.contenttypes.models import ContentType
+
+from better_admin_test_app.models import Company
+from better_admin_test_app.perf import summarize
+
+
+DEFAULT_MIX = 'list=40,filter=20,sort=15,detail=20,update=5'
+PASSWORD = 'loadtest'
+#: what the load test users may do to companies, all that the mix needs
+PERMISSIONS = ('view_company', 'change_company')
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """
+    WSGIServer that handles every request in its own thread.
+    """
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    """
+    Does not log every request to stderr.
+    """
+    def log_message(self, *args):
+        pass
+
+
+class NoRedirectHandler(urllib2.HTTPRedirectHandler):
+    """
+    Hands redirects back as they are, so that being sent to log in again
+    does not pass for the 200 of the login page.
+    """
+    def redirect_request(self, *args):
+        return None
+
+
+class Session(object):
+    """
+    A logged in user of the admin, talking to it over HTTP.
+    """
+
+    def __init__(self, base_url, username):
+        self.base_url = base_url
+        self.login_path = reverse('auth_login')
+        self.cookies = cookielib.CookieJar()
+        self.opener = urllib2.build_opener(
+            urllib2.HTTPCookieProcessor(self.cookies), NoRedirectHandler())
+        self.login(username)
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, path, data=None):
+        """
+        GETs or, given data, POSTs path. Returns the status code, 401 for
+        redirects to the login page.
+        """
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token())
+            data = urllib.urlencode(data)
+        try:
+            response = self.opener.open(self.base_url + path, data)
+            response.read()
+            return response.getcode()
+        except urllib2.HTTPError as e:
+            location = e.hdrs.get('Location', '') if e.hdrs else ''
+            if 300 <= e.code < 400 and path != self.login_path and \
+                    urlparse.urlparse(location).path == self.login_path:
+                return 401
+            return e.code
+        except urllib2.URLError:
+            # refused, reset and the like
+            return 0
+
+    def login(self, username):
+        # the login page hands out the csrf cookie
+        self.request(self.login_path)
+        status = self.request(self.login_path, {'username': username,
+                                                'password': PASSWORD})
+        if status != 302:
+            raise CommandError('%s could not log in' % username)
+
+
+def parse_mix(mix):
+    """
+    Turns 'list=40,detail=20' into [('list', 40), ('detail', 20)].
+    """
+    weights = []
+    for part in mix.split(','):
+        kind, weight = part.split('=')
+        weights.append((kind.strip(), int(weight)))
+    return weights
+
+
+def get_request(kind, max_pk, rng):
+    """
+    Returns (view_name, path, data) for one request of the given kind.
+    """
+    list_name = 'better_admin_test_app_company_list'
+    pk = rng.randint(1, max_pk)
+    if kind == 'list':
+        return list_name, reverse(list_name), None
+    if kind == 'filter':
+        return list_name, reverse(list_name) + '?name=Acme*', None
+    if kind == 'sort':
+        return list_name, reverse(list_name) + '?sort_by=-revenue', None
+    if kind == 'detail':
+        view_name = 'better_admin_test_app_company_detail'
+        return view_name, reverse(view_name, args=(pk,)), None
+    if kind == 'update':
+        view_name = 'better_admin_test_app_company_update'
+        return view_name, reverse(view_name, args=(pk,)), {
+            'name': 'Loadtest %d' % pk, 'address': '1 Load Street',
+            'url': 'http://www.loadtest.com', 'ip_address': '10.0.0.1',
+            'volume': pk, 'revenue': pk}
+    raise CommandError('Unknown request kind %s' % kind)
+
+
+def run_user(job):
+    """
+    Logs in as one user and replays requests from the mix until the
+    deadline. Returns a list of (kind, view_name, ms, status).
+    """
+    base_url, username, mix, max_pk, deadline, seed = job
+    rng = random.Random(seed)
+    session = Session(base_url, username)
+    kinds = [kind for kind, weight in mix for i in range(weight)]
+    samples = []
+    while time.time() < deadline:
+        kind = rng.choice(kinds)
+        view_name, path, data = get_request(kind, max_pk, rng)
+        start = time.time()
+        status = session.request(path, data)
+        samples.append((kind, view_name, (time.time() - start) * 1000,
+                        status))
+    return samples
+
+
+class Command(BaseCommand):
+    """
+    Load-tests the generated admin of better_admin_test_app with many
+    concurrent, logged in users.
+    """
+    help = ("Serves the project over WSGI locally (or targets --url), logs "
+            "in --users users and has them replay a weighted --mix of list, "
+            "filter, sort, detail and update requests for --duration "
+            "seconds from a thread or process pool. Reports requests per "
+            "second, latency percentiles and error rates per view.")
+    option_list = BaseCommand.option_list + (
+        make_option('--users', type='int', default=10,
+                    help='Number of concurrent users.'),
+        make_option('--duration', type='int', default=30,
+                    help='Seconds to run for.'),
+        make_option('--mix', default=DEFAULT_MIX,
+                    help='Weighted request mix, e.g. "%s".' % DEFAULT_MIX),
+        make_option('--pool', default='thread', choices=('thread', 'process'),
+                    help='Run the users in threads or processes.'),
+        make_option('--url', default=None,
+                    help='Target a running server instead of serving one.'),
+        make_option('--port', type='int', default=8765,
+                    help='Port to serve on when --url is not given.'),
+        make_option('--output', default=None,
+                    help='Also write the report as JSON to this file.'),
+    )
+
+    def handle(self, *args, **options):
+        max_pk = Company.objects.aggregate(m=Max('pk'))['m']
+        if not max_pk:
+            raise CommandError('Seed some companies first, see '
+                               'better_admin_seed.')
+        usernames = self.create_users(options['users'])
+
+        server = None
+        base_url = options['url']
+        if base_url is None:
+            server = make_server('127.0.0.1', options['port'],
+                                 get_wsgi_application(),
+                                 server_class=ThreadingWSGIServer,
+                                 handler_class=QuietHandler)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            base_url = 'http://127.0.0.1:%d' % options['port']
+
+        mix = parse_mix(options['mix'])
+        start = time.time()
+        deadline = start + options['duration']
+        jobs = [(base_url.rstrip('/'), username, mix, max_pk, deadline, i)
+                for i, username in enumerate(usernames)]
+        pool_class = Pool if options['pool'] == 'process' else ThreadPool
+        pool = pool_class(len(jobs))
+        try:
+            samples = sum(pool.map(run_user, jobs), [])
+        finally:
+            pool.close()
+            pool.join()
+            if server is not None:
+                server.shutdown()
+        report = self.report(samples, time.time() - start)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+
+    def create_users(self, count):
+        """
+        Makes sure there are count load test users and returns their names.
+        They are staff with just the PERMISSIONS on companies, so that the
+        permission checks are part of the load.
+        """
+        content_type = ContentType.objects.get_for_model(Company)
+        permissions = list(Permission.objects.filter(
+            content_type=content_type, codename__in=PERMISSIONS))
+        if len(permissions) != len(PERMISSIONS):
+            raise CommandError('Missing permissions, run syncdb first.')
+        usernames = ['loadtest%d' % i for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames)
+                                   .values_list('username', flat=True))
+        for username in usernames:
+            if not username in existing:
+                User.objects.create_user(username, '%s@test.com' % username,
+                                         PASSWORD)
+        for user in User.objects.filter(username__in=usernames):
+            user.is_staff = True
+            user.is_superuser = False
+            user.save()
+            user.user_permissions = permissions
+        return usernames
+
+    def report(self, samples, elapsed):
+        """
+        Prints and returns the results per (view, request kind).
+        """
+        groups = defaultdict(list)
+        for kind, view_name, ms, status in samples:
+            groups[(view_name, kind)].append((ms, status))
+        report = {'elapsed_s': elapsed,
+                  'rps': len(samples) / elapsed,
+                  'views': {}}
+        self.stdout.write('%d requests in %.1fs, %.1f requests/s' % (
+                          len(samples), elapsed, report['rps']))
+        for (view_name, kind), group in sorted(groups.items()):
+            summary = summarize([ms for ms, status in group])
+            errors = len([s for ms, s in group if s == 0 or s >= 400])
+            summary['rps'] = len(group) / elapsed
+            summary['error_rate'] = errors / float(len(group))
+            report['views']['%s (%s)' % (view_name, kind)] = summary
+            self.stdout.write('%-45s %7.1f rps  p50 %7.1fms  p95 %7.1fms  '
+                              'p99 %7.1fms  errors %5.1f%%' % (
+                              '%s (%s)' % (view_name, kind), summary['rps'],
+                              summary['p50_ms'], summary['p95_ms'],
+                              summary['p99_ms'],
+                              summary['error_rate'] * 100))
+        return report
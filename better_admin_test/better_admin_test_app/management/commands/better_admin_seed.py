@@ -0,0 +1,170 @@
+from multiprocessing import Pool
+from optparse import make_option
+from random import Random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.contrib.auth.models import User
+
+from better_admin_test_app.models import Company, KAM, Tariff
+from better_admin_test_app.factories import build_company, build_user, \
+                                            build_kam, build_tariff
+
+
+def get_offset(model):
+    """
+    Returns the highest pk in use for model. New rows are numbered after it.
+    """
+    return model.objects.aggregate(m=Max('pk'))['m'] or 0
+
+
+# pk offsets and related pks, shared with the workers once when they start
+context = {}
+
+
+def init_worker(ctx):
+    """
+    Hands the seeding context to a worker process.
+    """
+    context.update(ctx)
+
+
+def seed_batch(job):
+    """
+    Creates one batch of rows. Runs in a worker process, so the pks are
+    computed from the context rather than looked up. A batch always draws
+    from Random(seed + first row), which keeps the data the same no matter
+    how many processes share the work.
+    """
+    kind, start, count, seed = job
+    ctx = context
+    rng = Random(seed + start)
+    rows = range(start, start + count)
+    # every process needs its own connection
+    connection.close()
+    with transaction.commit_on_success():
+        if kind == 'companies':
+            Company.objects.bulk_create([
+                build_company(i, rng, pk=ctx['company'] + i + 1)
+                for i in rows])
+        elif kind == 'kams':
+            User.objects.bulk_create([
+                build_user(ctx['user_offset'] + i, pk=ctx['user'] + i + 1)
+                for i in rows])
+            KAM.objects.bulk_create([
+                build_kam(ctx['user_offset'] + i, rng,
+                          user_id=ctx['user'] + i + 1,
+                          pk=ctx['kam'] + i + 1)
+                for i in rows])
+        elif kind == 'tariffs':
+            companies, kams = ctx['companies'], ctx['kams']
+            tariffs = [build_tariff(i, rng, rng.choice(companies),
+                                    pk=ctx['tariff'] + i + 1)
+                       for i in rows]
+            Tariff.objects.bulk_create(tariffs)
+            through = Tariff.kams.through
+            links = []
+            for tariff in tariffs:
+                k = min(rng.randint(0, ctx['kams_per_tariff']), len(kams))
+                links += [through(tariff_id=tariff.pk, kam_id=kam_id)
+                          for kam_id in rng.sample(kams, k)]
+            through.objects.bulk_create(links)
+    connection.close()
+    return kind, count
+
+
+class Command(BaseCommand):
+    """
+    Seeds better_admin_test_app with large amounts of synthetic data.
+    """
+    help = ("Generates Company, KAM (with their users) and Tariff rows, "
+            "along with the Tariff.kams links, in batches. The same --seed "
+            "always yields the same data. With --processes > 1 the batches "
+            "are spread over worker processes; on sqlite these serialize on "
+            "the database lock, so stick to one process there.")
+    option_list = BaseCommand.option_list + (
+        make_option('--companies', type='int', default=0,
+                    help='Number of companies to create.'),
+        make_option('--kams', type='int', default=0,
+                    help='Number of KAMs (and users) to create.'),
+        make_option('--tariffs', type='int', default=0,
+                    help='Number of tariffs to create.'),
+        make_option('--kams-per-tariff', type='int', default=3,
+                    dest='kams_per_tariff',
+                    help='Maximum number of KAMs linked to each tariff.'),
+        make_option('--batch', type='int', default=10000,
+                    help='Rows per bulk insert and transaction.'),
+        make_option('--seed', type='int', default=0,
+                    help='Seed for the random number generator.'),
+        make_option('--processes', type='int', default=1,
+                    help='Number of worker processes.'),
+    )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.verbosity = int(options.get('verbosity', 1))
+        ctx = {
+            'company': get_offset(Company),
+            'user': get_offset(User),
+            'user_offset': User.objects.filter(
+                username__startswith='kam').count(),
+            'kam': get_offset(KAM),
+            'tariff': get_offset(Tariff),
+            'kams_per_tariff': options['kams_per_tariff'],
+        }
+        self.run('companies', options['companies'], ctx)
+        self.run('kams', options['kams'], ctx)
+        if options['tariffs']:
+            # tariffs point at every company and kam there is, new or old
+            ctx['companies'] = list(Company.objects.values_list('pk',
+                                                                flat=True))
+            ctx['kams'] = list(KAM.objects.values_list('pk', flat=True))
+            if not ctx['companies']:
+                raise CommandError('Tariffs need companies to belong to.')
+            self.run('tariffs', options['tariffs'], ctx)
+        self.reset_sequences()
+
+    def run(self, kind, total, ctx):
+        """
+        Splits total rows of kind into batches and seeds them.
+        """
+        batch = self.options['batch']
+        jobs = [(kind, start, min(batch, total - start), self.options['seed'])
+                for start in range(0, total, batch)]
+        if not jobs:
+            return
+        # forked workers must not share the parent's connection
+        connection.close()
+        if self.options['processes'] > 1:
+            pool = Pool(self.options['processes'], initializer=init_worker,
+                        initargs=(ctx,))
+            results = pool.imap_unordered(seed_batch, jobs)
+        else:
+            pool = None
+            init_worker(ctx)
+            results = (seed_batch(job) for job in jobs)
+        done = 0
+        for kind, count in results:
+            done += count
+            if self.verbosity > 1:
+                self.stdout.write('%s: %d/%d' % (kind, done, total))
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if self.verbosity > 0:
+            self.stdout.write('Created %d %s' % (total, kind))
+
+    def reset_sequences(self):
+        """
+        The rows were created with explicit pks, so backends with sequences
+        need them moved past the new rows.
+        """
+        models = [Company, User, KAM, Tariff, Tariff.kams.through]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            cursor = connection.cursor()
+            for sql in statements:
+                cursor.execute(sql)
+            transaction.commit_unless_managed()
@@ -0,0 +1,81 @@
+"""
+Measurement helpers shared by the benchmark and load-test commands.
+"""
+import resource
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+from better_admin.metrics import QueryCounter, count_queries, \
+                                 uncount_queries
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile (0-100) of values, nearest-rank method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = int(round(p / 100.0 * (len(values) - 1)))
+    return values[rank]
+
+
+def summarize(latencies, queries=None):
+    """
+    Returns a dict of latency percentiles (in milliseconds), along with the
+    mean number of queries per request if given.
+    """
+    summary = {
+        'requests': len(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': sum(latencies) / len(latencies) if latencies else None,
+    }
+    if queries is not None:
+        summary['queries'] = sum(queries) / float(len(queries)) \
+                             if queries else None
+    return summary
+
+
+def peak_rss():
+    """
+    Returns peak resident set size of this process in kilobytes.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def current_rss():
+    """
+    Returns the resident set size of this process now in kilobytes, or None
+    where there is no /proc to read it from.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (IOError, IndexError, ValueError):
+        return None
+    return pages * resource.getpagesize() // 1024
+
+
+@contextmanager
+def measure():
+    """
+    Times the block and counts the queries it runs on any database. Yields
+    a dict that gets 'ms' and 'queries' filled in on exit.
+    """
+    # counted by cursor, Django empties connection.queries on every request
+    counter = QueryCounter()
+    counted = [(connection, count_queries(connection, counter))
+               for connection in connections.all()]
+    result = {}
+    start = time.time()
+    try:
+        yield result
+    finally:
+        result['ms'] = (time.time() - start) * 1000
+        result['queries'] = counter.count
+        for connection, previous in counted:
+            uncount_queries(connection, previous)
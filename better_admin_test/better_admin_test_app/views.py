@@ -10,6 +10,7 @@ class KAMBetterListView(BetterListView):
 	permission_required = 'better_admin_test_app.view_kam'
 	template_name = 'better_admin/list.html'
 	filter_set = filterset_factory(KAM)
+	summary = {'sales': ('sum', 'avg')}
 
 	def get_request_queryset(self, request):
 		return self.model.queryset.all()
\ No newline at end of file